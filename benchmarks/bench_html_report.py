@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare the html report engines of `process_eplus_html_report` on a synthetic
+EnergyPlus table report.
+
+    python benchmarks/bench_html_report.py --reports 100 --tables 5 --rows 30
+"""
+
+import argparse
+import time
+from tempfile import TemporaryDirectory
+
+from path import Path
+
+from energyplus_wrapper.utils import process_eplus_html_report
+
+
+def write_report(filename, n_reports, n_tables, n_rows, n_cols):
+    """Write an html report that mimics the EnergyPlus table report layout."""
+    with open(filename, "w") as f:
+        f.write("<html>\n<head><title>Synthetic report</title></head>\n<body>\n")
+        f.write("<p>Program Version:<b>EnergyPlus, Version 8.7.0</b></p>\n")
+        for i_report in range(n_reports):
+            f.write("<hr>\n")
+            f.write(f"<p>Report:<b> Report {i_report}</b></p>\n")
+            f.write(f"<p>For:<b> Zone {i_report}</b></p>\n")
+            f.write("<p>Timestamp: <b>2017-01-01\n    12:00:00</b></p>\n")
+            for i_table in range(n_tables):
+                f.write(f"<b>Table {i_table}</b><br><br>\n")
+                f.write('<table border="1" cellpadding="4" cellspacing="0">\n')
+                f.write("  <tr><td></td>\n")
+                for i_col in range(n_cols):
+                    f.write(f'    <td align="right">Column {i_col} [kWh]</td>\n')
+                f.write("  </tr>\n")
+                for i_row in range(n_rows):
+                    f.write(f'  <tr>\n    <td align="right">Row {i_row}</td>\n')
+                    for i_col in range(n_cols):
+                        value = i_report * 1000.0 + i_row * 10.0 + i_col
+                        f.write(f'    <td align="right">{value:12.2f}</td>\n')
+                    f.write("  </tr>\n")
+                f.write("</table>\n<br><br>\n")
+        f.write("</body>\n</html>\n")
+
+
+def bench(filename, engine, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reports = process_eplus_html_report(filename, engine=engine)
+        timings.append(time.perf_counter() - start)
+    return min(timings), reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=100)
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp_dir:
+        filename = Path(tmp_dir) / "eplus-table.htm"
+        write_report(filename, args.reports, args.tables, args.rows, args.cols)
+        print(
+            f"{args.reports * args.tables} tables, "
+            f"{filename.size / 2 ** 20:.1f} MB report"
+        )
+        results = {}
+        for engine in ["bs4", "lxml"]:
+            timing, results[engine] = bench(filename, engine, args.repeat)
+            print(f"{engine:>6}: {timing:.3f} s")
+
+    assert results["bs4"].keys() == results["lxml"].keys()
+    for report_key, tables in results["bs4"].items():
+        assert tables.keys() == results["lxml"][report_key].keys()
+        for title, df in tables.items():
+            assert df.equals(results["lxml"][report_key][title])
+
+
+if __name__ == "__main__":
+    main()
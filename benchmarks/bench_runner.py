@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Measure the wrapper own costs with a stub EnergyPlus executable (the
+`tests/fake_energyplus.py` stand-in, that sleeps then writes outputs of the
+requested size): per-run overhead, `run_many` scaling over the joblib backends
+and number of workers, post-processing throughput and peak memory.
+
+The results are written as JSON (with the commit, platform and parameters) so
+that they can be compared over time.
+
+    python benchmarks/bench_runner.py --runs 20 --sleep 0.1 --hours 8760 \\
+        --reports 50 --n-jobs 1 2 4 --output benchmark.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from tempfile import TemporaryDirectory
+
+import joblib
+from path import Path
+
+from energyplus_wrapper import BatchStats, EPlusRunner
+from energyplus_wrapper.instrumentation import run_statistics
+from energyplus_wrapper.utils import (
+    process_eplus_html_report,
+    process_eplus_time_series,
+)
+
+repo_dir = Path(__file__).abspath().parent.parent
+tests_dir = repo_dir / "tests"
+
+
+def make_eplus_root(folder, sleep, hours, reports, warnings):
+    """Write an EnergyPlus root whose executable is the fake EnergyPlus, with its
+    sleep time and output sizes baked in (the joblib workers do not have to
+    inherit them)."""
+    root = (Path(folder) / "EnergyPlus-stub").mkdir_p()
+    eplus_bin = root / "energyplus"
+    eplus_bin.write_text(
+        "#!/bin/sh\n"
+        f"export FAKE_EPLUS_SLEEP={sleep}\n"
+        f"export FAKE_EPLUS_HOURS={hours}\n"
+        f"export FAKE_EPLUS_REPORTS={reports}\n"
+        f"export FAKE_EPLUS_WARNINGS={warnings}\n"
+        f'exec "{sys.executable}" "{tests_dir / "fake_energyplus.py"}" "$@"\n'
+    )
+    eplus_bin.chmod(0o755)
+    (tests_dir / "Energy+.idd").copy(root / "Energy+.idd")
+    return root
+
+
+def _summary(stats):
+    summary = stats.summary()
+    return {
+        phase: {column: float(value) for column, value in row.items()}
+        for phase, row in summary.iterrows()
+    }
+
+
+def bench_overhead(runner, idf_file, epw_file, n_runs, backup_dir):
+    """Run the simulations one after the other, and split their duration in
+    phases. The overhead is the run duration minus the stub run."""
+    runs = {}
+    start = time.perf_counter()
+    for i in range(n_runs):
+        sim = runner.run_one(
+            idf_file, epw_file, simulation_name=f"sim_{i}", backup_dir=backup_dir
+        )
+        runs[i] = run_statistics(sim)
+    stats = BatchStats()
+    stats.collect(runs, time.perf_counter() - start, 1)
+    overhead = (stats.table["total"] - stats.table["eplus"]).describe(
+        percentiles=[0.5, 0.9, 0.99]
+    )
+    return {
+        "runs": n_runs,
+        "phases": _summary(stats),
+        "overhead": {
+            key: float(overhead[key]) for key in ["mean", "50%", "90%", "99%", "max"]
+        },
+        "overhead_share": stats.wrapper_overhead / stats.table["total"].sum(),
+        "peak_rss": max(stats.peak_rss.values()) if stats.peak_rss else None,
+    }
+
+
+def bench_scaling(runner, idf_file, epw_file, n_runs, backends, n_jobs, backup_dir):
+    """Run a batch with `run_many` for each backend and number of workers. The
+    workers are started by a first, untimed batch."""
+    results = []
+    for backend in backends:
+        reference = None
+        for jobs in n_jobs:
+            with joblib.parallel_backend(backend, n_jobs=jobs):
+                runner.run_many(
+                    {f"warmup_{i}": idf_file for i in range(jobs)},
+                    epw_file,
+                    backup_dir=backup_dir,
+                )
+                stats = BatchStats()
+                runner.run_many(
+                    {f"sim_{i}": idf_file for i in range(n_runs)},
+                    epw_file,
+                    backup_dir=backup_dir,
+                    stats=stats,
+                )
+            throughput = n_runs / stats.wall_time
+            if reference is None:
+                reference = throughput
+            results.append(
+                {
+                    "backend": backend,
+                    "n_jobs": jobs,
+                    "n_workers": stats.n_workers,
+                    "wall_time": stats.wall_time,
+                    "throughput": throughput,
+                    "speedup": throughput / reference,
+                    "utilization": stats.utilization,
+                    "solver_time": stats.solver_time,
+                    "wrapper_overhead": stats.wrapper_overhead,
+                }
+            )
+    return results
+
+
+def _best_of(func, repeat):
+    """Best time of `repeat` calls, and peak allocated memory of an extra call
+    (tracemalloc slows the calls down too much to time them)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def bench_post_processing(eplus_root, idf_file, epw_file, repeat):
+    """Parse the outputs of one stub run: html table report and csv files."""
+    with TemporaryDirectory() as working_dir:
+        working_dir = Path(working_dir)
+        subprocess.run(
+            [
+                eplus_root / "energyplus",
+                *["-s", "d", "-r", "-x", "-i", eplus_root / "Energy+.idd"],
+                *["-w", epw_file, idf_file],
+            ],
+            cwd=working_dir,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        html_file = working_dir / "eplus-table.htm"
+        csv_size = sum(f.size for f in working_dir.files("*.csv"))
+        results = {}
+        for name, size, func in [
+            ("html", html_file.size, lambda: process_eplus_html_report(html_file)),
+            ("csv", csv_size, lambda: process_eplus_time_series(working_dir)),
+        ]:
+            elapsed, peak = _best_of(func, repeat)
+            results[name] = {
+                "size": size,
+                "time": elapsed,
+                "throughput": size / elapsed,
+                "peak_allocated": peak,
+            }
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--sleep", type=float, default=0.1, help="in seconds")
+    parser.add_argument("--hours", type=int, default=8760)
+    parser.add_argument("--reports", type=int, default=50)
+    parser.add_argument("--warnings", type=int, default=100)
+    parser.add_argument(
+        "--backends", nargs="+", default=["loky", "multiprocessing", "threading"]
+    )
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    idf_file = tests_dir / "in_8-7-0.idf"
+    epw_file = tests_dir / "in.epw"
+    with TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        eplus_root = make_eplus_root(
+            tmp, args.sleep, args.hours, args.reports, args.warnings
+        )
+        runner = EPlusRunner(eplus_root, temp_dir=tmp.mkdir_p())
+        backup_dir = tmp / "backup"
+        overhead = bench_overhead(runner, idf_file, epw_file, args.runs, backup_dir)
+        print(
+            f"overhead per run: {overhead['overhead']['mean'] * 1e3:.1f} ms"
+            f" (p90 {overhead['overhead']['90%'] * 1e3:.1f} ms),"
+            f" {overhead['overhead_share']:.0%} of the run time"
+        )
+        scaling = bench_scaling(
+            runner,
+            idf_file,
+            epw_file,
+            args.runs,
+            args.backends,
+            args.n_jobs,
+            backup_dir,
+        )
+        print(f"{'backend':<16} {'n_jobs':>6} {'runs/s':>8} {'speedup':>8} {'util':>6}")
+        for result in scaling:
+            print(
+                f"{result['backend']:<16} {result['n_jobs']:>6}"
+                f" {result['throughput']:8.2f} {result['speedup']:8.2f}"
+                f" {result['utilization']:6.0%}"
+            )
+        post_processing = bench_post_processing(
+            eplus_root, idf_file, epw_file, args.repeat
+        )
+        for name, result in post_processing.items():
+            print(
+                f"{name} post-processing: {result['size'] / 2 ** 20:.1f} MiB"
+                f" in {result['time']:.3f} s"
+                f" ({result['throughput'] / 2 ** 20:.1f} MiB/s)"
+            )
+
+    # kilobytes on Linux, bytes on macOS
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    self_rss *= 1 if sys.platform == "darwin" else 1024
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": vars(args),
+        "overhead": overhead,
+        "scaling": scaling,
+        "post_processing": post_processing,
+        "peak_memory": {
+            "eplus_process": overhead["peak_rss"],
+            "wrapper_process": self_rss,
+        },
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare the per-run cost of the input staging strategies of `EPlusRunner`, for
+a weather file and a few extra files shared by all the runs.
+
+    python benchmarks/bench_staging.py --runs 200 --epw-size 1.6 --extra-files 5
+"""
+
+import argparse
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from path import Path, TempDir
+
+from energyplus_wrapper.staging import StagingArea, stage_file, staging_strategies
+
+
+def write_inputs(folder, epw_size, n_extra_files):
+    """Write a weather file of `epw_size` MB and a few smaller schedule files."""
+    epw_file = folder / "weather.epw"
+    with open(epw_file, "wb") as f:
+        f.write(os.urandom(int(epw_size * 1e6)))
+    extra_files = []
+    for i in range(n_extra_files):
+        extra_file = folder / f"schedule_{i}.csv"
+        with open(extra_file, "wb") as f:
+            f.write(os.urandom(200_000))
+        extra_files.append(extra_file)
+    return [epw_file, *extra_files]
+
+
+def bench(inputs, temp_dir, strategy, shared_area, n_runs):
+    staging_area = None
+    if shared_area:
+        staging_area = StagingArea(
+            TempDir(prefix="energyplus_staging_", dir=temp_dir), strategy
+        )
+    start = time.perf_counter()
+    for _ in range(n_runs):
+        with TempDir(prefix="energyplus_run_", dir=temp_dir) as td:
+            for input_file in inputs:
+                if staging_area is not None:
+                    staging_area.stage(input_file, td)
+                else:
+                    stage_file(input_file, td, strategy=strategy)
+    elapsed = time.perf_counter() - start
+    if staging_area is not None:
+        staging_area.root.rmtree_p()
+    return elapsed / n_runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--epw-size", type=float, default=1.6, help="in MB")
+    parser.add_argument("--extra-files", type=int, default=5)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        inputs = write_inputs(tmp, args.epw_size, args.extra_files)
+        print(f"{'strategy':<10} {'staging area':<14} {'per run [ms]':>12}")
+        for strategy in staging_strategies:
+            for shared_area in [False, True]:
+                per_run = bench(inputs, tmp, strategy, shared_area, args.runs)
+                print(f"{strategy:<10} {str(shared_area):<14} {per_run * 1e3:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,21 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+from .backup import BackupArchive
+from .cache import ResultCache
 from .env_manager import ensure_eplus_root
+from .instrumentation import BatchStats
+from .journal import RunJournal
+from .limits import RunLimits, SimulationKilled, SimulationTimeout
+from .outputs import OutputSelection
+from .parametric import ParametricSample
+from .pruning import OutputPruning
+from .registry import RunnerRegistry
 from .runner import EPlusRunner
-from .simulation import Simulation
\ No newline at end of file
+from .scheduling import LongestFirstScheduler, RuntimeHistory
+from .simulation import Simulation
+from .staging import StagingArea
+from .store import ResultStore
+from .transport import MemmapTransport
+from .workdir import RamWorkDir
+from .workqueue import WorkQueue
\ No newline at end of file
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from typing import List, Optional, Sequence, Union
+
+import attr
+from loguru import logger
+from path import Path
+
+from .cache import file_digest
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, see the "backup" extra
+    zstandard = None
+
+backup_formats = ["xz", "gz", "zst", "zip"]
+_archive_suffixes = {"xz": ".tar.xz", "gz": ".tar.gz", "zst": ".tar.zst", "zip": ".zip"}
+# the shared files are compressed one by one, zip archives use gzip blobs
+_blob_codecs = {"xz": "xz", "gz": "gz", "zst": "zst", "zip": "gz"}
+manifest_name = "backup_manifest.json"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def _check_format(instance, attribute, value):
+    if value not in backup_formats:
+        raise ValueError(f"{attribute.name} should be one of {backup_formats}.")
+    if value == "zst" and zstandard is None:
+        raise ImportError(
+            "The zst backup format needs the zstandard package"
+            " (pip install energyplus_wrapper[backup])."
+        )
+
+
+def _background_executor() -> ThreadPoolExecutor:
+    """The thread that archives the asynchronous backups of this process (a new
+    one after a fork, as the threads are not inherited)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(1, thread_name_prefix="energyplus_backup")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+@contextmanager
+def _open_compressed(filename: Path, mode: str, codec: str, level=None):
+    """Open a compressed file as a binary stream ("rb" or "wb" mode)."""
+    if codec == "xz":
+        f = lzma.open(filename, mode, preset=level)
+    elif codec == "gz":
+        f = gzip.open(filename, mode, compresslevel=9 if level is None else level)
+    elif mode == "rb":
+        raw = open(filename, "rb")
+        f = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        raw = open(filename, "wb")
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        f = compressor.stream_writer(raw, closefd=True)
+    with f:
+        yield f
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:  # other file system, or no hard link support
+        shutil.copy2(src, dst)
+
+
+@attr.s(frozen=True)
+class BackupArchive:
+    """Backup of the simulation files as compressed archives, with the inputs
+    shared by the simulations stored only once.
+
+    Given as `backup_dir` to the runner methods, each backup is streamed into a
+    `{status}_{name}` archive (tar + xz, gz or zstd, or zip) instead of being
+    copied as a folder. The shared files (the weather file, the idd, the files
+    matching `shared` and the inputs staged as links from a staging area) are
+    stored once in a content-addressed `blobs` folder, and only referenced by the
+    archives.
+
+    With `asynchronous`, the working directory is snapshotted with hard links
+    (no data copied on the same file system) and archived by a background thread
+    of the worker, off the simulation critical path. `wait` waits for the
+    pending backups of every process.
+
+    Attributes:
+        root (Path): where the archives and the blobs are saved.
+        format (str): the archive format, either "xz", "gz", "zst" (that needs
+            the zstandard package) or "zip". (default: {"xz"})
+        level (int, optional): the compression level (the format default if None).
+        shared (Sequence[str]): the glob patterns of the file names stored once
+            in the blob store. (default: {("*.epw", "*.idd", "*.fmu")})
+        asynchronous (bool): archive in a background thread. (default: {False})
+    """
+
+    root = attr.ib(type=Path, converter=lambda path: Path(path).abspath())
+    format = attr.ib(type=str, default="xz", validator=_check_format)
+    level = attr.ib(type=Optional[int], default=None)
+    shared = attr.ib(
+        type=Sequence[str], default=("*.epw", "*.idd", "*.fmu"), converter=tuple
+    )
+    asynchronous = attr.ib(type=bool, default=False)
+
+    @property
+    def blobs_dir(self) -> Path:
+        return self.root / "blobs"
+
+    @property
+    def pending_dir(self) -> Path:
+        return self.root / ".pending"
+
+    @property
+    def suffix(self) -> str:
+        return _archive_suffixes[self.format]
+
+    def archive_file(self, name: str) -> Path:
+        """The archive of a backup.
+
+        Arguments:
+            name {str} -- the backup name, as `{status}_{simulation name}`
+
+        Returns:
+            Path -- the archive file
+        """
+        return self.root / f"{name}{self.suffix}"
+
+    def _is_shared(self, filename: Path) -> bool:
+        if any(fnmatch(filename.name, pattern) for pattern in self.shared):
+            return True
+        # staged from a shared staging area
+        return filename.islink() or os.stat(filename).st_nlink > 1
+
+    def _store_blob(self, filename: Path, codec: str) -> str:
+        digest = file_digest(Path(os.path.realpath(filename)))
+        blob = self.blobs_dir / digest[:2] / f"{digest}.{codec}"
+        if not blob.exists():
+            blob.parent.makedirs_p()
+            tmp_blob = blob.parent / f".{digest}.{uuid.uuid4().hex}.tmp"
+            with open(filename, "rb") as src, _open_compressed(
+                tmp_blob, "wb", codec, self.level
+            ) as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.replace(tmp_blob, blob)
+        return digest
+
+    def _write(self, folder: Path, name: str, shared: Sequence[str]) -> Path:
+        """Archive a folder, the `shared` files (relative paths) as blobs."""
+        codec = _blob_codecs[self.format]
+        blobs = {rel: self._store_blob(folder / rel, codec) for rel in shared}
+        manifest = json.dumps(
+            {"name": name, "created": time.time(), "blob_codec": codec, "blobs": blobs}
+        ).encode("utf8")
+        files = sorted(
+            str(filename.relpath(folder))
+            for filename in folder.walkfiles()
+            if str(filename.relpath(folder)) not in blobs
+        )
+        archive = self.archive_file(name)
+        self.root.makedirs_p()
+        tmp_archive = self.root / f".{name}.{uuid.uuid4().hex}.tmp"
+        if self.format == "zip":
+            compresslevel = {} if self.level is None else {"compresslevel": self.level}
+            with zipfile.ZipFile(
+                tmp_archive, "w", zipfile.ZIP_DEFLATED, **compresslevel
+            ) as zf:
+                zf.writestr(manifest_name, manifest)
+                for rel in files:
+                    zf.write(folder / rel, rel)
+        else:
+            with _open_compressed(
+                tmp_archive, "wb", self.format, self.level
+            ) as f, tarfile.open(fileobj=f, mode="w|") as tar:
+                info = tarfile.TarInfo(manifest_name)
+                info.size, info.mtime = len(manifest), time.time()
+                tar.addfile(info, io.BytesIO(manifest))
+                for rel in files:
+                    # the links to a staging area are archived as regular files
+                    stat = os.stat(folder / rel)
+                    info = tarfile.TarInfo(rel)
+                    info.size, info.mtime = stat.st_size, stat.st_mtime
+                    info.mode = stat.st_mode & 0o777
+                    with open(folder / rel, "rb") as content:
+                        tar.addfile(info, content)
+        os.replace(tmp_archive, archive)
+        return archive
+
+    def _shared_files(self, folder: Path) -> List[str]:
+        return [
+            str(filename.relpath(folder))
+            for filename in folder.walkfiles()
+            if self._is_shared(filename)
+        ]
+
+    def save(self, simulation) -> Path:
+        """Back up the files of a simulation.
+
+        Arguments:
+            simulation {Simulation} -- the simulation
+
+        Returns:
+            Path -- the archive (that may not be written yet if asynchronous)
+        """
+        name = f"{simulation.status}_{simulation.name}"
+        folder = Path(simulation.working_dir)
+        shared = self._shared_files(folder)
+        if not self.asynchronous:
+            return self._write(folder, name, shared)
+        snapshot = self.pending_dir / uuid.uuid4().hex
+        tmp_snapshot = self.pending_dir / f".{snapshot.name}.tmp"
+        shutil.copytree(folder, tmp_snapshot / "files", copy_function=_link_or_copy)
+        (tmp_snapshot / "backup.json").write_text(
+            json.dumps({"name": name, "shared": shared})
+        )
+        # the snapshot is only seen (by `flush`) once complete
+        os.replace(tmp_snapshot, snapshot)
+        _background_executor().submit(self._archive_snapshot, snapshot)
+        return self.archive_file(name)
+
+    def _archive_snapshot(self, snapshot: Path, claimed: bool = False) -> bool:
+        if not claimed:
+            active = snapshot.parent / f"{snapshot.name}.active"
+            try:
+                os.replace(snapshot, active)
+            except FileNotFoundError:  # already claimed by `flush`
+                return False
+            snapshot = active
+        try:
+            meta = json.loads((snapshot / "backup.json").read_text())
+            self._write(snapshot / "files", meta["name"], meta["shared"])
+        except Exception:
+            logger.exception(f"Backup of {snapshot} failed, it can be flushed later.")
+            return False
+        snapshot.rmtree_p()
+        return True
+
+    def pending(self) -> int:
+        """The number of backups not archived yet (by any process)."""
+        if not self.pending_dir.exists():
+            return 0
+        return len([d for d in self.pending_dir.dirs() if not d.name.startswith(".")])
+
+    def wait(self, poll: float = 0.1, timeout: Optional[float] = None):
+        """Wait for the asynchronous backups of every process.
+
+        Keyword Arguments:
+            poll {float} -- the polling period, in seconds. (default: {0.1})
+            timeout {float, optional} -- raise a TimeoutError after that many
+                seconds.
+        """
+        start = time.monotonic()
+        while self.pending():
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"{self.pending()} backups still pending.")
+            time.sleep(poll)
+
+    def flush(self) -> int:
+        """Archive the pending snapshots in the current process, as the ones left
+        by a crashed worker. Only use it when no backup is in progress.
+
+        Returns:
+            int -- the number of archived backups
+        """
+        if not self.pending_dir.exists():
+            return 0
+        return sum(
+            self._archive_snapshot(snapshot, claimed=snapshot.name.endswith(".active"))
+            for snapshot in self.pending_dir.dirs()
+            if not snapshot.name.startswith(".")
+        )
+
+    def archives(self) -> List[Path]:
+        """The saved archives."""
+        if not self.root.exists():
+            return []
+        return sorted(self.root.files(f"*{self.suffix}"))
+
+    def restore(self, backup: Union[str, Path], destination: Path) -> Path:
+        """Restore a backup in a folder, with its shared files.
+
+        Arguments:
+            backup {Union[str, Path]} -- the archive, or the backup name as
+                `{status}_{simulation name}`
+            destination {Path} -- where the files are restored
+
+        Returns:
+            Path -- the destination folder
+        """
+        archive = Path(backup)
+        if not archive.exists():
+            archive = self.archive_file(str(backup))
+        destination = Path(destination).abspath().makedirs_p()
+        if archive.endswith(".zip"):
+            with zipfile.ZipFile(archive) as zf:
+                manifest = json.loads(zf.read(manifest_name))
+                members = [name for name in zf.namelist() if name != manifest_name]
+                zf.extractall(destination, members)
+        else:
+            codec = next(
+                codec
+                for codec, suffix in _archive_suffixes.items()
+                if archive.endswith(suffix)
+            )
+            with _open_compressed(archive, "rb", codec) as f, tarfile.open(
+                fileobj=f, mode="r|"
+            ) as tar:
+                manifest = None
+                for member in tar:
+                    if member.name == manifest_name:
+                        manifest = json.loads(tar.extractfile(member).read())
+                        continue
+                    _extract(tar, member, destination)
+        codec = manifest["blob_codec"]
+        for rel, digest in manifest["blobs"].items():
+            target = (destination / rel).parent.makedirs_p() / Path(rel).name
+            blob = self.blobs_dir / digest[:2] / f"{digest}.{codec}"
+            with _open_compressed(blob, "rb", codec) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+        return destination
+
+
+def _extract(tar: tarfile.TarFile, member: tarfile.TarInfo, destination: Path):
+    target = (destination / member.name).abspath()
+    if not target.startswith(destination):
+        raise ValueError(f"{member.name} is outside of the backup.")
+    if hasattr(tarfile, "data_filter"):
+        tar.extract(member, destination, filter="data")
+    else:
+        tar.extract(member, destination)
+
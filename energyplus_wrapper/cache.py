@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import hashlib
+import os
+import pickle
+import time
+from functools import lru_cache, partial
+from types import FunctionType, MethodType
+from typing import Any, Callable, Mapping, Optional, Sequence, Tuple
+
+import attr
+import fasteners
+from path import Path
+
+from .simulation import Simulation
+
+# Simulation attributes that describe the inputs of a run: they are provided by
+# the runner and are never stored in the cache.
+_input_fields = (
+    "name",
+    "eplus_bin",
+    "idf_file",
+    "epw_file",
+    "idd_file",
+    "working_dir",
+    "post_process",
+)
+
+# the eviction removes entries until the cache is below that fraction of its
+# maximum size, so that a full cache is not scanned again on the next store.
+_eviction_target = 0.8
+
+
+@lru_cache(maxsize=256)
+def _cached_file_digest(filename: str, mtime_ns: int, size: int) -> str:
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def file_digest(filename: Path) -> str:
+    """Compute the sha256 digest of a file content.
+
+    The result is memoized for the process lifetime, keyed by the file path,
+    modification time and size, so that large files shared by many simulations
+    (weather file, idd...) are only hashed once.
+
+    Arguments:
+        filename {Path} -- the file to hash
+
+    Returns:
+        str -- the hexadecimal digest
+    """
+    filename = Path(filename).abspath()
+    stat = filename.stat()
+    return _cached_file_digest(str(filename), stat.st_mtime_ns, stat.st_size)
+
+
+def _value_fingerprint(value: Any) -> Optional[str]:
+    """A string that identifies a value: its repr, or the digest of its pickle if
+    the repr is identity based (as `<object at 0x...>`) or abbreviated. None if
+    neither is available."""
+    if attr.has(type(value)):
+        cls = type(value)
+        fields = _value_fingerprint(
+            {field.name: getattr(value, field.name) for field in attr.fields(cls)}
+        )
+        if fields is None:
+            return None
+        return f"{cls.__module__}.{cls.__qualname__}{fields}"
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_value_fingerprint(item) for item in value]
+        if None in items:
+            return None
+        if isinstance(value, (set, frozenset)):
+            items = sorted(items)
+        return f"{type(value).__name__}({', '.join(items)})"
+    if isinstance(value, Mapping):
+        items = [
+            (_value_fingerprint(key), _value_fingerprint(item))
+            for key, item in value.items()
+        ]
+        if any(None in item for item in items):
+            return None
+        return f"{{{', '.join(f'{key}: {item}' for key, item in sorted(items))}}}"
+    if callable(value) and not isinstance(value, type):
+        return _callable_fingerprint(value)
+    fingerprint = repr(value)
+    if " at 0x" not in fingerprint and "..." not in fingerprint:
+        return fingerprint
+    try:
+        return hashlib.sha256(pickle.dumps(value, protocol=4)).hexdigest()
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+def _code_fingerprint(code) -> str:
+    consts = [
+        _code_fingerprint(const) if hasattr(const, "co_code") else repr(const)
+        for const in code.co_consts
+    ]
+    return hashlib.sha256(
+        code.co_code + repr((consts, code.co_names)).encode("utf8")
+    ).hexdigest()
+
+
+def _callable_fingerprint(func: Optional[Callable]) -> Optional[str]:
+    """A string that identifies what a callable does, or None if it cannot be
+    reliably identified (the results of such post-processes are not cached).
+
+    Functions are identified by their name, code, default arguments and closure
+    values, partials and methods by their function and arguments (or instance),
+    and other callables by their value (see `_value_fingerprint`).
+    """
+    if func is None:
+        return "default"
+    if isinstance(func, partial):
+        parts = [
+            _callable_fingerprint(func.func),
+            _value_fingerprint(func.args),
+            _value_fingerprint(func.keywords),
+        ]
+        return None if None in parts else f"partial({', '.join(parts)})"
+    if isinstance(func, MethodType):
+        parts = [
+            _callable_fingerprint(func.__func__),
+            _value_fingerprint(func.__self__),
+        ]
+        return None if None in parts else f"method({', '.join(parts)})"
+    if isinstance(func, FunctionType):
+        cells = []
+        for cell in func.__closure__ or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:  # not assigned yet
+                contents = None
+            # a recursive nested function refers to itself
+            cells.append("<self>" if contents is func else contents)
+        parts = [
+            _value_fingerprint(func.__defaults__),
+            _value_fingerprint(func.__kwdefaults__),
+            _value_fingerprint(cells),
+        ]
+        if None in parts:
+            return None
+        return (
+            f"{func.__module__}.{func.__qualname__}:"
+            f"{_code_fingerprint(func.__code__)}:{', '.join(parts)}"
+        )
+    # builtins, and callable objects with a meaningful repr
+    return _value_fingerprint(func)
+
+
+def hash_inputs(
+    idf_str: str,
+    epw_file: Path,
+    idd_file: Path,
+    eplus_version: str,
+    extra_files: Optional[Sequence[str]] = None,
+    post_process: Optional[Callable] = None,
+    options: Optional[Mapping[str, str]] = None,
+) -> Optional[str]:
+    """Compute a key that identify a simulation by the content of its inputs.
+
+    Arguments:
+        idf_str {str} -- the idf content (as obtained with `eppy_IDF.idfstr()` for
+            eppy objects).
+        epw_file {Path} -- Weather file emplacement.
+        idd_file {Path} -- idd file emplacement.
+        eplus_version {str} -- EnergyPlus binary version.
+
+    Keyword Arguments:
+        extra_files {Sequence[str], optional} -- extra files copied in the
+            working directory.
+        post_process {Callable, optional} -- the simulation post-process, as
+            different post-processes lead to different results.
+        options {Mapping[str, str], optional} -- other runner options that change
+            the results (as the output backend).
+
+    Returns:
+        str -- the hexadecimal key, or None if the post-process cannot be
+            reliably identified (see `_callable_fingerprint`).
+    """
+    post_process_fingerprint = _callable_fingerprint(post_process)
+    if post_process_fingerprint is None:
+        return None
+    sha = hashlib.sha256()
+    sha.update(idf_str.encode("utf8"))
+    for filename in (epw_file, idd_file):
+        sha.update(file_digest(filename).encode())
+    for extra_file in sorted(extra_files or [], key=lambda f: Path(f).basename()):
+        sha.update(Path(extra_file).basename().encode("utf8"))
+        sha.update(file_digest(extra_file).encode())
+    sha.update(str(eplus_version).encode())
+    sha.update(post_process_fingerprint.encode("utf8"))
+    for name, value in sorted((options or {}).items()):
+        sha.update(f"{name}={value}".encode("utf8"))
+    return sha.hexdigest()
+
+
+def hash_run(
+    input_hash: Optional[str],
+    reducer: Optional[Callable] = None,
+    transport: Optional[Any] = None,
+) -> Optional[str]:
+    """Compute a key that identify what a batch records for a simulation: its
+    inputs (see `hash_inputs`), and how its results are reduced and sent back.
+
+    Arguments:
+        input_hash {str} -- the simulation inputs key.
+
+    Keyword Arguments:
+        reducer {Callable, optional} -- the function applied to the simulation
+            in the worker.
+        transport {Any, optional} -- the transport of the simulation outputs.
+
+    Returns:
+        str -- the hexadecimal key, or None if the inputs key is None or the
+            reducer or transport cannot be reliably identified.
+    """
+    if input_hash is None:
+        return None
+    parts = [
+        input_hash,
+        _callable_fingerprint(reducer),
+        "default" if transport is None else _value_fingerprint(transport),
+    ]
+    if None in parts:
+        return None
+    return hashlib.sha256("\n".join(parts).encode("utf8")).hexdigest()
+
+
+@attr.s
+class ResultCache:
+    """On-disk cache of finished simulations, addressed by the content of the
+    simulation inputs (see `hash_inputs`).
+
+    The cache can be shared by many processes (and hosts if the folder lives on a
+    shared file-system): entries are written atomically and the eviction is
+    protected by an inter-process lock. The cache size is tracked as the entries
+    are stored, and the cache is only scanned when it grows over `max_size` (it is
+    then trimmed a bit below it), or when the entries may have expired.
+
+    Attributes:
+        cache_dir (Path): where live the cached results.
+        max_size (int, optional): maximum size of the cache, in bytes. The least
+            recently used entries are evicted first.
+        max_age (float, optional): entries not used for more than `max_age`
+            seconds are evicted.
+    """
+
+    cache_dir = attr.ib(type=str, converter=lambda folder: Path(folder).abspath())
+    max_size = attr.ib(type=int, default=None)
+    max_age = attr.ib(type=float, default=None)
+
+    @property
+    def lock(self) -> fasteners.InterProcessLock:
+        return fasteners.InterProcessLock(self.cache_dir / ".lock")
+
+    @property
+    def _usage_file(self) -> Path:
+        return self.cache_dir / ".usage"
+
+    def _read_usage(self) -> Optional[Tuple[int, float]]:
+        """The cache size, and the time of the last scan, as tracked in the usage
+        file (None if unknown)."""
+        try:
+            size, scanned = self._usage_file.read_text().split()
+            return int(size), float(scanned)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_usage(self, size: int, scanned: float):
+        self.cache_dir.makedirs_p()
+        tmp_file = self.cache_dir / f".usage.{os.getpid()}.tmp"
+        tmp_file.write_text(f"{size} {scanned}")
+        os.replace(tmp_file, self._usage_file)
+
+    def entry_file(self, key: str) -> Path:
+        """Get the file where the result associated to the key live.
+
+        Arguments:
+            key {str} -- the simulation key.
+
+        Returns:
+            Path -- the cache entry file.
+        """
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def entries(self):
+        """List the cache entry files."""
+        if not self.cache_dir.exists():
+            return []
+        return list(self.cache_dir.walkfiles("*.pkl"))
+
+    def _is_expired(self, entry: Path, now: float) -> bool:
+        return self.max_age is not None and now - entry.mtime > self.max_age
+
+    def __contains__(self, key: str) -> bool:
+        entry = self.entry_file(key)
+        return entry.exists() and not self._is_expired(entry, time.time())
+
+    def load(self, key: str, simulation: Simulation) -> bool:
+        """Fill the simulation with the cached results, if available.
+
+        Arguments:
+            key {str} -- the simulation key.
+            simulation {Simulation} -- the simulation to rehydrate.
+
+        Returns:
+            bool -- True if the results were found in the cache.
+        """
+        entry = self.entry_file(key)
+        try:
+            if self._is_expired(entry, time.time()):
+                return False
+            with open(entry, "rb") as f:
+                state = pickle.load(f)
+            # mark the entry as recently used
+            os.utime(entry)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False
+        simulation.__dict__.update(state)
+        return True
+
+    def store(self, key: str, simulation: Simulation) -> Optional[Path]:
+        """Save the results of a finished simulation in the cache.
+
+        Only the simulation results (status, log, reports, time series and
+        attributes added by a custom post-process) are saved, not its inputs.
+
+        Arguments:
+            key {str} -- the simulation key.
+            simulation {Simulation} -- the finished simulation.
+
+        Returns:
+            Path -- the cache entry, or None if the simulation is not finished.
+        """
+        if simulation.status != "finished":
+            return None
+        state = {
+            field: value
+            for field, value in vars(simulation).items()
+            if field not in _input_fields
+        }
+        entry = self.entry_file(key)
+        entry.parent.makedirs_p()
+        tmp_entry = entry.parent / f".{key}.{os.getpid()}.tmp"
+        with open(tmp_entry, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.max_size is None and self.max_age is None:
+            os.replace(tmp_entry, entry)
+            return entry
+        with self.lock:
+            replaced_size = entry.size if entry.exists() else 0
+            os.replace(tmp_entry, entry)
+            usage = self._read_usage()
+            if usage is None:
+                self._evict()
+                return entry
+            size, scanned = usage
+            size += entry.size - replaced_size
+            if (self.max_size is not None and size > self.max_size) or (
+                self.max_age is not None and time.time() - scanned > self.max_age / 2
+            ):
+                self._evict()
+            else:
+                self._write_usage(size, scanned)
+        return entry
+
+    def evict(self):
+        """Remove the expired entries, then the least recently used ones until the
+        cache fits in `max_size`.
+        """
+        with self.lock:
+            self._evict()
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for entry in self.entries():
+            try:
+                if self._is_expired(entry, now):
+                    entry.remove_p()
+                    continue
+                entries.append((entry.mtime, entry.size, entry))
+            except FileNotFoundError:
+                continue
+        total_size = sum(size for _, size, _ in entries)
+        if self.max_size is not None and total_size > self.max_size:
+            for _, size, entry in sorted(entries):
+                if total_size <= self.max_size * _eviction_target:
+                    break
+                entry.remove_p()
+                total_size -= size
+        self._write_usage(total_size, now)
+
+    def clear(self):
+        """Remove all the cache entries."""
+        with self.lock:
+            for entry in self.entries():
+                entry.remove_p()
+            self._write_usage(0, time.time())
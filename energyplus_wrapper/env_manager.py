@@ -2,25 +2,37 @@
 # coding=utf-8
 
 
+import os
 import platform
 import re
+import shutil
+import tarfile
+import uuid
+from typing import Optional
+from urllib.parse import unquote, urlparse
 
-from appdirs import user_data_dir
+from appdirs import user_cache_dir, user_data_dir
 import fasteners
+from loguru import logger
 import pexpect
 import requests
 from path import Path, TempDir
 
+from .cache import file_digest
+
 eplus_filename_pattern = (
     r".*?(?P<filename>EnergyPlus-(?P<version>\d+.\d+.\d+)-"
-    r"(?P<revision>\w+)-(?P<platform>.*?).sh)$"
+    r"(?P<revision>\w+)-(?P<platform>.*?)"
+    r"(?P<extension>\.sh|\.tar\.gz|\.tgz|\.tar\.xz|\.tar\.bz2|\.tar))$"
+)
+default_installer_cache = Path(user_cache_dir(appname="energy_plus_wrapper")) / (
+    "installers"
 )
+_chunk_size = 1 << 20
 
 
-def _is_downloadable(url: str):
-    content_type = (
-        requests.head(url, allow_redirects=True).headers.get("content-type").lower()
-    )
+def _is_downloadable(response: requests.Response):
+    content_type = response.headers.get("content-type", "").lower()
     if "text" in content_type:
         return False
     if "html" in content_type:
@@ -30,15 +42,146 @@ def _is_downloadable(url: str):
 
 def _extract_filename_info(url: str):
     filename_match = re.match(pattern=eplus_filename_pattern, string=url)
+    if filename_match is None:
+        raise ValueError(f"{url} is not an EnergyPlus installer or archive.")
     return filename_match.groupdict()
 
 
-def _download_eplus_version(url, path):
-    if not _is_downloadable(url):
-        raise ValueError("URL is not a downloadable file.")
-    response = requests.get(url, allow_redirects=True)
-    with open(path, "wb") as f:
-        f.write(response.content)
+def _local_path(url: str) -> Optional[Path]:
+    """The local file of an url (a path or a file:// url), None for a remote one."""
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return Path(unquote(parsed.path))
+    if parsed.scheme in ("http", "https", "ftp"):
+        return None
+    return Path(url)
+
+
+def _verify(filename: Path, sha256: Optional[str]):
+    """Check the sha256 of a file, against the expected one, or the one recorded
+    when it was downloaded (in a `.sha256` file next to it)."""
+    digest_file = Path(f"{filename}.sha256")
+    if sha256 is None and digest_file.exists():
+        sha256 = digest_file.read_text().strip()
+    if sha256 is not None and file_digest(filename) != sha256.lower():
+        raise ValueError(f"{filename} does not match its sha256 checksum.")
+
+
+def _download_part(url: str, part: Path) -> bool:
+    """Download an url in a `.part` file, resuming it if it already exists.
+
+    Returns:
+        bool -- True if the file is complete.
+    """
+    offset = part.size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with requests.get(
+        url, headers=headers, stream=True, allow_redirects=True, timeout=60
+    ) as response:
+        if response.status_code == 416:  # nothing left to download
+            return True
+        response.raise_for_status()
+        if not _is_downloadable(response):
+            raise ValueError("URL is not a downloadable file.")
+        if response.status_code != 206:  # the server ignored the range
+            offset = 0
+        length = response.headers.get("content-length")
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(_chunk_size):
+                f.write(chunk)
+    return length is None or part.size == offset + int(length)
+
+
+def _download_eplus_version(url, path, sha256=None, retries=3):
+    """Stream an installer to disk, resuming an interrupted download with HTTP
+    range requests, and check its sha256 if provided. Its digest is recorded
+    next to it, to detect a corrupted cache later on."""
+    path = Path(path)
+    part = Path(f"{path}.part")
+    for attempt in range(retries + 1):
+        try:
+            if _download_part(url, part):
+                break
+            error = f"{url} download incomplete"
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            # the connection dropped in the middle of the body
+            requests.exceptions.ChunkedEncodingError,
+        ) as exc:
+            error = exc
+        if attempt == retries:
+            raise IOError(f"Unable to download {url}: {error}")
+        logger.warning(f"{error}, resuming the download of {url}.")
+    try:
+        _verify(part, sha256)
+    except ValueError:
+        part.remove_p()
+        raise
+    Path(f"{path}.sha256").write_text(file_digest(part))
+    os.replace(part, path)
+
+
+def fetch_installer(
+    url: str,
+    installer_cache: Path = default_installer_cache,
+    sha256: Optional[str] = None,
+    mirror: Optional[Path] = None,
+    offline: bool = False,
+) -> Path:
+    """Get an EnergyPlus installer (or archive) on disk, downloading it only if
+    needed.
+
+    The installer is looked up as a local file (if the url is a path or a
+    file:// url), then in the `mirror` folder and in the `installer_cache`, and
+    is downloaded in the cache otherwise. The cache can be shared by several
+    installs, the concurrent downloads of an installer being serialized.
+
+    Arguments:
+        url {str} -- the installer URL or path.
+
+    Keyword Arguments:
+        installer_cache {Path} -- where the installers are downloaded.
+            (default: {user_cache_dir(appname="energy_plus_wrapper")/installers})
+        sha256 {str, optional} -- the expected sha256 of the installer.
+        mirror {Path, optional} -- a folder with the installers, used instead of
+            the network when it holds the requested one.
+        offline {bool} -- never download, raise if the installer is not found
+            locally. (default: {False})
+
+    Returns:
+        Path -- the installer file
+    """
+    filename = _extract_filename_info(url)["filename"]
+    local_file = _local_path(url)
+    if local_file is not None:
+        if not local_file.exists():
+            raise FileNotFoundError(f"No EnergyPlus installer at {local_file}.")
+        _verify(local_file, sha256)
+        return local_file.abspath()
+    if mirror is not None and (Path(mirror) / filename).exists():
+        mirrored = Path(mirror).abspath() / filename
+        _verify(mirrored, sha256)
+        return mirrored
+
+    installer_cache = Path(installer_cache).abspath()
+    installer_cache.makedirs_p()
+    installer = installer_cache / filename
+    with fasteners.InterProcessLock(f"{installer}.lock"):
+        if installer.exists():
+            try:
+                _verify(installer, sha256)
+                return installer
+            except ValueError:
+                logger.warning(f"{installer} is corrupted, it is downloaded again.")
+                installer.remove()
+        if offline:
+            raise FileNotFoundError(
+                f"{filename} is neither in the mirror nor in the installer cache,"
+                " and cannot be downloaded offline."
+            )
+        _download_eplus_version(url, installer, sha256=sha256)
+    return installer
 
 
 def _extract_and_install(setup_script, eplus_folder):
@@ -55,15 +198,46 @@ def _extract_and_install(setup_script, eplus_folder):
         child.expect(pexpect.EOF)
 
 
+def _extract_archive(archive: Path, destination: Path):
+    """Install a pre-extracted EnergyPlus archive, without running its
+    installer. An archive with a single top folder is installed as that folder.
+    """
+    tmp_folder = destination.parent / f".{destination.name}.{uuid.uuid4().hex}"
+    try:
+        with tarfile.open(archive) as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(tmp_folder, filter="data")
+            else:
+                for member in tar.getmembers():
+                    target = (tmp_folder / member.name).abspath()
+                    if not target.startswith(tmp_folder.abspath()):
+                        raise ValueError(f"{member.name} is outside of the archive.")
+                tar.extractall(tmp_folder)
+        content = tmp_folder.listdir()
+        root = content[0] if len(content) == 1 and content[0].isdir() else tmp_folder
+        os.replace(root, destination)
+    finally:
+        if tmp_folder.exists():
+            shutil.rmtree(tmp_folder)
+
+
 def ensure_eplus_root(
     url: str,
     eplus_folder: Path = user_data_dir(appname="energy_plus_wrapper"),
     installer_cache: Path = None,
+    sha256: Optional[str] = None,
+    mirror: Optional[Path] = None,
+    offline: bool = False,
 ) -> str:
     """Check if the energy plus root is available in the provided eplus_folder,
     download it from the url, extract and install it if it's not the case. In any cases,
     return the EnergyPlus folder as needed by the EPlusRunner.
 
+    The url can point to the EnergyPlus installation script (`.sh`), or to a
+    pre-extracted archive (`.tar.gz`, `.tar.xz`...) that is simply extracted
+    instead of running the installer. Local paths and file:// urls are installed
+    without any download.
+
     This routine is only available for Linux (for now) !
 
     Arguments:
@@ -75,8 +249,14 @@ def ensure_eplus_root(
         eplus_folder {Path} -- where EnergyPlus should be installed, as
             `{eplus_folder}/{eplus_version}/`.
             (default: user_data_dir(appname="energy_plus_wrapper"))
-        installer_cache {Path} -- where to download the installation script. If None,
-            a temporary folder will be created. (default: {None})
+        installer_cache {Path} -- where to download the installation script,
+            shared by all the `eplus_folder`. If None, a per-user cache folder is
+            used. (default: {None})
+        sha256 {str, optional} -- the expected sha256 of the installer.
+        mirror {Path, optional} -- a folder with the installers, used instead of
+            the network when it holds the requested one.
+        offline {bool} -- never download, raise if the installer is not found
+            locally. (default: {False})
 
     Returns:
         [str] -- The EnergyPlus root.
@@ -89,25 +269,27 @@ def ensure_eplus_root(
         )
     eplus_folder = Path(eplus_folder)
     eplus_folder.mkdir_p()
+    if installer_cache is None:
+        installer_cache = default_installer_cache
     with fasteners.InterProcessLock(eplus_folder / ".lock"):
-
-        def url_to_installed(url, eplus_folder, script_path):
-            if not script_path.exists():
-                _download_eplus_version(url, script_path)
-            _extract_and_install(script_path, eplus_folder)
-
         finfo = _extract_filename_info(url)
-        filename = finfo["filename"]
         version = finfo["version"]
         expected_eplus_folder = eplus_folder / f"EnergyPlus-{version.replace('.', '-')}"
         if expected_eplus_folder.exists() and expected_eplus_folder.files():
             return expected_eplus_folder.abspath()
         expected_eplus_folder.rmtree_p()
-        if installer_cache is None:
+        installer = fetch_installer(
+            url,
+            installer_cache=installer_cache,
+            sha256=sha256,
+            mirror=mirror,
+            offline=offline,
+        )
+        if finfo["extension"] == ".sh":
+            # the installer is not ran from the shared cache, that may be read-only
             with TempDir() as d:
-                url_to_installed(url, eplus_folder, d / filename)
+                installer.copy(d / installer.name)
+                _extract_and_install(d / installer.name, eplus_folder)
         else:
-            installer_cache = Path(installer_cache)
-            installer_cache.mkdir_p()
-            url_to_installed(url, eplus_folder, installer_cache / filename)
+            _extract_archive(installer, expected_eplus_folder)
         return expected_eplus_folder.abspath()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import calendar
+import re
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from path import Path
+from slugify import slugify
+
+from .utils import process_eplus_html_report
+
+re_variable = re.compile(r"^(?P<name>.*?)\s*\[(?P<units>[^\]]*)\]\s*$")
+re_stamp_frequency = re.compile(r"When (.*?) Report Variables Requested")
+
+# the first number of rows allocated for each kind of time-stamp, before growing
+_initial_capacity = {"daily": 366, "monthly": 12, "runperiod": 1, "annual": 1}
+_default_capacity = 8760
+
+# ESO and MTR outputs, with the prefix of the time series they produce
+eso_outputs = {"eso": "eplus", "mtr": "meter"}
+
+
+def _stamp_kind(frequency: str) -> str:
+    """The kind of time-stamp record that precedes the values of a reporting
+    frequency: the sub-daily frequencies share the same one."""
+    kind = frequency.lower().replace(" ", "")
+    return kind if kind in _initial_capacity else "hourly"
+
+
+def _series_name(prefix: str, frequency: str) -> str:
+    # same names as with the sqlite output backend, where it is "Run Period"
+    if _stamp_kind(frequency) == "runperiod":
+        frequency = "run period"
+    return f"{prefix}_{slugify(frequency, separator='_')}"
+
+
+class _FrequencyTable:
+    """Growable 2D array that store the values of the variables sharing the same
+    reporting frequency, with their time-stamps."""
+
+    def __init__(self, frequency: str, columns: Sequence[str]):
+        self.frequency = frequency
+        self.kind = _stamp_kind(frequency)
+        self.columns = list(columns)
+        capacity = _initial_capacity.get(self.kind, _default_capacity)
+        self.values = np.full((capacity, len(self.columns)), np.nan)
+        self.stamps = []
+        self.last_stamp = None
+
+    def new_row(self, stamp_id: int, stamp: tuple):
+        if len(self.stamps) == len(self.values):
+            grown = np.full((2 * len(self.values), len(self.columns)), np.nan)
+            grown[: len(self.values)] = self.values
+            self.values = grown
+        self.stamps.append(stamp)
+        self.last_stamp = stamp_id
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.values[: len(self.stamps)], columns=self.columns)
+        df.insert(0, "Date/Time", _format_stamps(self.stamps, self.kind))
+        return df
+
+
+def _format_stamps(stamps, kind):
+    if kind == "daily":
+        return [f" {month:02d}/{day:02d}" for month, day in stamps]
+    if kind == "monthly":
+        return [calendar.month_name[month] for month, in stamps]
+    if kind == "runperiod":
+        return [f"simdays={days}" for days, in stamps]
+    if kind == "annual":
+        return [str(year) for year, in stamps]
+    return [
+        f" {month:02d}/{day:02d}  {hour:02d}:{minute:02d}:00"
+        for month, day, hour, minute in stamps
+    ]
+
+
+def _parse_stamp(kind: str, fields: Sequence[str]) -> tuple:
+    if kind == "daily":
+        return int(fields[1]), int(fields[2])
+    if kind == "monthly":
+        return (int(fields[1]),)
+    if kind in ("runperiod", "annual"):
+        return (int(fields[0]),)
+    # day of simulation, month, day, dst, hour, start minute, end minute, day type
+    hour, end_minute = int(fields[4]), int(float(fields[6]))
+    return (
+        int(fields[1]),
+        int(fields[2]),
+        hour - 1 + end_minute // 60,
+        end_minute % 60,
+    )
+
+
+def _column_name(key: Optional[str], name: str, units: str, frequency: str) -> str:
+    variable = f"{key}:{name}" if key else name
+    return f"{variable} [{units}]({frequency})"
+
+
+def _is_selected(series, column, key, name, variables, select):
+    if variables is not None and not (
+        {name, column, f"{key}:{name}" if key else name} & variables
+    ):
+        return False
+    if select is not None:
+        if series not in select:
+            return False
+        return select[series] is None or column in select[series]
+    return True
+
+
+def read_eso(
+    eso_file,
+    prefix: str = "eplus",
+    variables: Optional[Sequence[str]] = None,
+    select: Optional[Mapping[str, Optional[Sequence[str]]]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Read an EnergyPlus ESO (or MTR) output, without ReadVarsESO.
+
+    The data dictionary is parsed once, then the data block is streamed into
+    NumPy arrays (one per reporting frequency). The lines of the variables that
+    are not selected are skipped without being parsed.
+
+    There is one dataframe per reporting frequency, named as "{prefix}_hourly" or
+    "{prefix}_monthly". The columns are named as in the csv outputs
+    ("{key}:{variable} [{units}]({frequency})"), with a "Date/Time" column first.
+    Only the value is kept for the variables that also report their minimum and
+    maximum (as the daily or monthly ones).
+
+    Arguments:
+        eso_file {Path} -- the eso or mtr file (or a text file object)
+
+    Keyword Arguments:
+        prefix {str} -- the time series name prefix. (default: {"eplus"})
+        variables {Sequence[str], optional} -- if provided, only these variables
+            are read. They can be given as variable names (as
+            "Zone Mean Air Temperature"), as "{key}:{variable}" or as column names.
+        select {Mapping[str, Optional[Sequence[str]]], optional} -- if provided,
+            only the time series in that mapping are read, and only the columns
+            given as values (all the columns if the value is None).
+
+    Returns:
+        Dict[str, DataFrame] -- the time series, by name
+    """
+    if variables is not None:
+        variables = set(variables)
+    if select is not None:
+        select = {
+            series: set(columns) if columns is not None else None
+            for series, columns in select.items()
+        }
+
+    if hasattr(eso_file, "read"):
+        f = eso_file
+    else:
+        f = open(eso_file, errors="replace")
+    try:
+        lines = iter(f)
+        # the version header
+        next(lines)
+
+        stamp_codes = {}
+        selected = {}  # variable code: (frequency, column index)
+        columns = {}  # frequency: columns
+        for line in lines:
+            line = line.rstrip("\n")
+            if line.startswith("End of Data Dictionary"):
+                break
+            code, _, description = line.split(",", 2)
+            code = int(code)
+            if code == 1:
+                continue
+            description, _, comment = description.partition("!")
+            if code == 2:
+                stamp_codes[str(code)] = "hourly"
+                continue
+            stamp_frequency = re_stamp_frequency.search(comment)
+            if stamp_frequency:
+                stamp_codes[str(code)] = _stamp_kind(stamp_frequency.group(1))
+                continue
+            frequency = comment.split("[", 1)[0].strip()
+            key, sep, variable = description.strip().partition(",")
+            if not sep:
+                key, variable = None, key
+            match = re_variable.match(variable)
+            if match is None:
+                name, units = variable.strip(), ""
+            else:
+                name, units = match.group("name"), match.group("units")
+            column = _column_name(key, name, units, frequency)
+            series = _series_name(prefix, frequency)
+            if not _is_selected(series, column, key, name, variables, select):
+                continue
+            columns.setdefault(frequency, [])
+            selected[str(code)] = (frequency, len(columns[frequency]))
+            columns[frequency].append(column)
+
+        tables = {
+            frequency: _FrequencyTable(frequency, freq_columns)
+            for frequency, freq_columns in columns.items()
+        }
+        # the last time-stamp record of each kind, as (record number, fields)
+        stamps = {}
+        stamp_id = 0
+        for line in lines:
+            code, _, fields = line.partition(",")
+            variable = selected.get(code)
+            if variable is not None:
+                frequency, column = variable
+                table = tables[frequency]
+                current_id, current_fields = stamps[table.kind]
+                if table.last_stamp != current_id:
+                    table.new_row(current_id, _parse_stamp(table.kind, current_fields))
+                value = fields.split(",", 1)[0]
+                table.values[len(table.stamps) - 1, column] = float(value)
+                continue
+            kind = stamp_codes.get(code)
+            if kind is not None:
+                stamp_id += 1
+                stamps[kind] = (stamp_id, fields.rstrip("\n").split(","))
+            elif code.startswith("End of Data"):
+                break
+    finally:
+        if f is not eso_file:
+            f.close()
+
+    return {
+        _series_name(prefix, frequency): table.to_frame()
+        for frequency, table in tables.items()
+    }
+
+
+def find_eso_outputs(working_dir: Path) -> Dict[str, Path]:
+    """Find the ESO and MTR outputs generated by EnergyPlus in a folder.
+
+    Arguments:
+        working_dir {Path} -- the simulation working directory
+
+    Returns:
+        Dict[str, Path] -- the output files, by time series prefix ("eplus" for
+            the eso file, "meter" for the mtr file)
+    """
+    working_dir = Path(working_dir)
+    outputs = {}
+    for extension, prefix in eso_outputs.items():
+        for filename in [f"eplus.{extension}", f"eplusout.{extension}"]:
+            if (working_dir / filename).exists():
+                outputs[prefix] = working_dir / filename
+                break
+    return outputs
+
+
+def select_eso_outputs(
+    outputs: Mapping[str, Path], select: Optional[Mapping] = None
+) -> Dict[str, Path]:
+    """Keep only the ESO or MTR outputs that contain a selected time series."""
+    if select is None:
+        return dict(outputs)
+    return {
+        prefix: filename
+        for prefix, filename in outputs.items()
+        if any(name.split("_", 1)[0] == prefix for name in select)
+    }
+
+
+def process_eplus_eso_time_series(
+    working_dir: Path, select: Optional[Mapping[str, Optional[Sequence[str]]]] = None
+) -> Dict[str, pd.DataFrame]:
+    """Read the EnergyPlus report variables and meters from the ESO and MTR
+    outputs into dataframes.
+
+    The time series are named as with the sqlite output backend ("eplus_hourly",
+    "meter_monthly"...).
+
+    Arguments:
+        working_dir {Path} -- the simulation working directory
+
+    Keyword Arguments:
+        select {Mapping[str, Optional[Sequence[str]]], optional} -- if provided,
+            only the time series in that mapping are read, and only the columns
+            given as values (all the columns if the value is None).
+
+    Returns:
+        Dict[str, DataFrame] -- the time series, by name
+    """
+    time_series = {}
+    outputs = select_eso_outputs(find_eso_outputs(working_dir), select)
+    for prefix, filename in outputs.items():
+        time_series.update(read_eso(filename, prefix=prefix, select=select))
+    return time_series
+
+
+def parse_eso_as_df(simulation):
+    """Simulation post-process that extract the reports from the html report and
+    the time series from the ESO and MTR outputs.
+
+    Arguments:
+        simulation {Simulation} -- the finished simulation
+    """
+    html_report = simulation.working_dir / "eplus-table.htm"
+    if html_report.exists():
+        simulation.reports = process_eplus_html_report(html_report)
+    simulation.time_series = process_eplus_eso_time_series(simulation.working_dir)
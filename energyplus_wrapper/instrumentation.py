@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Mapping, Optional
+
+import attr
+from loguru import logger
+from pandas import DataFrame
+
+# the phases of a run, as recorded in `Simulation.timings`
+run_phases = [
+    "inputs",
+    "cache",
+    "setup",
+    "eplus",
+    "post_process",
+    "backup",
+    "cache_store",
+    "export",
+    "artifacts",
+    "cleanup",
+]
+
+
+@contextmanager
+def timed(timings: Dict[str, float], phase: str):
+    """Add the duration of the block to a phase timing, in seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0) + time.perf_counter() - start
+
+
+def emit(
+    event: str,
+    simulation_name: str,
+    hook: Optional[Callable] = None,
+    simulation=None,
+):
+    """Emit a simulation event, as a loguru record and to an optional hook.
+
+    The loguru records are bound to an `event` ("simulation_start" or
+    "simulation_end"), the `simulation` name and, at the end, its `status`,
+    `timings` and `peak_rss`: they can be routed to a structured sink with a
+    filter on `record["extra"]["event"]`.
+
+    Arguments:
+        event {str} -- either "start" or "end"
+        simulation_name {str} -- the simulation name
+
+    Keyword Arguments:
+        hook {Callable, optional} -- called with the simulation name at the start,
+            with the simulation at the end (or its name if there is none).
+        simulation {Simulation, optional} -- the simulation, at the end. None if
+            the run failed before it was created.
+    """
+    extra = {"event": f"simulation_{event}", "simulation": simulation_name}
+    if simulation is not None:
+        extra.update(
+            status=simulation.status,
+            timings=dict(simulation.timings),
+            peak_rss=simulation.peak_rss,
+        )
+    logger.bind(**extra).debug(f"{simulation_name}: {event}.")
+    if hook is not None:
+        hook(simulation if simulation is not None else simulation_name)
+
+
+@attr.s
+class BatchStats:
+    """Timing statistics of a batch of simulations.
+
+    Given to `EPlusRunner.run_many` as `stats`, it is filled with the timings of
+    each simulation ran by the batch (the ones loaded from a journal are not
+    counted).
+
+    Attributes:
+        timings (Dict[Hashable, Dict[str, float]]): the phase timings of each
+            simulation, in seconds (see `Simulation.timings`).
+        peak_rss (Dict[Hashable, int]): the peak resident memory of each
+            EnergyPlus process, in bytes (when available).
+        wall_time (float): the batch duration, in seconds.
+        n_workers (int): the number of parallel workers.
+    """
+
+    timings = attr.ib(type=Dict[Hashable, Dict[str, float]], factory=dict)
+    peak_rss = attr.ib(type=Dict[Hashable, int], factory=dict)
+    wall_time = attr.ib(type=float, default=None)
+    n_workers = attr.ib(type=int, default=1)
+
+    def collect(
+        self, runs: Mapping[Hashable, Dict], wall_time: float, n_workers: int
+    ):
+        """Record the run statistics of a batch.
+
+        Arguments:
+            runs {Mapping[Hashable, Dict]} -- the "timings" and "peak_rss" of each
+                simulation
+            wall_time {float} -- the batch duration, in seconds
+            n_workers {int} -- the number of parallel workers
+        """
+        for key, run in runs.items():
+            self.timings[key] = run["timings"]
+            if run["peak_rss"] is not None:
+                self.peak_rss[key] = run["peak_rss"]
+        self.wall_time = wall_time
+        self.n_workers = n_workers
+
+    @property
+    def table(self) -> DataFrame:
+        """The phase timings, one row per simulation."""
+        df = DataFrame.from_dict(self.timings, orient="index")
+        return df.reindex(
+            columns=[*[p for p in run_phases if p in df.columns], "total"]
+        ).fillna(0)
+
+    def summary(self) -> DataFrame:
+        """Summarize the phase timings.
+
+        Returns:
+            DataFrame -- one row per phase (and the total), with the mean, 50%,
+                90%, 99% and max durations, the summed duration and its share of
+                the total time.
+        """
+        table = self.table
+        summary = table.describe(percentiles=[0.5, 0.9, 0.99]).T
+        summary = summary[["mean", "50%", "90%", "99%", "max"]]
+        summary["sum"] = table.sum()
+        summary["share"] = summary["sum"] / summary.loc["total", "sum"]
+        return summary
+
+    @property
+    def solver_time(self) -> float:
+        """The time spent in EnergyPlus, summed over the simulations."""
+        table = self.table
+        # no "eplus" phase when every simulation was loaded from the cache
+        return float(table["eplus"].sum()) if "eplus" in table else 0.0
+
+    @property
+    def wrapper_overhead(self) -> float:
+        """The time spent outside EnergyPlus, summed over the simulations."""
+        if not self.timings:
+            return 0.0
+        return float(self.table["total"].sum()) - self.solver_time
+
+    @property
+    def utilization(self) -> Optional[float]:
+        """The share of the workers time spent running simulations."""
+        if not self.timings or not self.wall_time:
+            return None
+        busy = float(self.table["total"].sum())
+        return busy / (self.n_workers * self.wall_time)
+
+    def __str__(self):
+        lines = [
+            f"{len(self.timings)} simulations on {self.n_workers} workers"
+            f" in {self.wall_time:.1f}s.",
+            f"solver: {self.solver_time:.1f}s,"
+            f" wrapper overhead: {self.wrapper_overhead:.1f}s,"
+            f" utilization: {(self.utilization or 0):.0%}",
+        ]
+        if self.peak_rss:
+            lines.append(f"peak RSS: {max(self.peak_rss.values()) / 2 ** 20:.0f} MiB")
+        return "\n".join(lines)
+
+
+def run_statistics(simulation) -> Dict:
+    """Get the statistics of a run, as sent back to `BatchStats`.
+
+    Arguments:
+        simulation {Simulation} -- the simulation
+
+    Returns:
+        Dict -- the "timings" and "peak_rss" of the simulation
+    """
+    return {"timings": dict(simulation.timings), "peak_rss": simulation.peak_rss}
+
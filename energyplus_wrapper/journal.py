@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+import attr
+import pandas as pd
+from pandas import DataFrame
+from path import Path
+
+_schema = """
+CREATE TABLE IF NOT EXISTS samples (
+    key TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started REAL,
+    elapsed REAL,
+    location TEXT,
+    error TEXT
+)
+"""
+
+
+def _sample_key(key: Hashable) -> str:
+    return repr(key)
+
+
+@attr.s(frozen=True)
+class RunJournal:
+    """Checkpoint journal of a batch of simulations, in a SQLite database.
+
+    Each sample is recorded by the worker that runs it, with its input hash,
+    status ("running", "finished" or "failed"), start time, duration, result
+    location and error. The results of the finished samples are pickled next to
+    the database, so that a batch ran again with the same journal skips them.
+
+    The journal is safe to use from many processes (every joblib backend): each
+    record is a short transaction on its own connection.
+
+    Attributes:
+        path (Path): the SQLite database file. The results are saved in a
+            `{path stem}_results` folder next to it.
+        timeout (float): how long to wait for a lock held by another process, in
+            seconds. (default: {60})
+    """
+
+    path = attr.ib(type=Path, converter=lambda path: Path(path).abspath())
+    timeout = attr.ib(type=float, default=60)
+
+    def __attrs_post_init__(self):
+        self.path.parent.makedirs_p()
+        with self._connect() as connection:
+            connection.execute(_schema)
+
+    @property
+    def results_dir(self) -> Path:
+        return self.path.parent / f"{self.path.stem}_results"
+
+    @contextmanager
+    def _connect(self):
+        """Connection in a transaction, committed (or rolled back) and closed at
+        the end."""
+        with closing(sqlite3.connect(self.path, timeout=self.timeout)) as connection:
+            with connection:
+                yield connection
+
+    def _record(self, key: Hashable, input_hash: Optional[str], **fields):
+        # a sample without input hash is recorded, but never considered completed
+        fields = {"key": _sample_key(key), "input_hash": input_hash or "", **fields}
+        columns = ", ".join(fields)
+        with self._connect() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO samples ({columns})"
+                f" VALUES ({', '.join('?' * len(fields))})",
+                list(fields.values()),
+            )
+
+    def start(self, key: Hashable, input_hash: str):
+        """Record that a sample is running.
+
+        Arguments:
+            key {Hashable} -- the sample key
+            input_hash {str} -- the hash of the sample inputs
+        """
+        self._record(key, input_hash, status="running", started=time.time())
+
+    def finish(
+        self, key: Hashable, input_hash: str, result: Any, started: float
+    ) -> Path:
+        """Save the result of a sample, and record it as finished.
+
+        Arguments:
+            key {Hashable} -- the sample key
+            input_hash {str} -- the hash of the sample inputs
+            result {Any} -- the sample result (simulation or reducer output)
+            started {float} -- the start time of the run, as `time.time()`
+
+        Returns:
+            Path -- the result location
+        """
+        name = hashlib.sha256(_sample_key(key).encode("utf8")).hexdigest()
+        location = self.results_dir.makedirs_p() / f"{name}.pkl"
+        tmp_location = location.parent / f".{name}.{os.getpid()}.tmp"
+        with open(tmp_location, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_location, location)
+        self._record(
+            key,
+            input_hash,
+            status="finished",
+            started=started,
+            elapsed=time.time() - started,
+            location=str(location.relpath(self.path.parent)),
+        )
+        return location
+
+    def fail(self, key: Hashable, input_hash: str, error: BaseException, started):
+        """Record that a sample failed.
+
+        Arguments:
+            key {Hashable} -- the sample key
+            input_hash {str} -- the hash of the sample inputs
+            error {BaseException} -- the raised error
+            started {float} -- the start time of the run, as `time.time()`
+        """
+        self._record(
+            key,
+            input_hash,
+            status="failed",
+            started=started,
+            elapsed=time.time() - started,
+            error=f"{type(error).__name__}: {error}",
+        )
+
+    def completed(self, input_hashes: Mapping[Hashable, str]) -> Dict[Hashable, Path]:
+        """Get the samples already finished with the same inputs.
+
+        Arguments:
+            input_hashes {Mapping[Hashable, str]} -- the input hash of each
+                sample, by key
+
+        Returns:
+            Dict[Hashable, Path] -- the result location of the finished samples
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT key, input_hash, location FROM samples"
+                " WHERE status = 'finished'"
+            ).fetchall()
+        finished = {key: (input_hash, location) for key, input_hash, location in rows}
+        completed = {}
+        for key, input_hash in input_hashes.items():
+            record = finished.get(_sample_key(key))
+            if record is None or not input_hash or record[0] != input_hash:
+                continue
+            location = self.path.parent / record[1]
+            if location.exists():
+                completed[key] = location
+        return completed
+
+    def load(self, location: Path) -> Any:
+        """Load a saved result.
+
+        Arguments:
+            location {Path} -- the result location, as given by `completed`
+
+        Returns:
+            Any -- the sample result
+        """
+        with open(location, "rb") as f:
+            return pickle.load(f)
+
+    def run(self, key: Hashable, input_hash: str, func, *args, **kwargs) -> Any:
+        """Run a sample, recording its status and saving its result.
+
+        Arguments:
+            key {Hashable} -- the sample key
+            input_hash {str} -- the hash of the sample inputs
+            func {Callable} -- the function that runs the sample, called with the
+                other arguments
+
+        Returns:
+            Any -- the function output
+        """
+        started = time.time()
+        self.start(key, input_hash)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.fail(key, input_hash, e, started)
+            raise
+        self.finish(key, input_hash, result, started)
+        return result
+
+    def entries(self) -> DataFrame:
+        """Get the journal content.
+
+        Returns:
+            DataFrame -- one row per sample (indexed by the repr of its key), with
+                the input_hash, status, started, elapsed, location and error
+                columns
+        """
+        with self._connect() as connection:
+            df = pd.read_sql_query("SELECT * FROM samples", connection)
+        df["started"] = pd.to_datetime(df["started"], unit="s")
+        return df.set_index("key")
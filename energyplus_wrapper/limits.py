@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import re
+import signal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import attr
+from path import Path
+from plumbum import ProcessExecutionError
+
+try:
+    import resource
+except ImportError:  # not available on Windows: no resource limit
+    resource = None
+
+# the rlimits of a running process can only be set on Linux
+_prlimit = getattr(resource, "prlimit", None)
+
+# EnergyPlus messages that announce a doomed run
+default_fatal_patterns = [
+    r"\*\*\s*Severe\s*\*\*",
+    r"did not converge after \d+ warmup days",
+]
+
+
+class SimulationTimeout(ProcessExecutionError):
+    """Raised when a simulation is stopped by its wall-clock or CPU time limit."""
+
+
+class SimulationKilled(ProcessExecutionError):
+    """Raised when a simulation is killed early on a fatal error message."""
+
+
+@attr.s
+class _LogTail:
+    """Read the lines appended to some files since the last call."""
+
+    files = attr.ib(type=List[Path])
+    _offsets = attr.ib(type=Dict[Path, int], factory=dict, init=False)
+    _partial = attr.ib(type=Dict[Path, str], factory=dict, init=False)
+
+    def new_lines(self) -> List[str]:
+        lines = []
+        for filename in self.files:
+            try:
+                with open(filename, "rb") as f:
+                    f.seek(self._offsets.get(filename, 0))
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            self._offsets[filename] = self._offsets.get(filename, 0) + len(data)
+            text = self._partial.get(filename, "") + data.decode(errors="replace")
+            *complete, self._partial[filename] = text.split("\n")
+            lines.extend(complete)
+        return lines
+
+
+@attr.s(frozen=True)
+class RunLimits:
+    """Resource limits of the EnergyPlus process, and early kill on fatal errors.
+
+    While EnergyPlus runs, the error file and the standard output are followed:
+    the process is killed as soon as a line matches one of the fatal patterns
+    (severe errors, warmup convergence failures by default), or when the wall
+    time limit is reached. The CPU time and memory limits are set as rlimits of
+    the EnergyPlus process as soon as it is started (Linux only).
+
+    Attributes:
+        wall_time (float, optional): the wall-clock time limit, in seconds.
+        cpu_time (int, optional): the CPU time limit, in seconds.
+        max_memory (int, optional): the address space limit, in bytes (the
+            RSS rlimit is not enforced by Linux, the address space one is).
+        fatal_patterns (Sequence[str]): the regular expressions that make the
+            run killed when found in the error file or the standard output. Empty
+            to never kill a run early. (default: `default_fatal_patterns`)
+        poll (float): the period of the checks, in seconds. (default: {0.5})
+    """
+
+    wall_time = attr.ib(type=Optional[float], default=None)
+    cpu_time = attr.ib(type=Optional[int], default=None)
+    max_memory = attr.ib(type=Optional[int], default=None)
+    fatal_patterns = attr.ib(
+        type=Sequence[str],
+        factory=lambda: list(default_fatal_patterns),
+        converter=tuple,
+    )
+    poll = attr.ib(type=float, default=0.5)
+
+    def set_rlimits(self, pid: int):
+        """Set the CPU time and memory limits of a running process (the
+        EnergyPlus one, right after it is started).
+
+        Arguments:
+            pid {int} -- the process id
+        """
+        if _prlimit is None:
+            return
+        try:
+            if self.cpu_time is not None:
+                # SIGXCPU at the soft limit, SIGKILL one second later
+                cpu_time = int(self.cpu_time)
+                _prlimit(pid, resource.RLIMIT_CPU, (cpu_time, cpu_time + 1))
+            if self.max_memory is not None:
+                memory = int(self.max_memory)
+                _prlimit(pid, resource.RLIMIT_AS, (memory, memory))
+        except ProcessLookupError:  # already ended
+            pass
+
+    def watch(self, working_dir: Path, log_file: Path) -> "RunWatcher":
+        """Start watching a run.
+
+        Arguments:
+            working_dir {Path} -- the simulation working directory
+            log_file {Path} -- where the standard output is written
+
+        Returns:
+            RunWatcher -- the watcher
+        """
+        return RunWatcher(
+            self,
+            _LogTail(
+                [working_dir / "eplus.err", working_dir / "eplusout.err", log_file]
+            ),
+        )
+
+    def returncode_status(
+        self, returncode: int, cpu_time: Optional[float] = None
+    ) -> Optional[Tuple[str, str]]:
+        """Explain a process killed by its rlimits.
+
+        The process gets a SIGXCPU at the CPU time limit, or a SIGKILL if it
+        survived it. The SIGKILL is only blamed on the limit if the process used
+        that much CPU time, as it can come from anywhere else (the kernel OOM
+        killer, the user...).
+
+        Arguments:
+            returncode {int} -- the process return code
+
+        Keyword Arguments:
+            cpu_time {float, optional} -- the process CPU time, in seconds, if
+                known.
+
+        Returns:
+            Tuple[str, str] -- the ("timeout", reason) status, or None
+        """
+        if self.cpu_time is None or _prlimit is None:
+            return None
+        reached = returncode == -signal.SIGXCPU or (
+            returncode == -signal.SIGKILL
+            and cpu_time is not None
+            and cpu_time >= self.cpu_time
+        )
+        if reached:
+            return "timeout", f"CPU time limit reached ({self.cpu_time}s)."
+        return None
+
+
+@attr.s
+class RunWatcher:
+    """Follow a running simulation, and tell when it has to be stopped."""
+
+    limits = attr.ib(type=RunLimits)
+    tail = attr.ib(type=_LogTail)
+    _patterns = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        self._patterns = [re.compile(pattern) for pattern in self.limits.fatal_patterns]
+
+    def check(self, elapsed: float) -> Optional[Tuple[str, str]]:
+        """Check the run.
+
+        Arguments:
+            elapsed {float} -- the run wall time, in seconds
+
+        Returns:
+            Tuple[str, str] -- the (status, reason) if the run has to be stopped,
+                "timeout" or "killed". None otherwise.
+        """
+        if self._patterns:
+            for line in self.tail.new_lines():
+                if any(pattern.search(line) for pattern in self._patterns):
+                    return "killed", f"Fatal message: {line.strip()}"
+        if self.limits.wall_time is not None and elapsed > self.limits.wall_time:
+            return "timeout", f"Wall time limit reached ({self.limits.wall_time}s)."
+        return None
+
+
+def limit_error(status: str, cmd, returncode, log: str, reason: str):
+    """Build the error raised for a run stopped by its limits.
+
+    Arguments:
+        status {str} -- either "timeout" or "killed"
+        cmd {list} -- the EnergyPlus command
+        returncode {int} -- the process return code
+        log {str} -- the process output
+        reason {str} -- why the run was stopped
+
+    Returns:
+        ProcessExecutionError -- a SimulationTimeout or a SimulationKilled
+    """
+    error = SimulationTimeout if status == "timeout" else SimulationKilled
+    return error(list(map(str, cmd)), returncode, log, reason)
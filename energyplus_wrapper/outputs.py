@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import zlib
+from io import BytesIO, TextIOWrapper
+from tempfile import NamedTemporaryFile
+from typing import Mapping, Optional, Sequence, Union
+
+import attr
+from pandas import DataFrame
+from path import Path
+
+from .eso import (
+    find_eso_outputs,
+    process_eplus_eso_time_series,
+    read_eso,
+    select_eso_outputs,
+)
+from .sql import (
+    find_sql_output,
+    process_eplus_sql_reports,
+    process_eplus_sql_time_series,
+)
+from .utils import (
+    default_year,
+    format_time_series,
+    process_eplus_html_report,
+    process_eplus_time_series,
+    read_time_series,
+    time_series_name,
+)
+
+
+def _compress_file(filename: Path) -> bytes:
+    with open(filename, "rb") as f:
+        return zlib.compress(f.read(), 1)
+
+
+def _to_time_series_selection(time_series):
+    if time_series is None:
+        return None
+    if isinstance(time_series, str):
+        return {time_series: None}
+    if isinstance(time_series, Mapping):
+        return {
+            name: list(columns) if columns is not None else None
+            for name, columns in time_series.items()
+        }
+    return {name: None for name in time_series}
+
+
+@attr.s(frozen=True)
+class DeferredReports:
+    """The compressed html report of a simulation, parsed on first access.
+
+    Attributes:
+        data (bytes): the zlib compressed html report.
+        selection (OutputSelection): the selection of the parsed tables.
+    """
+
+    data = attr.ib(type=bytes, repr=False)
+    selection = attr.ib(type="OutputSelection")
+
+    def __call__(self):
+        return process_eplus_html_report(
+            BytesIO(zlib.decompress(self.data)),
+            select=self.selection.select_report,
+        )
+
+
+@attr.s(frozen=True)
+class DeferredTimeSeries:
+    """The compressed csv (or eso and mtr) outputs of a simulation, parsed on
+    first access.
+
+    Attributes:
+        data (Dict[str, bytes]): the zlib compressed csv files, by time series name
+            (or the eso and mtr files, by time series prefix).
+        selection (OutputSelection): the selection of the parsed columns.
+        output_backend (str): the simulation output backend, "csv" or "eso".
+    """
+
+    data = attr.ib(type=dict, repr=False)
+    selection = attr.ib(type="OutputSelection")
+    output_backend = attr.ib(type=str, default="csv")
+
+    def __call__(self):
+        time_series = {}
+        if self.output_backend == "eso":
+            for prefix, data in self.data.items():
+                eso_file = TextIOWrapper(BytesIO(zlib.decompress(data)))
+                time_series.update(
+                    read_eso(eso_file, prefix=prefix, select=self.selection.time_series)
+                )
+            return self.selection.format(time_series)
+        for name, data in self.data.items():
+            time_series[name] = read_time_series(
+                BytesIO(zlib.decompress(data)),
+                columns=self.selection.time_series_columns(name),
+            )
+        return self.selection.format(time_series)
+
+
+@attr.s(frozen=True)
+class DeferredSqlOutput:
+    """The compressed SQLite output of a simulation, parsed on first access.
+
+    Attributes:
+        data (bytes): the zlib compressed sql file.
+        selection (OutputSelection): the selection of the parsed outputs.
+        output (str): the extracted output, either "reports" or "time_series".
+    """
+
+    data = attr.ib(type=bytes, repr=False)
+    selection = attr.ib(type="OutputSelection")
+    output = attr.ib(type=str)
+
+    def __call__(self):
+        with NamedTemporaryFile(suffix=".sql") as sql_file:
+            sql_file.write(zlib.decompress(self.data))
+            sql_file.flush()
+            if self.output == "reports":
+                return process_eplus_sql_reports(
+                    sql_file.name, select=self.selection.select_report
+                )
+            return self.selection.format(
+                process_eplus_sql_time_series(
+                    sql_file.name, select=self.selection.time_series
+                )
+            )
+
+
+@attr.s(frozen=True)
+class OutputSelection:
+    """Select which EnergyPlus outputs are parsed after a simulation, and when.
+
+    An OutputSelection is a simulation post-process: it can be given to
+    `EPlusRunner.run_one` and `EPlusRunner.run_many` as `output_selection`.
+
+    Attributes:
+        reports (Sequence[str], optional): the html report tables to parse, given
+            as report keys (e.g. "Annual_Building_Utility_Performance_Summary_
+            for_Entire_Facility"), as table titles (e.g. "Site and Source Energy")
+            or as "{report_key}/{title}". All the tables are parsed if None.
+        time_series (Sequence[str] or Mapping[str, Sequence[str]], optional): the
+            time series to parse (e.g. "eplus" or "meter", or "eplus_hourly" with
+            the sqlite and eso output backends). If a mapping is given, the values
+            are the columns to parse in each time series (all the columns if
+            None). All the time series are parsed if None.
+        lazy (bool): if True, the selected outputs are not parsed after the
+            simulation, but kept compressed in the simulation object and parsed on
+            first access to `simulation.reports` or `simulation.time_series`.
+        datetime_index (bool): if True, the "Date/Time" column of the time series
+            is parsed into a DatetimeIndex (see `utils.format_time_series`).
+        year (int): the simulation year, used with `datetime_index`.
+        float32 (bool): if True, the time series values are downcast to float32.
+        split_columns (bool): if True, the time series columns are a MultiIndex
+            with the (key, variable, unit, frequency) levels.
+    """
+
+    reports = attr.ib(
+        type=Optional[Sequence[str]],
+        default=None,
+        converter=lambda reports: (
+            None
+            if reports is None
+            else ((reports,) if isinstance(reports, str) else tuple(reports))
+        ),
+    )
+    time_series = attr.ib(
+        type=Optional[Union[Sequence[str], Mapping[str, Sequence[str]]]],
+        default=None,
+        converter=_to_time_series_selection,
+    )
+    lazy = attr.ib(type=bool, default=False)
+    datetime_index = attr.ib(type=bool, default=False)
+    year = attr.ib(type=int, default=default_year)
+    float32 = attr.ib(type=bool, default=False)
+    split_columns = attr.ib(type=bool, default=False)
+
+    def select_report(self, report_key: str, title: str) -> bool:
+        """Check if a table of the html report is selected.
+
+        Arguments:
+            report_key {str} -- the report key
+            title {str} -- the table title
+
+        Returns:
+            bool -- True if the table has to be parsed.
+        """
+        if self.reports is None:
+            return True
+        return any(
+            selected in (report_key, title, f"{report_key}/{title}")
+            for selected in self.reports
+        )
+
+    def select_time_series(self, name: str) -> bool:
+        """Check if a csv output is selected.
+
+        Arguments:
+            name {str} -- the time series name
+
+        Returns:
+            bool -- True if the csv output has to be parsed.
+        """
+        return self.time_series is None or name in self.time_series
+
+    def time_series_columns(self, name: str) -> Optional[Sequence[str]]:
+        """Get the selected columns of a csv output (None meaning all the columns).
+        """
+        if self.time_series is None:
+            return None
+        return self.time_series.get(name)
+
+    def format(self, time_series: Mapping[str, DataFrame]) -> dict:
+        """Apply the time series formatting options to parsed time series.
+
+        Arguments:
+            time_series {Mapping[str, DataFrame]} -- the time series, by name
+
+        Returns:
+            dict -- the formatted time series
+        """
+        if not (self.datetime_index or self.float32 or self.split_columns):
+            return dict(time_series)
+        return {
+            name: format_time_series(
+                df,
+                datetime_index=self.datetime_index,
+                year=self.year,
+                float32=self.float32,
+                split_columns=self.split_columns,
+                meter=name.startswith("meter"),
+            )
+            for name, df in time_series.items()
+        }
+
+    def _process_sql(self, simulation):
+        sql_file = find_sql_output(simulation.working_dir)
+        if self.lazy:
+            # both loaders share the same bytes, that are pickled only once
+            data = _compress_file(sql_file)
+            if self.reports != ():
+                simulation.defer("reports", DeferredSqlOutput(data, self, "reports"))
+            simulation.defer(
+                "time_series", DeferredSqlOutput(data, self, "time_series")
+            )
+            return
+        if self.reports != ():
+            simulation.reports = process_eplus_sql_reports(
+                sql_file, select=self.select_report
+            )
+        simulation.time_series = self.format(
+            process_eplus_sql_time_series(sql_file, select=self.time_series)
+        )
+
+    def _defer_eso(self, simulation):
+        eso_files = select_eso_outputs(
+            find_eso_outputs(simulation.working_dir), self.time_series
+        )
+        simulation.defer(
+            "time_series",
+            DeferredTimeSeries(
+                {
+                    prefix: _compress_file(eso_file)
+                    for prefix, eso_file in eso_files.items()
+                },
+                self,
+                "eso",
+            ),
+        )
+
+    def __call__(self, simulation):
+        if simulation.output_backend == "sqlite":
+            return self._process_sql(simulation)
+        html_report = simulation.working_dir / "eplus-table.htm"
+        parse_reports = html_report.exists() and self.reports != ()
+
+        if self.lazy:
+            if parse_reports:
+                simulation.defer(
+                    "reports", DeferredReports(_compress_file(html_report), self)
+                )
+            if simulation.output_backend == "eso":
+                return self._defer_eso(simulation)
+            csv_files = {
+                time_series_name(csv_file): csv_file
+                for csv_file in simulation.working_dir.files("*.csv")
+            }
+            simulation.defer(
+                "time_series",
+                DeferredTimeSeries(
+                    {
+                        name: _compress_file(csv_file)
+                        for name, csv_file in csv_files.items()
+                        if self.select_time_series(name)
+                    },
+                    self,
+                ),
+            )
+            return
+
+        if parse_reports:
+            simulation.reports = process_eplus_html_report(
+                html_report, select=self.select_report
+            )
+        if simulation.output_backend == "eso":
+            simulation.time_series = self.format(
+                process_eplus_eso_time_series(
+                    simulation.working_dir, select=self.time_series
+                )
+            )
+            return
+        simulation.time_series = self.format(
+            process_eplus_time_series(simulation.working_dir, select=self.time_series)
+        )
+
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Tuple, Union
+
+import attr
+from path import Path
+
+re_idf_token = re.compile(r"![^\n]*|[,;]")
+re_field_units = re.compile(r"\{[^}]*\}")
+re_field_separators = re.compile(r"[\s_]+")
+
+# a parameter, as (object type, object name, field): the name can be None to
+# patch every object of that type, the field is either a 0-based field index
+# (0 being the object name) or a field name (as in the "!- Field Name" comments)
+ParameterKey = Tuple[str, Optional[str], Union[int, str]]
+
+
+def _field_key(field_name: str) -> str:
+    field_name = re_field_units.sub("", field_name)
+    return re_field_separators.sub(" ", field_name).strip().lower()
+
+
+@attr.s(frozen=True)
+class _IDFObject:
+    object_type = attr.ib(type=str)
+    spans = attr.ib(type=list)
+    field_names = attr.ib(type=dict)
+
+
+class IDFTemplate:
+    """An idf parsed once at the text level, that renders variants of itself with
+    some fields replaced, without eppy.
+
+    The objects are split on their separators (comments excluded), and the
+    position of each field value in the text is kept: rendering a variant only
+    joins the unchanged slices of the text with the new values.
+
+    Arguments:
+        idf_str {str} -- the idf content
+    """
+
+    def __init__(self, idf_str: str):
+        self.idf_str = idf_str
+        self._objects: Dict[str, List[_IDFObject]] = {}
+        self._named_objects: Dict[Tuple[str, str], List[_IDFObject]] = {}
+        self._parse()
+
+    def _parse(self):
+        fields = []
+        field_names = {}
+        # the "!- Field Name" comment of the last field follows the object end
+        last_object = None
+        start = 0
+        for token in re_idf_token.finditer(self.idf_str):
+            if token.group().startswith("!"):
+                field_name = token.group()[2:] if token.group()[1:2] == "-" else None
+                if field_name is not None and fields:
+                    field_names.setdefault(_field_key(field_name), len(fields) - 1)
+                elif field_name is not None and last_object is not None:
+                    last_object.field_names.setdefault(
+                        _field_key(field_name), len(last_object.spans) - 1
+                    )
+                    last_object = None
+                start = token.end()
+                continue
+            last_object = None
+            value = self.idf_str[start : token.start()]
+            stripped = value.strip()
+            offset = start + (len(value) - len(value.lstrip()))
+            fields.append((offset, offset + len(stripped)))
+            start = token.end()
+            if token.group() == ";":
+                object_type_span, *spans = fields
+                object_type = self.idf_str[slice(*object_type_span)].lower()
+                # the "!- Field Name" comments are indexed from the class name
+                names = {
+                    name: index - 1 for name, index in field_names.items() if index > 0
+                }
+                last_object = _IDFObject(object_type, spans, names)
+                self._objects.setdefault(object_type, []).append(last_object)
+                if spans:
+                    name = self.idf_str[slice(*spans[0])].lower()
+                    self._named_objects.setdefault((object_type, name), []).append(
+                        last_object
+                    )
+                fields, field_names = [], {}
+
+    def objects(self, object_type: str, object_name: Optional[str] = None):
+        """Get the objects of a type, optionally filtered by name (case
+        insensitive, as in EnergyPlus).
+
+        Raises:
+            KeyError -- if there is no such object.
+        """
+        if object_name is None:
+            objects = self._objects.get(object_type.lower())
+        else:
+            objects = self._named_objects.get(
+                (object_type.lower(), object_name.lower())
+            )
+        if not objects:
+            raise KeyError(f"No {object_type} object named {object_name} in the idf.")
+        return objects
+
+    def _span(self, obj: _IDFObject, field: Union[int, str]) -> Tuple[int, int]:
+        if isinstance(field, int):
+            index = field
+        else:
+            index = obj.field_names.get(_field_key(field))
+        if index is None or not 0 <= index < len(obj.spans):
+            raise KeyError(f"No field {field!r} in the {obj.object_type} object.")
+        return obj.spans[index]
+
+    def render(self, parameters: Optional[Mapping[ParameterKey, Any]] = None) -> str:
+        """Render the idf with some field values replaced.
+
+        Arguments:
+            parameters {Mapping[ParameterKey, Any], optional} -- the new values,
+                by (object type, object name, field).
+
+        Returns:
+            str -- the idf content
+        """
+        if not parameters:
+            return self.idf_str
+        patches = {}
+        for (object_type, object_name, field), value in parameters.items():
+            for obj in self.objects(object_type, object_name):
+                patches[self._span(obj, field)] = str(value)
+        chunks = []
+        position = 0
+        for (start, end), value in sorted(patches.items()):
+            chunks.append(self.idf_str[position:start])
+            chunks.append(value)
+            position = end
+        chunks.append(self.idf_str[position:])
+        return "".join(chunks)
+
+
+@lru_cache(maxsize=16)
+def _cached_template(filename: str, mtime_ns: int, size: int) -> IDFTemplate:
+    with open(filename) as f:
+        return IDFTemplate(f.read())
+
+
+def load_template(filename: Path) -> IDFTemplate:
+    """Parse an idf file as an IDFTemplate.
+
+    The result is memoized for the process lifetime (keyed by the file path,
+    modification time and size): each worker parses a base idf only once.
+
+    Arguments:
+        filename {Path} -- the idf file
+
+    Returns:
+        IDFTemplate -- the parsed idf
+    """
+    filename = Path(filename).abspath()
+    stat = filename.stat()
+    return _cached_template(str(filename), stat.st_mtime_ns, stat.st_size)
+
+
+@attr.s(frozen=True)
+class ParametricSample:
+    """A variant of a base idf file, described by the field values that differ.
+
+    A ParametricSample can be used anywhere an idf is expected by the runner: only
+    the base file path and the parameters are sent to the workers, where the
+    base idf is parsed once and rendered for each sample.
+
+    Attributes:
+        base (Path): the base idf file.
+        parameters (Dict[ParameterKey, Any]): the new field values, by
+            (object type, object name, field). The object name can be None to
+            patch every object of that type, and the field is either a 0-based
+            index (0 being the object name) or a field name, as written in the
+            "!- Field Name" comments (e.g. "Solar Heat Gain Coefficient").
+    """
+
+    base = attr.ib(type=Path, converter=lambda base: Path(base).abspath())
+    parameters = attr.ib(type=Dict[ParameterKey, Any], factory=dict, converter=dict)
+
+    def render(self) -> str:
+        """Render the idf of this sample.
+
+        Returns:
+            str -- the idf content
+        """
+        return load_template(self.base).render(self.parameters)
+
+
+def parametric_samples(
+    base: Path, parameters: Mapping[Hashable, Mapping[ParameterKey, Any]]
+) -> Dict[Hashable, ParametricSample]:
+    """Build the samples of a parametric study on a base idf.
+
+    Arguments:
+        base {Path} -- the base idf file
+        parameters {Mapping[Hashable, Mapping[ParameterKey, Any]]} -- the
+            parameters of each sample, by sample key.
+
+    Returns:
+        Dict[Hashable, ParametricSample] -- the samples, by key
+    """
+    return {key: ParametricSample(base, values) for key, values in parameters.items()}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+import os
+from typing import Callable, Optional
+
+import attr
+import fasteners
+from appdirs import user_cache_dir
+from path import Path
+
+# in-process memo, shared by all the ProbeCache instances (and thus by all the
+# runners unpickled in the same worker).
+_memo = {}
+
+
+def _stat_key(kind: str, filename: Path) -> str:
+    filename = Path(filename).abspath()
+    stat = filename.stat()
+    return f"{kind}|{filename}|{stat.st_mtime_ns}|{stat.st_size}"
+
+
+@attr.s
+class ProbeCache:
+    """Persistent cache for the results of costly probes on a file (as the
+    EnergyPlus binary version, that needs a subprocess, or the idd version).
+
+    The results are keyed by the file path, modification time and size, and are
+    kept in memory and in a json file, so that all the processes (as the joblib
+    workers) can reuse them.
+
+    Attributes:
+        cache_file (Path, optional): the json file where the probes are saved. If
+            None, the probes are only memoized for the process lifetime.
+    """
+
+    cache_file = attr.ib(
+        type=str,
+        factory=lambda: Path(user_cache_dir(appname="energy_plus_wrapper"))
+        / "probes.json",
+        converter=lambda file: Path(file).abspath() if file is not None else None,
+    )
+
+    def _read(self) -> dict:
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, key: str, value: str):
+        self.cache_file.parent.makedirs_p()
+        with fasteners.InterProcessLock(f"{self.cache_file}.lock"):
+            probes = self._read()
+            probes[key] = value
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(probes, f, indent=0)
+            os.replace(tmp_file, self.cache_file)
+
+    def get(self, kind: str, filename: Path, probe: Callable[[Path], str]) -> str:
+        """Get the result of a probe on a file, running it only if the file is not
+        known or has changed.
+
+        Arguments:
+            kind {str} -- name of the probe.
+            filename {Path} -- the probed file.
+            probe {Callable[[Path], str]} -- the probe itself, that take the file as
+                argument.
+
+        Returns:
+            str -- the probe result.
+        """
+        key = _stat_key(kind, filename)
+        try:
+            return _memo[key]
+        except KeyError:
+            pass
+        value = None
+        if self.cache_file is not None:
+            value = self._read().get(key)
+        if value is None:
+            value = probe(filename)
+            if self.cache_file is not None and value is not None:
+                try:
+                    self._write(key, value)
+                except OSError:
+                    # an unwritable cache should not prevent the simulations to run
+                    pass
+        _memo[key] = value
+        return value
+
+
+def _scan_lines(lines, patterns, object_name: Optional[str]) -> Optional[str]:
+    obj_fields = None
+    for line in lines:
+        for pattern in patterns:
+            match = pattern.search(line)
+            if match:
+                return match.group(1)
+        if object_name is None:
+            continue
+        code = line.split("!", 1)[0].strip()
+        if obj_fields is None:
+            head, sep, tail = code.partition(",")
+            if not sep or head.strip().lower() != object_name.lower():
+                continue
+            obj_fields = tail
+        else:
+            obj_fields += code
+        if ";" in obj_fields:
+            version = obj_fields.split(";", 1)[0].split(",", 1)[0].strip()
+            return ".".join(version.split(".")[:2])
+    return None
+
+
+def _head_lines(f, max_bytes: int):
+    read = 0
+    for line in f:
+        yield line
+        read += len(line)
+        if read >= max_bytes:
+            return
+
+
+def scan_version(
+    filename: Path,
+    patterns,
+    object_name: Optional[str] = None,
+    max_bytes: int = 1 << 20,
+) -> Optional[str]:
+    """Scan a file line by line until a version is found, without reading the whole
+    file.
+
+    At most `max_bytes` are read from the start of the file. If the version is not
+    found there, the last `max_bytes` are scanned as well (the `Version` object is
+    at the end of the idf files that are sorted by object type).
+
+    Arguments:
+        filename {Path} -- the scanned file.
+        patterns {Sequence[re.Pattern]} -- regex with one group, searched in the
+            raw lines (comments included).
+
+    Keyword Arguments:
+        object_name {str, optional} -- if provided, the first field of that idf
+            object (as `Version,8.7;`) is also read as a version.
+        max_bytes {int} -- the size of the scanned head and tail of the file.
+            (default: {1 MiB})
+
+    Returns:
+        str -- the version as "{major}.{minor}" (e.g. "8.7"), or None if not found.
+    """
+    with open(filename, errors="replace") as f:
+        version = _scan_lines(_head_lines(f, max_bytes), patterns, object_name)
+    size = os.path.getsize(filename)
+    if version is not None or size <= max_bytes:
+        return version
+    with open(filename, "rb") as f:
+        f.seek(max(size - max_bytes, max_bytes))
+        # the first line may be truncated
+        lines = f.read().decode(errors="replace").splitlines()[1:]
+    return _scan_lines(lines, patterns, object_name)
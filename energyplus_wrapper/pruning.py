@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import re
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import attr
+
+from .utils import re_idf_comment
+from .workdir import estimate_output_size
+
+# the reporting frequencies, from the finest to the coarsest
+frequencies = ["detailed", "timestep", "hourly", "daily", "monthly", "runperiod"]
+_frequency_aliases = {"environment": "runperiod", "annual": "runperiod"}
+
+# the outputs nobody reads in a batch: drawings, dictionaries, debugging files
+default_dropped_objects = (
+    "Output:Surfaces:Drawing",
+    "Output:Surfaces:List",
+    "Output:VariableDictionary",
+    "Output:Constructions",
+    "Output:Schedules",
+    "Output:DebuggingData",
+    "Output:EnergyManagementSystem",
+)
+# the Output:Diagnostics keys that only add messages to the err and audit files
+_verbose_diagnostics = {
+    "displayallwarnings",
+    "displayextrawarnings",
+    "displayunusedobjects",
+    "displayunusedschedules",
+    "displayweathermissingdatawarnings",
+    "displayzoneairheatbalanceoffbalance",
+    "reportduringwarmup",
+    "reportduringwarmupconvergence",
+    "reportdetailedwarmupconvergence",
+    "reportduringhvacsizingsimulation",
+}
+
+_token_pattern = re.compile(r"![^\n]*|;")
+_blank_pattern = re.compile(r"(?:\s|![^\n]*)*")
+_blank_lines_pattern = re.compile(r"(?:[ \t]*\n)*")
+_drop = object()
+
+
+def _to_output_selection(outputs) -> Optional[Dict[str, Optional[str]]]:
+    if outputs is None:
+        return None
+    if isinstance(outputs, str):
+        outputs = [outputs]
+    if not isinstance(outputs, Mapping):
+        outputs = {name: None for name in outputs}
+    return {
+        name.lower(): None if frequency is None else _check_frequency(frequency)
+        for name, frequency in outputs.items()
+    }
+
+
+def _check_frequency(frequency: str) -> str:
+    frequency = _frequency_aliases.get(frequency.lower(), frequency.lower())
+    if frequency not in frequencies:
+        raise ValueError(f"The reporting frequency should be one of {frequencies}.")
+    return frequency
+
+
+def _idf_object_spans(idf_str: str) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) of each object of an idf, the comments before the
+    object included, and its closing semicolon too."""
+    start = 0
+    for match in _token_pattern.finditer(idf_str):
+        if match.group() == ";":
+            yield start, match.end()
+            start = match.end()
+
+
+@attr.s
+class PruningSummary:
+    """What `OutputPruning` removed from a model.
+
+    Attributes:
+        removed (Dict[str, int]): the number of removed objects, by object type.
+        removed_outputs (List[str]): the names of the removed variables and
+            meters.
+        coarsened (Dict[str, int]): the number of outputs reported less often,
+            by object type.
+        diagnostics (List[str]): the disabled Output:Diagnostics keys.
+        output_size (Tuple[int, int]): the estimated size of the EnergyPlus
+            outputs, in bytes, before and after pruning (see
+            `workdir.estimate_output_size`).
+    """
+
+    removed = attr.ib(type=Dict[str, int], factory=dict)
+    removed_outputs = attr.ib(type=List[str], factory=list)
+    coarsened = attr.ib(type=Dict[str, int], factory=dict)
+    diagnostics = attr.ib(type=List[str], factory=list)
+    output_size = attr.ib(type=Tuple[int, int], default=(0, 0))
+
+    def __str__(self):
+        removed = ", ".join(f"{n} {obj}" for obj, n in sorted(self.removed.items()))
+        coarsened = ", ".join(
+            f"{n} {obj}" for obj, n in sorted(self.coarsened.items())
+        )
+        before, after = self.output_size
+        return (
+            f"removed: {removed or 'nothing'}; coarsened: {coarsened or 'nothing'};"
+            f" disabled diagnostics: {', '.join(self.diagnostics) or 'none'};"
+            f" estimated outputs: {before / 2 ** 20:.1f} MiB ->"
+            f" {after / 2 ** 20:.1f} MiB"
+        )
+
+
+@attr.s(frozen=True)
+class OutputPruning:
+    """Rewrite a model before it is ran, to only request the outputs that are
+    used.
+
+    Given to an `EPlusRunner` as `output_pruning`, the idf of each run is pruned
+    in its working directory (the user files are left untouched), and what was
+    removed is in `Simulation.pruning_summary`.
+
+    The other objects, formatting and comments of the model are left as is, the
+    modified objects are written on one line.
+
+    Attributes:
+        variables (Sequence[str] or Mapping[str, str], optional): the names of the
+            `Output:Variable` kept (case insensitive), with their reporting
+            frequency if a mapping is given (None keeps the model one). All the
+            variables are kept if None.
+        meters (Sequence[str] or Mapping[str, str], optional): the same, for the
+            `Output:Meter` objects (and their MeterFileOnly and Cumulative
+            variants).
+        max_frequency (str, optional): the kept variables and meters reported
+            more often than that (e.g. "timestep" with "hourly") are reported at
+            that frequency instead.
+        reports (Sequence[str], optional): the `Output:Table:SummaryReports` to
+            request instead of the model ones (e.g. replacing "AllSummary"). No
+            summary report is requested if empty, the model ones are kept if None.
+        drop (Sequence[str]): the object types removed from the model.
+            (default: {`default_dropped_objects`})
+        diagnostics (bool): if False, the `Output:Diagnostics` keys that only add
+            warnings to the err and audit files are removed. (default: {False})
+    """
+
+    variables = attr.ib(
+        type=Optional[Union[Sequence[str], Mapping[str, Optional[str]]]],
+        default=None,
+        converter=_to_output_selection,
+    )
+    meters = attr.ib(
+        type=Optional[Union[Sequence[str], Mapping[str, Optional[str]]]],
+        default=None,
+        converter=_to_output_selection,
+    )
+    max_frequency = attr.ib(
+        type=Optional[str],
+        default=None,
+        converter=lambda frequency: (
+            None if frequency is None else _check_frequency(frequency)
+        ),
+    )
+    reports = attr.ib(
+        type=Optional[Sequence[str]],
+        default=None,
+        converter=lambda reports: (
+            None
+            if reports is None
+            else ((reports,) if isinstance(reports, str) else tuple(reports))
+        ),
+    )
+    drop = attr.ib(
+        type=Sequence[str],
+        default=default_dropped_objects,
+        converter=lambda drop: tuple(obj.lower() for obj in drop),
+    )
+    diagnostics = attr.ib(type=bool, default=False)
+
+    def _frequency(self, frequency: str, selected: Optional[str]) -> str:
+        if selected is not None:
+            return selected
+        if (
+            self.max_frequency is not None
+            and frequency in frequencies
+            and frequencies.index(frequency) < frequencies.index(self.max_frequency)
+        ):
+            return self.max_frequency
+        return frequency
+
+    def _prune_output(self, fields, selection, n_keys, summary, seen):
+        """Prune an Output:Variable (with a key) or Output:Meter object."""
+        object_type = fields[0]
+        *keys, frequency = (fields[1 : n_keys + 2] + ["hourly"])[: n_keys + 1]
+        frequency = frequency.lower() or "hourly"
+        frequency = _frequency_aliases.get(frequency, frequency)
+        name = keys[-1]
+        if selection is not None and name.lower() not in selection:
+            summary.removed_outputs.append(name)
+            return _drop
+        selected = None if selection is None else selection[name.lower()]
+        target = self._frequency(frequency, selected)
+        identity = (object_type.lower(), *(key.lower() for key in keys), target)
+        if identity in seen:  # the same output once coarsened
+            return _drop
+        seen.add(identity)
+        if target == frequency:
+            return None
+        summary.coarsened[object_type] = summary.coarsened.get(object_type, 0) + 1
+        return [object_type, *keys, target.capitalize(), *fields[n_keys + 2 :]]
+
+    def _prune_object(self, fields, summary, seen):
+        """Return None to keep an object, `_drop` to remove it, or its new
+        fields."""
+        object_type = fields[0].lower()
+        if object_type in self.drop:
+            return _drop
+        if object_type == "output:variable":
+            return self._prune_output(fields, self.variables, 2, summary, seen)
+        if object_type.startswith("output:meter"):
+            return self._prune_output(fields, self.meters, 1, summary, seen)
+        if object_type == "output:table:summaryreports" and self.reports is not None:
+            if not self.reports:
+                return _drop
+            return [fields[0], *self.reports]
+        if object_type == "output:diagnostics" and not self.diagnostics:
+            keys = [
+                key for key in fields[1:] if key.lower() not in _verbose_diagnostics
+            ]
+            disabled = [key for key in fields[1:] if key and key not in keys]
+            if not disabled:
+                return None
+            summary.diagnostics.extend(disabled)
+            if not any(keys):
+                return _drop
+            return [fields[0], *keys]
+        return None
+
+    def prune(self, idf_str: str) -> Tuple[str, PruningSummary]:
+        """Prune the outputs of a model.
+
+        Arguments:
+            idf_str {str} -- the idf content
+
+        Returns:
+            Tuple[str, PruningSummary] -- the pruned idf content, and what was
+                removed
+        """
+        summary = PruningSummary()
+        seen = set()
+        pieces = []
+        position = 0
+        for start, end in _idf_object_spans(idf_str):
+            text = re_idf_comment.sub("", idf_str[start : end - 1])
+            fields = [field.strip() for field in text.split(",")]
+            if not fields[0]:
+                continue
+            pruned = self._prune_object(fields, summary, seen)
+            if pruned is None:
+                continue
+            object_start = _blank_pattern.match(idf_str, start).end()
+            # the whole lines of the object, with its trailing comment
+            line_start = idf_str.rfind("\n", 0, object_start) + 1
+            line_end = idf_str.find("\n", end)
+            line_end = len(idf_str) if line_end == -1 else line_end
+            rest = idf_str[end:line_end].strip()
+            whole_lines = not idf_str[line_start:object_start].strip() and (
+                not rest or rest.startswith("!")
+            )
+            if pruned is not _drop:
+                pieces.append(idf_str[position:object_start])
+                pieces.append(",".join(pruned) + ";")
+                # keep what follows the object, as its trailing comment
+                position = end
+                continue
+            summary.removed[fields[0]] = summary.removed.get(fields[0], 0) + 1
+            if not whole_lines:
+                pieces.append(idf_str[position:object_start])
+                position = end
+                continue
+            drop_end = line_end + 1
+            previous_line = idf_str.rfind("\n", 0, max(line_start - 1, 0)) + 1
+            if not idf_str[previous_line:line_start].strip():
+                # do not leave several blank lines
+                drop_end = _blank_lines_pattern.match(idf_str, drop_end).end()
+            pieces.append(idf_str[position : max(line_start, position)])
+            position = drop_end
+        pieces.append(idf_str[position:])
+        pruned_idf = "".join(pieces)
+        summary.output_size = (
+            estimate_output_size(idf_str),
+            estimate_output_size(pruned_idf),
+        )
+        return pruned_idf, summary
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import attr
+import plumbum
+from appdirs import user_cache_dir, user_data_dir
+from eppy.modeleditor import IDF as eppy_IDF
+from loguru import logger
+from pandas import DataFrame, Series
+from path import Path, TempDir
+
+from .backup import BackupArchive
+from .env_manager import ensure_eplus_root
+from .instrumentation import BatchStats
+from .journal import RunJournal
+from .outputs import OutputSelection
+from .parametric import ParametricSample
+from .probe import scan_version
+from .runner import EPlusRunner, IDFInput, Transport, idf_version_pattern, run_batch
+from .scheduling import LongestFirstScheduler
+from .simulation import Simulation
+from .utils import idf_content
+
+transition_pattern = re.compile(
+    r"^Transition-V(\d+)-(\d+)-\d+-to-V(\d+)-(\d+)-\d+(?:\.exe)?$"
+)
+
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in version.split("."))
+
+
+def idf_version(idf: IDFInput) -> Optional[str]:
+    """Sniff the EnergyPlus version of an idf input, without parsing the model.
+
+    Arguments:
+        idf {IDFInput} -- idf file as filename, eppy IDF object or
+            ParametricSample.
+
+    Returns:
+        str -- the version as "{major}.{minor}" (e.g. "8.7"), or None if not found.
+    """
+    if isinstance(idf, eppy_IDF):
+        versions = idf.idfobjects["VERSION"]
+        if not versions:
+            return None
+        return ".".join(str(versions[0].Version_Identifier).split(".")[:2])
+    if isinstance(idf, ParametricSample):
+        idf = idf.base
+    return scan_version(idf, [idf_version_pattern], object_name="Version")
+
+
+def find_transitions(eplus_root: Path) -> Dict[str, Tuple[str, Path]]:
+    """Find the IDFVersionUpdater transition programs of an EnergyPlus install.
+
+    Arguments:
+        eplus_root {Path} -- the EnergyPlus root
+
+    Returns:
+        Dict[str, Tuple[str, Path]] -- the (next version, transition program), by
+            version converted from.
+    """
+    updater_dir = Path(eplus_root) / "PreProcess" / "IDFVersionUpdater"
+    if not updater_dir.isdir():
+        return {}
+    transitions = {}
+    for program in updater_dir.files("Transition-V*"):
+        match = transition_pattern.match(program.name)
+        if match:
+            from_major, from_minor, to_major, to_minor = match.groups()
+            transitions[f"{from_major}.{from_minor}"] = (
+                f"{to_major}.{to_minor}",
+                program,
+            )
+    return transitions
+
+
+@attr.s
+class RunnerRegistry:
+    """EnergyPlus runners of several versions, each idf being ran by the runner
+    of its own version.
+
+    The version of each sample is sniffed from its header or `Version` object
+    (see `idf_version`), so that a corpus that mixes versions is ran in a single
+    parallel batch. With `convert`, an idf of a version that is not installed is
+    upgraded to the closest newer installed version with the IDFVersionUpdater
+    transitions of that install, and the converted model is kept in
+    `converted_dir` for the next runs.
+
+    Attributes:
+        runners (Dict[str, EPlusRunner]): the runners, by EnergyPlus version (as
+            "8.7").
+        convert (bool): upgrade the models of the versions that are not
+            installed. (default: {False})
+        converted_dir (Path): where the converted models are kept.
+    """
+
+    runners = attr.ib(type=Dict[str, EPlusRunner], converter=dict)
+    convert = attr.ib(type=bool, default=False)
+    converted_dir = attr.ib(
+        type=Path,
+        factory=lambda: Path(user_cache_dir(appname="energy_plus_wrapper"))
+        / "converted",
+        converter=lambda folder: Path(folder).abspath(),
+    )
+
+    @classmethod
+    def from_roots(
+        cls,
+        roots: Sequence[Path],
+        convert: bool = False,
+        converted_dir: Optional[Path] = None,
+        **runner_kwargs,
+    ) -> "RunnerRegistry":
+        """Build a registry from EnergyPlus roots, each one registered under the
+        version of its executable.
+
+        Arguments:
+            roots {Sequence[Path]} -- the EnergyPlus roots
+
+        Keyword Arguments:
+            convert, converted_dir -- see `RunnerRegistry`.
+            **runner_kwargs -- the other `EPlusRunner` arguments, shared by the
+                runners.
+
+        Returns:
+            RunnerRegistry -- the registry
+        """
+        runners = [EPlusRunner(root, **runner_kwargs) for root in roots]
+        registry = cls(
+            {runner.eplus_version: runner for runner in runners}, convert=convert
+        )
+        if converted_dir is not None:
+            registry.converted_dir = Path(converted_dir).abspath()
+        return registry
+
+    @classmethod
+    def from_urls(
+        cls,
+        urls: Sequence[str],
+        eplus_folder: Path = user_data_dir(appname="energy_plus_wrapper"),
+        installer_cache: Optional[Path] = None,
+        mirror: Optional[Path] = None,
+        offline: bool = False,
+        **kwargs,
+    ) -> "RunnerRegistry":
+        """Build a registry from EnergyPlus installers, installed if needed (see
+        `ensure_eplus_root`).
+
+        Arguments:
+            urls {Sequence[str]} -- the EnergyPlus installer URLs
+
+        Keyword Arguments:
+            eplus_folder, installer_cache, mirror, offline -- see
+                `ensure_eplus_root`.
+            **kwargs -- the `from_roots` arguments.
+
+        Returns:
+            RunnerRegistry -- the registry
+        """
+        roots = [
+            ensure_eplus_root(
+                url,
+                eplus_folder,
+                installer_cache=installer_cache,
+                mirror=mirror,
+                offline=offline,
+            )
+            for url in urls
+        ]
+        return cls.from_roots(roots, **kwargs)
+
+    @property
+    def versions(self) -> List[str]:
+        """The registered versions, from the oldest to the newest."""
+        return sorted(self.runners, key=_version_key)
+
+    def route(self, idf: IDFInput) -> Tuple[EPlusRunner, IDFInput]:
+        """Find the runner of an idf, converting it first if needed.
+
+        Arguments:
+            idf {IDFInput} -- idf file as filename, eppy IDF object or
+                ParametricSample.
+
+        Returns:
+            Tuple[EPlusRunner, IDFInput] -- the runner, and the idf it has to run
+                (the converted model if the idf has been upgraded)
+        """
+        version = idf_version(idf)
+        if version in self.runners:
+            return self.runners[version], idf
+        if version is None:
+            raise ValueError(f"Unable to find the EnergyPlus version of {idf}.")
+        newer = [
+            target
+            for target in self.versions
+            if _version_key(target) > _version_key(version)
+        ]
+        if not self.convert or not newer:
+            raise ValueError(
+                f"No EnergyPlus {version} runner in the registry"
+                f" ({', '.join(self.versions)})"
+                + (", and no newer version to convert to." if self.convert else ".")
+            )
+        return self.runners[newer[0]], self.upgrade(idf, version, newer[0])
+
+    def upgrade(self, idf: IDFInput, version: str, target: str) -> Path:
+        """Upgrade a model with the transition programs of the target version
+        install. The converted model is cached by content.
+
+        Arguments:
+            idf {IDFInput} -- idf file as filename, eppy IDF object or
+                ParametricSample.
+            version {str} -- the idf version
+            target {str} -- the version to convert to
+
+        Returns:
+            Path -- the converted idf file
+        """
+        idf_str = idf_content(idf)
+        digest = hashlib.sha256(idf_str.encode("utf8")).hexdigest()
+        converted = self.converted_dir / f"{digest[:32]}-V{target}.idf"
+        if converted.exists():
+            return converted
+        transitions = find_transitions(self.runners[target].energy_plus_root)
+        start = time.perf_counter()
+        with TempDir(prefix="energyplus_transition_") as td:
+            idf_file = td / "in.idf"
+            idf_file.write_text(idf_str)
+            current = version
+            while _version_key(current) < _version_key(target):
+                if current not in transitions:
+                    raise ValueError(
+                        f"No transition from EnergyPlus {current} in"
+                        f" {self.runners[target].energy_plus_root}."
+                    )
+                next_version, program = transitions[current]
+                # the transitions read the idd files that live next to them
+                with plumbum.local.cwd(program.parent):
+                    plumbum.local[program](idf_file)
+                # the converted model, if not written in place
+                if (td / "in.idfnew").exists():
+                    os.replace(td / "in.idfnew", idf_file)
+                if idf_version(idf_file) != next_version:
+                    errors = [error.read_text() for error in td.files("*.VCpErr")]
+                    raise ValueError(
+                        f"The transition from {current} to {next_version} failed."
+                        + "".join(f"\n{error}" for error in errors)
+                    )
+                current = next_version
+            self.converted_dir.makedirs_p()
+            tmp_file = self.converted_dir / f".{uuid.uuid4().hex}.tmp"
+            idf_file.copy(tmp_file)
+            os.replace(tmp_file, converted)
+        logger.info(
+            f"{idf} converted from {version} to {target}"
+            f" in {time.perf_counter() - start:.1f} s."
+        )
+        return converted
+
+    def run_one(self, idf: IDFInput, epw_file: Path, **kwargs) -> Simulation:
+        """Run an idf with the runner of its version.
+
+        Arguments:
+            idf {IDFInput} -- idf file as filename, eppy IDF object or
+                ParametricSample.
+            epw_file {Path} -- Weather file emplacement.
+
+        Keyword Arguments:
+            **kwargs -- the `EPlusRunner.run_one` arguments.
+
+        Returns:
+            Simulation -- the simulation object.
+        """
+        runner, idf = self.route(idf)
+        return runner.run_one(idf, epw_file, **kwargs)
+
+    def run_many(
+        self,
+        samples: Mapping[str, Tuple[IDFInput, Path]],
+        epw_file: Optional[Path] = None,
+        backup_strategy: str = "on_error",
+        backup_dir: Union[Path, BackupArchive] = "./backup",
+        custom_process: Optional[Callable[[Simulation], None]] = None,
+        version_mismatch_action: str = "raise",
+        output_selection: Optional[OutputSelection] = None,
+        reducer: Optional[Callable[[Simulation], Any]] = None,
+        transport: Optional[Transport] = None,
+        journal: Optional[RunJournal] = None,
+        scheduler: Optional[LongestFirstScheduler] = None,
+        stats: Optional[BatchStats] = None,
+    ) -> Union[Dict[str, Simulation], DataFrame, Series]:
+        """Run multiple EnergyPlus simulations of any registered version, in a
+        single parallel batch.
+
+        The samples are routed (and converted if needed) before the batch
+        starts. Each run uses the cache, staging and options of its runner (see
+        `run_batch`).
+
+        Arguments:
+            samples {mapping key: idf or (idf, weather_file)} -- A dict that contain a
+                `run_one` arguments.
+            epw_file {Path} -- Weather file emplacement. If None, it has to be in
+                the samples. Otherwise, a unique weather file is used for each run.
+
+        Keyword Arguments:
+            backup_strategy, backup_dir, custom_process, version_mismatch_action,
+            output_selection, reducer, transport, journal, scheduler, stats -- see
+                `EPlusRunner.run_many`.
+
+        Returns:
+            Dict[str, Simulation] -- the results put in a dictionnary with the same
+                keys as the samples. With a reducer, the consolidated reducer
+                outputs, indexed by sample key.
+        """
+        return run_batch(
+            samples,
+            self.route,
+            epw_file=epw_file,
+            backup_strategy=backup_strategy,
+            backup_dir=backup_dir,
+            custom_process=custom_process,
+            version_mismatch_action=version_mismatch_action,
+            output_selection=output_selection,
+            reducer=reducer,
+            transport=transport,
+            journal=journal,
+            scheduler=scheduler,
+            stats=stats,
+        )
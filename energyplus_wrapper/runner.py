@@ -1,8 +1,28 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import asyncio
+import copy
+import os
 import re
-from typing import Callable, Dict, Mapping, Optional, Tuple, Union, Sequence
+import time
+from concurrent.futures import Executor
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    Sequence,
+)
 from warnings import warn
 from tempfile import gettempdir
 
@@ -10,17 +30,73 @@ import attr
 import plumbum
 from coolname import generate_slug
 from eppy.modeleditor import IDF as eppy_IDF
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
+from joblib.parallel import get_active_backend
 from path import Path, TempDir
 from plumbum import ProcessExecutionError
 from loguru import logger
+from pandas import DataFrame, Series
 
-from .simulation import Simulation
+from .backup import BackupArchive
+from .cache import ResultCache, hash_inputs, hash_run
+from .instrumentation import BatchStats, emit, run_statistics, timed
+from .journal import RunJournal
+from .limits import RunLimits
+from .outputs import OutputSelection
+from .parametric import ParametricSample
+from .probe import ProbeCache, scan_version
+from .pruning import OutputPruning, PruningSummary
+from .scheduling import LongestFirstScheduler, RuntimeHistory, model_features
+from .simulation import Simulation, output_backends
+from .sql import ensure_sqlite_output
+from .staging import StagingArea, stage_file, staging_strategies
+from .store import ResultStore
+from .transport import MemmapTransport
+from .utils import consolidate, idf_content
+from .workdir import RamWorkDir
 
 eplus_version_pattern = re.compile(r"EnergyPlus, Version (\d\.\d)")
 idf_version_pattern = re.compile(r"EnergyPlus Version (\d\.\d)")
 idd_version_pattern = re.compile(r"IDD_Version (\d\.\d)")
 
+IDFInput = Union[Path, eppy_IDF, ParametricSample, str]
+Transport = Union[MemmapTransport, ResultStore]
+_idf_types = (Path, str, eppy_IDF, ParametricSample)
+
+
+def _check_backup_strategy(backup_strategy):
+    if backup_strategy not in ["on_error", "always", None]:
+        raise ValueError(
+            "`backup_strategy` argument should be either 'on_error', 'always'"
+            " or None."
+        )
+
+
+def _backup_destination(backup_dir):
+    if isinstance(backup_dir, BackupArchive):
+        return backup_dir
+    return Path(backup_dir)
+
+
+def _with_output_selection(custom_process, output_selection):
+    if output_selection is None:
+        return custom_process
+    if custom_process is not None:
+        raise ValueError(
+            "`custom_process` and `output_selection` arguments cannot be used together."
+        )
+    return output_selection
+
+
+def _parallel(return_as: str, **kwargs) -> Parallel:
+    """joblib Parallel that yields the results as they come, if the active
+    backend can (the multiprocessing one cannot: the results are then returned
+    at the end, as a list)."""
+    backend, _ = get_active_backend()
+    if not getattr(backend, "supports_return_generator", False):
+        return_as = "list"
+    return Parallel(return_as=return_as, **kwargs)
+
 
 @attr.s
 class EPlusRunner:
@@ -31,27 +107,80 @@ class EPlusRunner:
             and the IDD file.
         temp_dir (Path, optional): where live the temporary files generated
             by EnergyPlus.
+        cache (ResultCache, optional): if provided, the results of the finished
+            simulations are cached, and a simulation with the same inputs as a
+            previous one is not ran again.
+        probe_cache (ProbeCache, optional): where the EnergyPlus binary and idd
+            versions are saved, to avoid probing them for every run.
+        output_backend (str, optional): where the simulation results are read
+            from: either "csv" (the html report and the csv files produced by
+            ReadVarsESO), "sqlite" (the EnergyPlus SQLite output, that is added
+            to the idf if needed) or "eso" (the html report and the eso and mtr
+            files, read directly). ReadVarsESO is only ran with "csv".
+            (default: "csv")
+        staging (str, optional): how the input files are put in the working
+            directories: either "copy", "hardlink", "symlink" or "reflink" (with
+            a copy as fallback). With anything but "copy", the batches first
+            materialize each unique input once in a shared read-only staging
+            area. The single runs, that have no staging area, copy (or reflink)
+            the inputs, as the user files are never linked. (default: "copy")
+        history (RuntimeHistory, optional): if provided, the duration of each
+            simulation ran is recorded with its model features, to estimate the
+            duration of the next ones (see `LongestFirstScheduler`).
+        limits (RunLimits, optional): if provided, the wall-clock time, CPU time
+            and memory limits of each simulation, that is also killed early on
+            fatal error messages. Such simulations end as "timeout" or "killed".
+        on_start (Callable[[str], None], optional): called with the simulation
+            name when `run_one` starts.
+        on_end (Callable[[Simulation], None], optional): called with the
+            simulation when `run_one` ends, even if it failed. Its `timings` and
+            `peak_rss` are then filled. Called with the simulation name if the
+            run failed before the simulation was created (invalid inputs...).
+        ram_dir (RamWorkDir, optional): if provided, the working directories are
+            created on a RAM-backed file system when there is enough room for the
+            run outputs (in `temp_dir` otherwise), and only the requested
+            artifacts are saved on disk.
+        output_pruning (OutputPruning, optional): if provided, the outputs that
+            are not used (variables, meters, reports, diagnostics) are removed
+            from the idf of each run before EnergyPlus is ran. What was removed
+            is in the `pruning_summary` of the simulations.
+
+    The start and end of each simulation are also logged as structured loguru
+    records (see `instrumentation.emit`). With a parallel backend, the hooks are
+    called in the workers.
     """
 
     energy_plus_root = attr.ib(type=str, converter=lambda file: Path(file).abspath())
     temp_dir = attr.ib(type=str, factory=gettempdir)
+    cache = attr.ib(type=ResultCache, default=None)
+    probe_cache = attr.ib(type=ProbeCache, factory=ProbeCache)
+    output_backend = attr.ib(
+        type=str, default="csv", validator=attr.validators.in_(output_backends)
+    )
+    staging = attr.ib(
+        type=str, default="copy", validator=attr.validators.in_(staging_strategies)
+    )
+    history = attr.ib(type=RuntimeHistory, default=None)
+    limits = attr.ib(type=RunLimits, default=None)
+    on_start = attr.ib(type=Callable[[str], None], default=None, repr=False)
+    on_end = attr.ib(type=Callable[[Simulation], None], default=None, repr=False)
+    ram_dir = attr.ib(type=RamWorkDir, default=None)
+    output_pruning = attr.ib(type=OutputPruning, default=None)
 
     def get_idf_version(self, idf_file: Path) -> str:
         """extract the eplus version affiliated with the idf file.
 
+        The file is scanned until the version is found, either in the header
+        comments or in the `Version` object.
+
         Arguments:
             idf_file {Path} -- idf file emplacement
 
         Returns:
             str -- the version as "{major}.{minor}" (e.g. "8.7")
         """
-        with open(idf_file) as f:
-            idf_str = f.read()
-            try:
-                version = idf_version_pattern.findall(idf_str)[0]
-            except IndexError:
-                version = False
-        return version
+        version = scan_version(idf_file, [idf_version_pattern], object_name="Version")
+        return version if version is not None else False
 
     @property
     def idd_version(self) -> str:
@@ -60,23 +189,30 @@ class EPlusRunner:
         Returns:
             str -- the version as "{major}.{minor}" (e.g. "8.7")
         """
-        with open(self.idd_file) as f:
-            idd_str = f.read()
-            try:
-                version = idd_version_pattern.findall(idd_str)[0]
-            except IndexError:
-                version = False
-        return version
+        version = self.probe_cache.get(
+            "idd_version",
+            self.idd_file,
+            lambda idd_file: scan_version(idd_file, [idd_version_pattern]),
+        )
+        return version if version is not None else False
 
     @property
     def eplus_version(self) -> str:
         """Get the eplus version for the executable itself.
 
+        The executable is only probed once, the result is then read from the
+        runner `probe_cache`.
+
         Returns:
             str -- the version as "{major}.{minor}" (e.g. "8.7")
         """
-        version = eplus_version_pattern.findall(plumbum.local[self.eplus_bin]("-v"))[0]
-        return version
+        return self.probe_cache.get(
+            "eplus_version",
+            self.eplus_bin,
+            lambda eplus_bin: eplus_version_pattern.findall(
+                plumbum.local[eplus_bin]("-v")
+            )[0],
+        )
 
     @property
     def idd_file(self) -> Path:
@@ -133,16 +269,186 @@ class EPlusRunner:
             return False
         return True
 
+    def cache_key(
+        self,
+        idf: IDFInput,
+        epw_file: Path,
+        extra_files: Optional[Sequence[str]] = None,
+        custom_process: Optional[Callable[[Simulation], None]] = None,
+    ) -> Optional[str]:
+        """Compute the key that identify a simulation in the result cache.
+
+        Arguments:
+            idf {IDFInput} -- idf file as filename, eppy IDF object or
+                ParametricSample.
+            epw_file {Path} -- Weather file emplacement.
+
+        Keyword Arguments:
+            extra_files {Sequence[str], optional} -- extra files copied in the
+                working directory.
+            custom_process {Callable[[Simulation], None], optional} -- the
+                simulation post - process.
+
+        Returns:
+            str -- the simulation key, or None if the custom process cannot be
+                reliably identified (its results are then not cached).
+        """
+        return self._cache_key(
+            idf_content(idf), epw_file, extra_files, custom_process
+        )
+
+    def _cache_key(self, idf_str, epw_file, extra_files, custom_process):
+        options = {"output_backend": self.output_backend}
+        if self.output_pruning is not None:
+            options["output_pruning"] = repr(self.output_pruning)
+        return hash_inputs(
+            idf_str,
+            epw_file,
+            self.idd_file,
+            self.eplus_version,
+            extra_files=extra_files,
+            post_process=custom_process,
+            options=options,
+        )
+
+    def _stage(
+        self, src: Path, dst_dir: Path, staging_area: Optional[StagingArea]
+    ) -> Path:
+        if staging_area is not None:
+            return staging_area.stage(src, dst_dir)
+        # the user files are never linked: a run writing to its inputs would
+        # change them
+        strategy = "reflink" if self.staging == "reflink" else "copy"
+        return stage_file(src, dst_dir, strategy=strategy)
+
+    def _resolve_inputs(self, idf, epw_file, version_mismatch_action):
+        """Turn the run inputs into (idf string or None, idf file or None,
+        absolute weather file), checking the idf version if needed."""
+        if isinstance(idf, eppy_IDF):
+            return idf.idfstr(), None, Path(epw_file).abspath()
+        if isinstance(idf, ParametricSample):
+            if version_mismatch_action in ["raise", "warn"]:
+                self.check_version_compat(
+                    idf.base, version_mismatch_action=version_mismatch_action
+                )
+            return idf.render(), None, Path(epw_file).abspath()
+        idf_file = Path(idf).abspath()
+        if version_mismatch_action in ["raise", "warn"]:
+            self.check_version_compat(
+                idf_file, version_mismatch_action=version_mismatch_action
+            )
+        return idf, idf_file, Path(epw_file).abspath()
+
+    def _prepare_inputs(self, idf, epw_file, version_mismatch_action):
+        """Resolve the run inputs (see `_resolve_inputs`), with the model features
+        recorded in the runner history (None without history)."""
+        idf, idf_file, epw_file = self._resolve_inputs(
+            idf, epw_file, version_mismatch_action
+        )
+        features = None
+        if self.history is not None:
+            features = model_features(
+                idf if idf_file is None else idf_content(idf_file)
+            )
+        return idf, idf_file, epw_file, features
+
+    def _load_cached(
+        self, simulation_name, idf, idf_file, epw_file, extra_files, custom_process
+    ) -> Tuple[Optional[str], Optional[Simulation]]:
+        """Return the cache key of a run (None without cache, or if the custom
+        process cannot be identified), and the cached simulation if any."""
+        if self.cache is None:
+            return None, None
+        if idf_file is not None:
+            with open(idf_file) as f:
+                idf_str = f.read()
+        else:
+            idf_str = idf
+        cache_key = self._cache_key(idf_str, epw_file, extra_files, custom_process)
+        if cache_key is None:
+            logger.debug(
+                f"{simulation_name}: the custom process cannot be identified,"
+                " its results are not cached."
+            )
+            return None, None
+        sim = Simulation(
+            simulation_name,
+            self.eplus_bin,
+            idf_file if idf_file is not None else "eppy_idf.idf",
+            epw_file,
+            self.idd_file,
+            working_dir=self.cache.cache_dir,
+            post_process=custom_process,
+            output_backend=self.output_backend,
+        )
+        if self.cache.load(cache_key, sim):
+            logger.debug(f"{simulation_name}: results loaded from the cache.")
+            return cache_key, sim
+        return cache_key, None
+
+    @contextmanager
+    def _working_dir(self, idf, idf_file):
+        """Create the working directory of a run. It is left as is if the run
+        fails (moved from RAM to `temp_dir` with a `ram_dir`)."""
+        if self.ram_dir is None:
+            yield Path(TempDir(prefix="energyplus_run_", dir=self.temp_dir))
+            return
+        td = self.ram_dir.create(
+            idf if idf_file is None else idf_content(idf_file), self.temp_dir
+        )
+        try:
+            yield td
+        except BaseException:
+            self.ram_dir.release(td, keep_dir=self.temp_dir)
+            raise
+        self.ram_dir.release(td)
+
+    def _setup_working_dir(
+        self, td, idf, idf_file, epw_file, extra_files, staging_area
+    ) -> Tuple[Path, Optional[PruningSummary]]:
+        """Stage the inputs in the working directory, and return the idf file
+        EnergyPlus has to run, with what was pruned from it."""
+        if extra_files is not None:
+            for extra_file in extra_files:
+                self._stage(extra_file, td, staging_area)
+        pruning_summary = None
+        if self.output_backend == "sqlite" or self.output_pruning is not None:
+            if idf_file is not None:
+                with open(idf_file) as f:
+                    idf = f.read()
+                idf_file = td / idf_file.basename()
+            else:
+                idf_file = td / "eppy_idf.idf"
+            if self.output_pruning is not None:
+                idf, pruning_summary = self.output_pruning.prune(idf)
+                logger.debug(f"{idf_file.basename()} pruned: {pruning_summary}")
+            if self.output_backend == "sqlite":
+                idf = ensure_sqlite_output(idf)
+            with open(idf_file, "w") as idf_descriptor:
+                idf_descriptor.write(idf)
+        elif idf_file is None:
+            idf_file = td / "eppy_idf.idf"
+            with open(idf_file, "w") as idf_descriptor:
+                idf_descriptor.write(idf)
+        logger.debug((idf_file, epw_file, td))
+        if idf_file not in td.files():
+            self._stage(idf_file, td, staging_area)
+        self._stage(epw_file, td, staging_area)
+        return idf_file, pruning_summary
+
     def run_one(
         self,
-        idf: Union[Path, eppy_IDF, str],
+        idf: IDFInput,
         epw_file: Path,
         backup_strategy: str = "on_error",
-        backup_dir: Path = "./backup",
+        backup_dir: Union[Path, BackupArchive] = "./backup",
         simulation_name: Optional[str] = None,
         custom_process: Optional[Callable[[Simulation], None]] = None,
         version_mismatch_action: str = "raise",
         extra_files: Optional[Sequence[str]] = None,
+        output_selection: Optional[OutputSelection] = None,
+        staging_area: Optional[StagingArea] = None,
+        transport: Optional[Transport] = None,
     ) -> Simulation:
         """Run an EnergyPlus simulation with the provided idf and weather file.
 
@@ -152,14 +458,16 @@ class EPlusRunner:
         This function is process safe (as opposite as the one available in `eppy`).
 
         Arguments:
-            idf {Union[Path, eppy_IDF, str]} -- idf file as filename or eppy IDF object.
+            idf {IDFInput} -- idf file as filename, eppy IDF object or
+                ParametricSample.
             epw_file {Path} -- Weather file emplacement.
 
         Keyword Arguments:
             backup_strategy {str} -- when to save the files generated by e+
                 (either"always", "on_error" or None) (default: {"on_error"})
-            backup_dir {Path} -- where to save the files generated by e+
-                (default: {"./backup"})
+            backup_dir {Path or BackupArchive} -- where to save the files
+                generated by e+: a folder, or compressed archives (see
+                `BackupArchive`) (default: {"./backup"})
             simulation_name {str, optional} -- The simulation name. A random will be
                 generated if not provided.
             custom_process {Callable[[Simulation], None], optional} -- overwrite the
@@ -167,41 +475,64 @@ class EPlusRunner:
                 are treated after the simulation, but before cleaning the folder.
             version_mismatch_action {str} -- should be either ["raise", "warn",
                 "ignore"] (default: {"raise"})
+            extra_files {Sequence[str], optional} -- files copied in the working
+                directory before the run (schedules, FMUs...).
+            output_selection {OutputSelection, optional} -- parse only some of the
+                reports and time series, possibly on first access. Cannot be used
+                with a `custom_process`.
+            staging_area {StagingArea, optional} -- if provided, the input files
+                are staged from that shared area instead of the runner `staging`
+                strategy.
+            transport {MemmapTransport or ResultStore, optional} -- if provided,
+                the outputs are saved by the transport (in memory-mapped files, or
+                in a columnar result store), and only read back on first access.
 
         Returns:
-            Simulation -- the simulation object
+            Simulation -- the simulation object. If the runner has a result cache
+                and the same inputs have already been simulated, the cached results
+                are returned without running EnergyPlus. The duration of each phase
+                of the run is in its `timings`.
         """
         if simulation_name is None:
             simulation_name = generate_slug()
+        custom_process = _with_output_selection(custom_process, output_selection)
 
-        if backup_strategy not in ["on_error", "always", None]:
-            raise ValueError(
-                "`backup_strategy` argument should be either 'on_error', 'always'"
-                " or None."
-            )
-        backup_dir = Path(backup_dir)
-
-        with TempDir(prefix="energyplus_run_", dir=self.temp_dir) as td:
-            if extra_files is not None:
-                for extra_file in extra_files:
-                    Path(extra_file).copy(td)
-            if isinstance(idf, eppy_IDF):
-                idf = idf.idfstr()
-                idf_file = td / "eppy_idf.idf"
-                with open(idf_file, "w") as idf_descriptor:
-                    idf_descriptor.write(idf)
-            else:
-                idf_file = idf
-                if version_mismatch_action in ["raise", "warn"]:
-                    self.check_version_compat(
-                        idf_file, version_mismatch_action=version_mismatch_action
+        _check_backup_strategy(backup_strategy)
+        backup_dir = _backup_destination(backup_dir)
+
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        emit("start", simulation_name, self.on_start)
+        sim = None
+        try:
+            with timed(timings, "inputs"):
+                idf, idf_file, epw_file, features = self._prepare_inputs(
+                    idf, epw_file, version_mismatch_action
+                )
+            with timed(timings, "cache"):
+                cache_key, sim = self._load_cached(
+                    simulation_name,
+                    idf,
+                    idf_file,
+                    epw_file,
+                    extra_files,
+                    custom_process,
+                )
+            if sim is not None:
+                # the cached timings are the ones of the original run
+                sim.timings, sim.peak_rss = timings, None
+                if transport is not None:
+                    with timed(timings, "export"):
+                        transport.export(sim)
+                return sim
+
+            start = time.perf_counter()
+            # as with TempDir, the working directory is kept if the run fails
+            with self._working_dir(idf, idf_file) as td:
+                with timed(timings, "setup"):
+                    idf_file, pruning_summary = self._setup_working_dir(
+                        td, idf, idf_file, epw_file, extra_files, staging_area
                     )
-            idf_file, epw_file = (Path(f).abspath() for f in (idf_file, epw_file))
-            with td:
-                logger.debug((idf_file, epw_file, td))
-                if idf_file not in td.files():
-                    idf_file.copy(td)
-                epw_file.copy(td)
                 sim = Simulation(
                     simulation_name,
                     self.eplus_bin,
@@ -210,28 +541,70 @@ class EPlusRunner:
                     self.idd_file,
                     working_dir=td,
                     post_process=custom_process,
+                    output_backend=self.output_backend,
+                    limits=self.limits,
                 )
+                sim.timings = timings
+                sim.pruning_summary = pruning_summary
                 try:
                     sim.run()
                 except (ProcessExecutionError, KeyboardInterrupt):
                     if backup_strategy == "on_error":
-                        sim.backup(backup_dir)
+                        with timed(timings, "backup"):
+                            sim.backup(backup_dir)
                     raise
                 finally:
                     if backup_strategy == "always":
-                        sim.backup(backup_dir)
+                        with timed(timings, "backup"):
+                            sim.backup(backup_dir)
+                if cache_key is not None:
+                    with timed(timings, "cache_store"):
+                        self.cache.store(cache_key, sim)
+                if transport is not None:
+                    with timed(timings, "export"):
+                        transport.export(sim)
+                if self.ram_dir is not None:
+                    with timed(timings, "artifacts"):
+                        self.ram_dir.save_artifacts(sim)
+                with timed(timings, "cleanup"):
+                    td.rmtree()
+
+            if self.history is not None:
+                self.history.record(features, time.perf_counter() - start)
+            return sim
+        finally:
+            timings["total"] = time.perf_counter() - started
+            emit("end", simulation_name, self.on_end, simulation=sim)
 
-        return sim
+    @contextmanager
+    def _batch_staging_area(self):
+        """Staging area shared by the runs of a batch, removed at the end of it."""
+        if self.staging == "copy":
+            yield None
+            return
+        staging_area = StagingArea(
+            TempDir(prefix="energyplus_staging_", dir=self.temp_dir), self.staging
+        )
+        try:
+            yield staging_area
+        finally:
+            staging_area.root.rmtree_p()
 
     def run_many(
         self,
-        samples: Mapping[str, Tuple[Union[Path, eppy_IDF, str], Path]],
+        samples: Mapping[str, Tuple[IDFInput, Path]],
         epw_file: Optional[Path] = None,
         backup_strategy: str = "on_error",
-        backup_dir: Path = "./backup",
+        backup_dir: Union[Path, BackupArchive] = "./backup",
         custom_process: Optional[Callable[[Simulation], None]] = None,
         version_mismatch_action: str = "raise",
-    ) -> Dict[str, Simulation]:
+        output_selection: Optional[OutputSelection] = None,
+        reducer: Optional[Callable[[Simulation], Any]] = None,
+        transport: Optional[Transport] = None,
+        journal: Optional[RunJournal] = None,
+        scheduler: Optional[LongestFirstScheduler] = None,
+        stats: Optional[BatchStats] = None,
+    ) -> Union[Dict[str, Simulation], DataFrame, Series]:
         """Run multiple EnergyPlus simulation.
 
         Arguments:
@@ -243,36 +616,554 @@ class EPlusRunner:
         Keyword Arguments:
             backup_strategy {str} -- when to save the files generated by e+
                 (either "always", "on_error" or None) (default: {"on_error"})
-            backup_dir {Path} -- where to save the files generated by e+
-                (default: {"./backup"})
+            backup_dir {Path or BackupArchive} -- where to save the files
+                generated by e+: a folder, or compressed archives (see
+                `BackupArchive`) (default: {"./backup"})
             custom_process {Callable[[Simulation], None], optional} -- overwrite the
                 simulation post - process. Used to customize how the EnergyPlus
                 files are treated after the simulation, but before the folder clean.
             version_mismatch_action {str} -- should be either ["raise", "warn",
                 "ignore"] (default: {"raise"})
+            output_selection {OutputSelection, optional} -- parse only some of the
+                reports and time series, possibly on first access. Cannot be used
+                with a `custom_process`.
+            reducer {Callable[[Simulation], Any], optional} -- if provided, applied
+                to each simulation in the worker, after the post-process. Only its
+                output is sent back, and the outputs are consolidated in a single
+                result (see `utils.consolidate`).
+            transport {MemmapTransport or ResultStore, optional} -- if provided,
+                the outputs are sent back through memory-mapped files, or written
+                to a columnar result store, instead of being pickled (see
+                `run_one`).
+            journal {RunJournal, optional} -- if provided, each sample is recorded
+                in that checkpoint journal as it completes (or fails). The samples
+                already finished with the same inputs are not ran again, and their
+                results are loaded from the journal.
+            scheduler {LongestFirstScheduler, optional} -- if provided, the samples
+                are dispatched by decreasing estimated duration, and the expected
+                and achieved makespans are reported in `scheduler.report`.
+            stats {BatchStats, optional} -- if provided, filled with the phase
+                timings and peak memory of each simulation ran, and the batch
+                duration and number of workers.
 
         Returns:
             Dict[str, Simulation] -- the results put in a dictionnary with the same
-                keys as the samples.
+                keys as the samples. If the runner has a result cache, samples with
+                identical inputs are only ran once and share their results. With a
+                reducer, the consolidated reducer outputs, indexed by sample key.
         """
-        if epw_file and any(
-            [not isinstance(value, (Path, str, eppy_IDF)) for value in samples.values()]
-        ):
-            raise ValueError(
-                "If epw_file is not None, samples should be a dict as {sim_name: idf}."
-            )
-        if epw_file:
-            samples = {key: (idf, epw_file) for key, idf in samples.items()}
-        sims = Parallel()(
-            delayed(self.run_one)(
+        return run_batch(
+            samples,
+            lambda idf: (self, idf),
+            epw_file=epw_file,
+            backup_strategy=backup_strategy,
+            backup_dir=backup_dir,
+            custom_process=custom_process,
+            version_mismatch_action=version_mismatch_action,
+            output_selection=output_selection,
+            reducer=reducer,
+            transport=transport,
+            journal=journal,
+            scheduler=scheduler,
+            stats=stats,
+        )
+
+    def _run_reduced(
+        self,
+        key,
+        *args,
+        reducer: Optional[Callable[[Simulation], Any]] = None,
+        **kwargs,
+    ) -> Tuple[Any, Dict]:
+        sim = self.run_one(*args, simulation_name=key, **kwargs)
+        if reducer is not None:
+            return reducer(sim), run_statistics(sim)
+        return sim, run_statistics(sim)
+
+    def _run_keyed(
+        self,
+        key,
+        *args,
+        journal: Optional[RunJournal] = None,
+        input_hash: Optional[str] = None,
+        **kwargs,
+    ) -> Tuple[Hashable, Any, Dict]:
+        """Run a sample, and return its key, result and run statistics (see
+        `instrumentation.run_statistics`)."""
+        if journal is None:
+            return (key, *self._run_reduced(key, *args, **kwargs))
+        run = {}
+
+        def run_reduced():
+            result, run["statistics"] = self._run_reduced(key, *args, **kwargs)
+            return result
+
+        return key, journal.run(key, input_hash, run_reduced), run["statistics"]
+
+    def iter_many(
+        self,
+        samples: Union[
+            Mapping[Hashable, Union[IDFInput, Tuple]],
+            Iterable[Tuple[Hashable, Union[IDFInput, Tuple]]],
+        ],
+        epw_file: Optional[Path] = None,
+        backup_strategy: str = "on_error",
+        backup_dir: Union[Path, BackupArchive] = "./backup",
+        custom_process: Optional[Callable[[Simulation], None]] = None,
+        version_mismatch_action: str = "raise",
+        output_selection: Optional[OutputSelection] = None,
+        max_in_flight: Optional[Union[int, str]] = None,
+        reducer: Optional[Callable[[Simulation], Any]] = None,
+        transport: Optional[Transport] = None,
+    ) -> Iterator[Tuple[Hashable, Any]]:
+        """Run multiple EnergyPlus simulation, and yield them as they complete.
+
+        Contrary to `run_many`, the samples can be a lazy iterable of
+        (key, sample) pairs, that is only consumed as the runs are dispatched, and
+        the results are not kept by the runner once yielded. The parallelism is
+        configured as for `run_many`, with the `joblib.parallel_backend` context
+        manager.
+
+        Arguments:
+            samples {mapping key: idf or (idf, weather_file), or iterable of
+                (key, sample)} -- the `run_one` arguments.
+            epw_file {Path} -- Weather file emplacement. If None, it has to be in
+                the samples. Otherwise, a unique weather file is used for each run.
+
+        Keyword Arguments:
+            backup_strategy {str} -- when to save the files generated by e+
+                (either "always", "on_error" or None) (default: {"on_error"})
+            backup_dir {Path or BackupArchive} -- where to save the files
+                generated by e+: a folder, or compressed archives (see
+                `BackupArchive`) (default: {"./backup"})
+            custom_process {Callable[[Simulation], None], optional} -- overwrite the
+                simulation post - process.
+            version_mismatch_action {str} -- should be either ["raise", "warn",
+                "ignore"] (default: {"raise"})
+            output_selection {OutputSelection, optional} -- parse only some of the
+                reports and time series, possibly on first access. Cannot be used
+                with a `custom_process`.
+            max_in_flight {Union[int, str], optional} -- the maximum number of
+                samples dispatched to the workers at once, as the joblib
+                `pre_dispatch` argument (default: {"2 * n_jobs"}).
+            reducer {Callable[[Simulation], Any], optional} -- if provided, applied
+                to each simulation in the worker, and only its output is yielded
+                instead of the simulation.
+            transport {MemmapTransport or ResultStore, optional} -- if provided,
+                the outputs are sent back through memory-mapped files, or written
+                to a columnar result store, instead of being pickled (see
+                `run_one`).
+
+        Yields:
+            Tuple[Hashable, Simulation] -- the (key, simulation) pairs, in
+                completion order (all at the end of the batch with the
+                multiprocessing backend, that cannot stream them). With a result
+                cache, samples with identical inputs are only skipped if an earlier
+                run has already completed.
+        """
+        custom_process = _with_output_selection(custom_process, output_selection)
+        if isinstance(samples, Mapping):
+            samples = samples.items()
+        parallel_kwargs = {}
+        if max_in_flight is not None:
+            parallel_kwargs["pre_dispatch"] = max_in_flight
+
+        def tasks(staging_area):
+            for key, sample in samples:
+                if epw_file:
+                    if not isinstance(sample, _idf_types):
+                        raise ValueError(
+                            "If epw_file is not None, samples should be as"
+                            " (sim_name, idf)."
+                        )
+                    idf, sample_epw_file = sample, epw_file
+                else:
+                    idf, sample_epw_file = sample
+                yield delayed(self._run_keyed)(
+                    key,
+                    idf,
+                    sample_epw_file,
+                    backup_strategy=backup_strategy,
+                    backup_dir=backup_dir,
+                    custom_process=custom_process,
+                    version_mismatch_action=version_mismatch_action,
+                    staging_area=staging_area,
+                    transport=transport,
+                    reducer=reducer,
+                )
+
+        with self._batch_staging_area() as staging_area:
+            parallel = _parallel("generator_unordered", **parallel_kwargs)
+            for key, result, _ in parallel(tasks(staging_area)):
+                yield key, result
+
+    async def run_one_async(
+        self,
+        idf: IDFInput,
+        epw_file: Path,
+        backup_strategy: str = "on_error",
+        backup_dir: Union[Path, BackupArchive] = "./backup",
+        simulation_name: Optional[str] = None,
+        custom_process: Optional[Callable[[Simulation], None]] = None,
+        version_mismatch_action: str = "raise",
+        extra_files: Optional[Sequence[str]] = None,
+        output_selection: Optional[OutputSelection] = None,
+        staging_area: Optional[StagingArea] = None,
+        executor: Optional[Executor] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Simulation:
+        """Run an EnergyPlus simulation without blocking the event loop.
+
+        Same as `run_one`, but EnergyPlus is ran as an asyncio subprocess, and the
+        other blocking steps (version check, cache access, working directory
+        setup, post-process, backup and cleanup) are ran in an executor. If the
+        task is cancelled, the EnergyPlus process tree is killed, and the
+        simulation is marked as "interrupted" (and backed up with the "on_error"
+        strategy).
+
+        Arguments:
+            idf {IDFInput} -- idf file as filename, eppy IDF object or
+                ParametricSample.
+            epw_file {Path} -- Weather file emplacement.
+
+        Keyword Arguments:
+            backup_strategy, backup_dir, simulation_name, custom_process,
+            version_mismatch_action, extra_files, output_selection, staging_area
+                -- see `run_one`.
+            executor {Executor, optional} -- a thread pool where the blocking steps
+                are ran (the event loop default executor if None).
+            semaphore {asyncio.Semaphore, optional} -- if provided, held while
+                EnergyPlus runs, to limit the number of concurrent processes.
+
+        Returns:
+            Simulation -- the simulation object.
+        """
+        if simulation_name is None:
+            simulation_name = generate_slug()
+        custom_process = _with_output_selection(custom_process, output_selection)
+        _check_backup_strategy(backup_strategy)
+        backup_dir = _backup_destination(backup_dir)
+        loop = asyncio.get_running_loop()
+
+        def in_executor(func, *args):
+            return loop.run_in_executor(executor, partial(func, *args))
+
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        emit("start", simulation_name, self.on_start)
+        sim = None
+        try:
+            with timed(timings, "inputs"):
+                idf, idf_file, epw_file, features = await in_executor(
+                    self._prepare_inputs, idf, epw_file, version_mismatch_action
+                )
+            with timed(timings, "cache"):
+                cache_key, sim = await in_executor(
+                    self._load_cached,
+                    simulation_name,
+                    idf,
+                    idf_file,
+                    epw_file,
+                    extra_files,
+                    custom_process,
+                )
+            if sim is not None:
+                # the cached timings are the ones of the original run
+                sim.timings, sim.peak_rss = timings, None
+                return sim
+
+            start = time.perf_counter()
+            # as in run_one, the working directory is kept if the run fails
+            with self._working_dir(idf, idf_file) as td:
+                with timed(timings, "setup"):
+                    idf_file, pruning_summary = await in_executor(
+                        self._setup_working_dir,
+                        td,
+                        idf,
+                        idf_file,
+                        epw_file,
+                        extra_files,
+                        staging_area,
+                    )
+                sim = Simulation(
+                    simulation_name,
+                    self.eplus_bin,
+                    idf_file,
+                    epw_file,
+                    self.idd_file,
+                    working_dir=td,
+                    post_process=custom_process,
+                    output_backend=self.output_backend,
+                    limits=self.limits,
+                )
+                sim.timings = timings
+                sim.pruning_summary = pruning_summary
+                try:
+                    await sim.run_async(executor=executor, semaphore=semaphore)
+                except (ProcessExecutionError, asyncio.CancelledError):
+                    if backup_strategy == "on_error":
+                        with timed(timings, "backup"):
+                            await in_executor(sim.backup, backup_dir)
+                    raise
+                finally:
+                    if backup_strategy == "always":
+                        with timed(timings, "backup"):
+                            await in_executor(sim.backup, backup_dir)
+                if cache_key is not None:
+                    with timed(timings, "cache_store"):
+                        await in_executor(self.cache.store, cache_key, sim)
+                if self.ram_dir is not None:
+                    with timed(timings, "artifacts"):
+                        await in_executor(self.ram_dir.save_artifacts, sim)
+                with timed(timings, "cleanup"):
+                    await in_executor(td.rmtree)
+
+            if self.history is not None:
+                await in_executor(
+                    self.history.record, features, time.perf_counter() - start
+                )
+            return sim
+        finally:
+            timings["total"] = time.perf_counter() - started
+            emit("end", simulation_name, self.on_end, simulation=sim)
+
+    async def run_many_async(
+        self,
+        samples: Union[
+            Mapping[Hashable, Union[IDFInput, Tuple]],
+            Iterable[Tuple[Hashable, Union[IDFInput, Tuple]]],
+        ],
+        epw_file: Optional[Path] = None,
+        backup_strategy: str = "on_error",
+        backup_dir: Union[Path, BackupArchive] = "./backup",
+        custom_process: Optional[Callable[[Simulation], None]] = None,
+        version_mismatch_action: str = "raise",
+        output_selection: Optional[OutputSelection] = None,
+        max_concurrency: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> AsyncIterator[Tuple[Hashable, Simulation]]:
+        """Run multiple EnergyPlus simulation, and yield them as they complete.
+
+        The asyncio counterpart of `iter_many`: at most `max_concurrency`
+        EnergyPlus processes run at once, and the samples are only consumed as
+        the runs are started. If the iteration is stopped early (or cancelled),
+        the running simulations are cancelled.
+
+        Arguments:
+            samples {mapping key: idf or (idf, weather_file), or iterable of
+                (key, sample)} -- the `run_one` arguments.
+            epw_file {Path} -- Weather file emplacement. If None, it has to be in
+                the samples. Otherwise, a unique weather file is used for each run.
+
+        Keyword Arguments:
+            backup_strategy, backup_dir, custom_process, version_mismatch_action,
+            output_selection -- see `run_many`.
+            max_concurrency {int, optional} -- the maximum number of EnergyPlus
+                processes ran at once (default: {the number of CPU}).
+            executor {Executor, optional} -- a thread pool where the blocking steps
+                are ran (the event loop default executor if None).
+
+        Yields:
+            Tuple[Hashable, Simulation] -- the (key, simulation) pairs, in
+                completion order.
+        """
+        max_concurrency = max_concurrency or os.cpu_count() or 1
+        semaphore = asyncio.Semaphore(max_concurrency)
+        if isinstance(samples, Mapping):
+            samples = samples.items()
+        samples = iter(samples)
+
+        async def run(key, sample, staging_area):
+            if epw_file:
+                idf, sample_epw_file = sample, epw_file
+            else:
+                idf, sample_epw_file = sample
+            sim = await self.run_one_async(
                 idf,
-                epw_file,
+                sample_epw_file,
                 backup_strategy=backup_strategy,
                 backup_dir=backup_dir,
                 simulation_name=key,
                 custom_process=custom_process,
                 version_mismatch_action=version_mismatch_action,
+                output_selection=output_selection,
+                staging_area=staging_area,
+                executor=executor,
+                semaphore=semaphore,
             )
-            for key, (idf, epw_file) in samples.items()
+            return key, sim
+
+        with self._batch_staging_area() as staging_area:
+            pending = set()
+
+            def fill():
+                # twice the concurrency: the next runs are prepared while the
+                # finished ones are post-processed
+                while len(pending) < 2 * max_concurrency:
+                    try:
+                        key, sample = next(samples)
+                    except StopIteration:
+                        return
+                    pending.add(asyncio.ensure_future(run(key, sample, staging_area)))
+
+            try:
+                fill()
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    fill()
+                    for task in done:
+                        yield task.result()
+            finally:
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+
+def run_batch(
+    samples: Mapping[Hashable, Union[IDFInput, Tuple[IDFInput, Path]]],
+    route: Callable[[IDFInput], Tuple[EPlusRunner, IDFInput]],
+    epw_file: Optional[Path] = None,
+    backup_strategy: str = "on_error",
+    backup_dir: Union[Path, BackupArchive] = "./backup",
+    custom_process: Optional[Callable[[Simulation], None]] = None,
+    version_mismatch_action: str = "raise",
+    output_selection: Optional[OutputSelection] = None,
+    reducer: Optional[Callable[[Simulation], Any]] = None,
+    transport: Optional[Transport] = None,
+    journal: Optional[RunJournal] = None,
+    scheduler: Optional[LongestFirstScheduler] = None,
+    stats: Optional[BatchStats] = None,
+) -> Union[Dict[Hashable, Simulation], DataFrame, Series]:
+    """Run a batch of simulations in parallel, each sample with its own runner.
+
+    The batch behind `EPlusRunner.run_many` (where every sample is ran by the
+    same runner) and `RunnerRegistry.run_many` (where each sample is ran by the
+    runner of its EnergyPlus version).
+
+    Arguments:
+        samples {mapping key: idf or (idf, weather_file)} -- the samples.
+        route {Callable[[IDFInput], Tuple[EPlusRunner, IDFInput]]} -- give the
+            runner of an idf, and the idf it has to run. Called before the batch
+            starts.
+
+    Keyword Arguments:
+        epw_file, backup_strategy, backup_dir, custom_process,
+        version_mismatch_action, output_selection, reducer, transport, journal,
+        scheduler, stats -- see `EPlusRunner.run_many`. The identical samples are
+            only ran once if their runner has a result cache.
+
+    Returns:
+        Dict[Hashable, Simulation] -- the results, with the same keys as the
+            samples. With a reducer, the consolidated reducer outputs, indexed by
+            sample key.
+    """
+    if epw_file and any(
+        [not isinstance(value, _idf_types) for value in samples.values()]
+    ):
+        raise ValueError(
+            "If epw_file is not None, samples should be a dict as {sim_name: idf}."
+        )
+    if epw_file:
+        samples = {key: (idf, epw_file) for key, idf in samples.items()}
+    custom_process = _with_output_selection(custom_process, output_selection)
+    _check_backup_strategy(backup_strategy)
+
+    routed = {}
+    for key, (idf, sample_epw_file) in samples.items():
+        runner, idf = route(idf)
+        routed[key] = (runner, idf, sample_epw_file)
+    runners = {id(runner): runner for runner, _, _ in routed.values()}
+    if len(runners) > 1:
+        logger.info(
+            "samples by EnergyPlus version: "
+            + ", ".join(
+                f"{runner.eplus_version}:"
+                f" {sum(other is runner for other, _, _ in routed.values())}"
+                for runner in runners.values()
+            )
+        )
+
+    sample_keys = {}
+    has_cache = any(runner.cache is not None for runner in runners.values())
+    if has_cache or journal is not None:
+        sample_keys = {
+            key: runner.cache_key(idf, sample_epw_file, custom_process=custom_process)
+            for key, (runner, idf, sample_epw_file) in routed.items()
+        }
+    # the samples without key, or whose runner has no cache, are never shared
+    shared_keys = {
+        key: (sample_keys.get(key) if runner.cache is not None else None) or (key,)
+        for key, (runner, _, _) in routed.items()
+    }
+    unique_samples = {}
+    for key, shared_key in shared_keys.items():
+        unique_samples.setdefault(shared_key, key)
+    to_run = {key: routed[key] for key in unique_samples.values()}
+    completed = {}
+    if journal is not None:
+        # the recorded results also depend on the reducer and the transport
+        run_keys = {
+            key: hash_run(sample_key, reducer=reducer, transport=transport)
+            for key, sample_key in sample_keys.items()
+        }
+        completed = journal.completed(run_keys)
+        logger.info(f"{len(completed)} samples already finished in the journal.")
+        to_run = {
+            key: sample for key, sample in to_run.items() if key not in completed
+        }
+    if scheduler is not None:
+        order = scheduler.order(
+            {key: (idf, epw) for key, (_, idf, epw) in to_run.items()}
         )
-        return {key: sim for key, sim in zip(samples.keys(), sims)}
+        to_run = {key: to_run[key] for key in order}
+
+    n_workers = min(effective_n_jobs(None), max(len(to_run), 1))
+    start = time.perf_counter()
+    sims, runs = {}, {}
+    with ExitStack() as stack:
+        # a staging area per runner, shared by the runs of the batch
+        staging_areas = {
+            runner_id: stack.enter_context(runner._batch_staging_area())
+            for runner_id, runner in runners.items()
+        }
+        # the results are consumed as they come, and are not kept twice
+        for key, result, run in _parallel("generator")(
+            delayed(runner._run_keyed)(
+                key,
+                idf,
+                sample_epw_file,
+                backup_strategy=backup_strategy,
+                backup_dir=backup_dir,
+                custom_process=custom_process,
+                version_mismatch_action=version_mismatch_action,
+                staging_area=staging_areas[id(runner)],
+                transport=transport,
+                reducer=reducer,
+                journal=journal,
+                input_hash=run_keys[key] if journal is not None else None,
+            )
+            for key, (runner, idf, sample_epw_file) in to_run.items()
+        ):
+            sims[key], runs[key] = result, run
+    if scheduler is not None:
+        scheduler.finish(n_workers)
+    if stats is not None:
+        stats.collect(runs, time.perf_counter() - start, n_workers)
+        logger.info(f"batch statistics:\n{stats}")
+    for key, location in completed.items():
+        if key not in sims:
+            sims[key] = journal.load(location)
+    for key in samples.keys() - sims.keys():
+        sim = copy.copy(sims[unique_samples[shared_keys[key]]])
+        if reducer is None:
+            sim.name = key
+            # the deferred outputs are loaded (and popped) per simulation
+            sim._deferred = dict(sim._deferred)
+        sims[key] = sim
+    sims = {key: sims[key] for key in samples.keys()}
+    if reducer is not None:
+        return consolidate(sims)
+    return sims
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import heapq
+import re
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from datetime import date
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+import attr
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pandas import DataFrame
+from path import Path
+
+from .utils import idf_content, idf_objects
+
+# the cheap model features the simulation duration is estimated from
+feature_names = [
+    "idf_size",
+    "n_objects",
+    "n_zones",
+    "n_surfaces",
+    "timesteps_per_hour",
+    "simulated_days",
+]
+# the surface objects, by family (as "Wall:Detailed") or by type (as "Window"):
+# the prefixes end with a colon, not to count "WindowMaterial:Glazing"...
+_surface_prefixes = (
+    "buildingsurface:",
+    "fenestrationsurface:",
+    "wall:",
+    "roofceiling:",
+    "floor:",
+    "ceiling:",
+    "window:",
+    "door:",
+    "glazeddoor:",
+    "shading:",
+)
+_surface_types = {"roof", "window", "door", "glazeddoor"}
+
+_schema = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    recorded REAL,
+    elapsed REAL,
+    {", ".join(f"{name} REAL" for name in feature_names)}
+)
+"""
+
+
+def _period_days(begin_month, begin_day, end_month, end_day) -> int:
+    # a non-leap year, a period that ends before it begins wraps over the year end
+    begin = date(2017, int(begin_month), int(begin_day))
+    end = date(2017, int(end_month), int(end_day))
+    return (end - begin).days % 365 + 1
+
+
+def model_features(idf_str: str) -> Dict[str, float]:
+    """Extract cheap features of a model, that drive its simulation duration.
+
+    The idf is only split on its separators, no object is validated.
+
+    Arguments:
+        idf_str {str} -- the idf content
+
+    Returns:
+        Dict[str, float] -- the idf size, number of objects, zones and surfaces,
+            timesteps per hour and simulated days (design days and run periods)
+    """
+    objects = idf_objects(idf_str)
+    by_type: Dict[str, List[List[str]]] = {}
+    for obj in objects:
+        by_type.setdefault(obj[0].lower(), []).append(obj[1:])
+    version = next(iter(by_type.get("version", [])), ["8.0"])[0]
+    timestep = next(iter(by_type.get("timestep", [])), ["6"])[0]
+    control = next(iter(by_type.get("simulationcontrol", [])), [])
+    run_sizing_periods = len(control) < 4 or control[3].lower() != "no"
+    run_periods = len(control) < 5 or control[4].lower() != "no"
+    simulated_days = 0
+    if run_sizing_periods:
+        simulated_days += len(by_type.get("sizingperiod:designday", []))
+    if run_periods:
+        # begin month, begin day, (begin year,) end month, end day since 9.0
+        major = int(re.match(r"\d*", version).group() or 8)
+        positions = (1, 2, 4, 5) if major >= 9 else (1, 2, 3, 4)
+        for fields in by_type.get("runperiod", []):
+            try:
+                simulated_days += _period_days(*(fields[i] for i in positions))
+            except (IndexError, ValueError):
+                simulated_days += 365
+    return {
+        "idf_size": len(idf_str),
+        "n_objects": len(objects),
+        "n_zones": len(by_type.get("zone", [])),
+        "n_surfaces": sum(
+            len(objs)
+            for object_type, objs in by_type.items()
+            if object_type in _surface_types
+            or object_type.startswith(_surface_prefixes)
+        ),
+        "timesteps_per_hour": float(timestep) if timestep else 6,
+        "simulated_days": max(simulated_days, 1),
+    }
+
+
+@attr.s(frozen=True)
+class RuntimeHistory:
+    """Record of the simulation durations with the features of their model, in a
+    SQLite database.
+
+    Given to an `EPlusRunner` as `history`, the duration of each simulation ran
+    (not loaded from the cache) is recorded by the worker that ran it. The records
+    are then used to estimate the duration of new simulations.
+
+    Attributes:
+        path (Path): the SQLite database file.
+        timeout (float): how long to wait for a lock held by another process, in
+            seconds. (default: {60})
+    """
+
+    path = attr.ib(type=Path, converter=lambda path: Path(path).abspath())
+    timeout = attr.ib(type=float, default=60)
+
+    def __attrs_post_init__(self):
+        self.path.parent.makedirs_p()
+        with self._connect() as connection:
+            connection.execute(_schema)
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.path, timeout=self.timeout)) as connection:
+            with connection:
+                yield connection
+
+    def record(self, features: Mapping[str, float], elapsed: float):
+        """Record the duration of a simulation.
+
+        Arguments:
+            features {Mapping[str, float]} -- the model features (see
+                `model_features`)
+            elapsed {float} -- the simulation duration, in seconds
+        """
+        with self._connect() as connection:
+            values = [time.time(), elapsed, *(features[name] for name in feature_names)]
+            connection.execute(
+                f"INSERT INTO runs VALUES ({', '.join('?' * len(values))})", values
+            )
+
+    def records(self) -> DataFrame:
+        """Get the recorded durations.
+
+        Returns:
+            DataFrame -- one row per simulation, with the elapsed time and the model
+                features
+        """
+        with self._connect() as connection:
+            return pd.read_sql_query("SELECT * FROM runs", connection)
+
+
+def _heuristic_work(features: DataFrame) -> np.ndarray:
+    return (
+        features["n_objects"]
+        * features["timesteps_per_hour"]
+        * features["simulated_days"]
+    ).to_numpy(dtype=float)
+
+
+@attr.s
+class DurationEstimator:
+    """Estimate the simulation durations from their model features.
+
+    With enough records, a log-linear model is fitted on the history:
+    log(elapsed) ~ log(1 + features). Otherwise, the duration is taken as
+    proportional to objects x timesteps per hour x simulated days, scaled by the
+    median of the recorded runs (the estimates are then relative, not in seconds,
+    if there is no record at all).
+
+    Attributes:
+        history (RuntimeHistory, optional): the recorded durations.
+        min_records (int): the number of records needed to fit the model.
+            (default: {20})
+    """
+
+    history = attr.ib(type=Optional[RuntimeHistory], default=None)
+    min_records = attr.ib(type=int, default=20)
+    coefficients = attr.ib(type=Optional[np.ndarray], default=None, init=False)
+    scale = attr.ib(type=Optional[float], default=None, init=False)
+
+    def __attrs_post_init__(self):
+        records = self.history.records() if self.history is not None else None
+        if records is None or records.empty:
+            return
+        if len(records) >= self.min_records:
+            X = self._design_matrix(records)
+            self.coefficients, *_ = np.linalg.lstsq(
+                X, np.log(records["elapsed"].clip(lower=1e-3)), rcond=None
+            )
+            return
+        self.scale = float(np.median(records["elapsed"] / _heuristic_work(records)))
+
+    @staticmethod
+    def _design_matrix(features: DataFrame) -> np.ndarray:
+        X = np.log1p(features[feature_names].to_numpy(dtype=float))
+        return np.column_stack([X, np.ones(len(X))])
+
+    @property
+    def in_seconds(self) -> bool:
+        return self.coefficients is not None or self.scale is not None
+
+    def estimate(self, features: Sequence[Mapping[str, float]]) -> np.ndarray:
+        """Estimate the duration of simulations.
+
+        Arguments:
+            features {Sequence[Mapping[str, float]]} -- the model features of each
+                simulation
+
+        Returns:
+            np.ndarray -- the estimated durations (in seconds if `in_seconds`)
+        """
+        features = DataFrame(list(features), columns=feature_names)
+        if self.coefficients is not None:
+            return np.exp(self._design_matrix(features) @ self.coefficients)
+        return _heuristic_work(features) * (self.scale or 1)
+
+
+def list_schedule_makespan(durations: Sequence[float], n_workers: int) -> float:
+    """Makespan of jobs dispatched in order, each to the first free worker.
+
+    Arguments:
+        durations {Sequence[float]} -- the job durations, in dispatch order
+        n_workers {int} -- the number of workers
+
+    Returns:
+        float -- the time when the last job ends
+    """
+    workers = [0.0] * max(n_workers, 1)
+    for duration in durations:
+        heapq.heappush(workers, heapq.heappop(workers) + duration)
+    return max(workers)
+
+
+@attr.s(frozen=True)
+class ScheduleReport:
+    """Expected and achieved makespans of a scheduled batch.
+
+    Attributes:
+        n_workers (int): the number of parallel workers.
+        n_samples (int): the number of scheduled samples.
+        expected_makespan (float): the expected makespan with the longest first
+            order (None if the estimates are not in seconds).
+        unscheduled_makespan (float): the expected makespan with the original
+            sample order (None if the estimates are not in seconds).
+        achieved_makespan (float): the measured batch duration.
+    """
+
+    n_workers = attr.ib(type=int)
+    n_samples = attr.ib(type=int)
+    expected_makespan = attr.ib(type=Optional[float])
+    unscheduled_makespan = attr.ib(type=Optional[float])
+    achieved_makespan = attr.ib(type=float)
+
+    @property
+    def expected_gain(self) -> Optional[float]:
+        """Relative makespan reduction expected from the scheduling."""
+        if self.expected_makespan is None or not self.unscheduled_makespan:
+            return None
+        return 1 - self.expected_makespan / self.unscheduled_makespan
+
+
+@attr.s
+class LongestFirstScheduler:
+    """Order the samples of a batch by decreasing estimated duration.
+
+    As the workers take the next sample as soon as they are free, dispatching the
+    longest simulations first packs the batch (longest processing time rule), and
+    avoids a few long simulations ending alone while the other workers are idle.
+
+    Given to `EPlusRunner.run_many` as `scheduler`, its `report` is filled at the
+    end of the batch.
+
+    Attributes:
+        history (RuntimeHistory, optional): the recorded durations the estimates
+            are learned from. Heuristic estimates are used without history.
+        min_records (int): the number of records needed to fit the duration
+            model (see `DurationEstimator`). (default: {20})
+    """
+
+    history = attr.ib(type=Optional[RuntimeHistory], default=None)
+    min_records = attr.ib(type=int, default=20)
+    estimates = attr.ib(type=Dict[Hashable, float], factory=dict, init=False)
+    report = attr.ib(type=Optional[ScheduleReport], default=None, init=False)
+    _estimator = attr.ib(default=None, init=False, repr=False)
+    _start = attr.ib(type=float, default=None, init=False, repr=False)
+
+    def order(self, samples: Mapping[Hashable, Tuple]) -> Dict[Hashable, Tuple]:
+        """Order the samples, longest estimated duration first.
+
+        Arguments:
+            samples {Mapping[Hashable, Tuple]} -- the (idf, weather file) samples
+
+        Returns:
+            Dict[Hashable, Tuple] -- the ordered samples
+        """
+        self._estimator = DurationEstimator(self.history, self.min_records)
+        features = [model_features(idf_content(idf)) for idf, _ in samples.values()]
+        self.estimates = dict(zip(samples, self._estimator.estimate(features)))
+        self._start = time.monotonic()
+        return {
+            key: samples[key]
+            for key in sorted(samples, key=self.estimates.get, reverse=True)
+        }
+
+    def finish(self, n_workers: int) -> ScheduleReport:
+        """Build the report of the batch, at its end.
+
+        Arguments:
+            n_workers {int} -- the number of parallel workers
+
+        Returns:
+            ScheduleReport -- the report
+        """
+        durations = list(self.estimates.values())
+        expected = unscheduled = None
+        if self._estimator.in_seconds:
+            expected = list_schedule_makespan(
+                sorted(durations, reverse=True), n_workers
+            )
+            unscheduled = list_schedule_makespan(durations, n_workers)
+        self.report = ScheduleReport(
+            n_workers,
+            len(durations),
+            expected,
+            unscheduled,
+            time.monotonic() - self._start,
+        )
+        message = f"makespan: {self.report.achieved_makespan:.1f}s achieved"
+        if expected is not None:
+            message += (
+                f", {expected:.1f}s expected"
+                f" ({unscheduled:.1f}s in the original order)"
+            )
+        logger.info(f"{message}.")
+        return self.report
@@ -1,17 +1,36 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-from typing import Callable
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager, nullcontext
+from typing import Callable, Optional, Tuple
 
 import attr
 import plumbum
 from path import Path
 from plumbum import ProcessExecutionError
 
+from .eso import parse_eso_as_df
+from .instrumentation import timed
+from .limits import RunLimits, RunWatcher, limit_error
+from .sql import parse_sql_as_df
 from .utils import process_eplus_html_report, process_eplus_time_series
 
+output_backends = ["csv", "sqlite", "eso"]
+
 
 def parse_generated_files_as_df(simulation):
+    if simulation.output_backend == "sqlite":
+        return parse_sql_as_df(simulation)
+    if simulation.output_backend == "eso":
+        return parse_eso_as_df(simulation)
     try:
         simulation.reports = process_eplus_html_report(
             simulation.working_dir / "eplus-table.htm"
@@ -21,6 +40,74 @@ def parse_generated_files_as_df(simulation):
     simulation.time_series = process_eplus_time_series(simulation.working_dir)
 
 
+@asynccontextmanager
+async def _no_limit():
+    yield
+
+
+def _kill_process_tree(process):
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def _exit_code(status: int) -> int:
+    # as Popen.returncode: negative signal number if killed by a signal
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+@attr.s
+class _ProcessReaper:
+    """Wait for a process in a thread, and get its peak resident memory and CPU
+    time.
+
+    The process is reaped with `os.wait4`, which gives its resource usage. Where
+    it is not available, the process is waited for as usual and its peak memory
+    and CPU time are unknown.
+    """
+
+    process = attr.ib(type=subprocess.Popen)
+    peak_rss = attr.ib(type=Optional[int], default=None, init=False)
+    cpu_time = attr.ib(type=Optional[float], default=None, init=False)
+    _thread = attr.ib(type=Optional[threading.Thread], default=None, init=False)
+
+    def __attrs_post_init__(self):
+        if hasattr(os, "wait4"):
+            self._thread = threading.Thread(target=self._reap, daemon=True)
+            self._thread.start()
+
+    def _reap(self):
+        _, status, rusage = os.wait4(self.process.pid, 0)
+        # kilobytes on Linux, bytes on macOS
+        self.peak_rss = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        self.cpu_time = rusage.ru_utime + rusage.ru_stime
+        self.process.returncode = _exit_code(status)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the process end.
+
+        Keyword Arguments:
+            timeout {float, optional} -- how long to wait, in seconds.
+
+        Returns:
+            bool -- True if the process has ended
+        """
+        if self._thread is None:
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return False
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
 @attr.s
 class Simulation:
     """Object that contains all that is needed to run an EnergyPlus simulation.
@@ -34,10 +121,26 @@ class Simulation:
         working_dir (Path): working folder, where the simulation will generate the files
         post_process (Callable): callable applied after a successful simulation.
             Take the simulation itself as argument.
+        output_backend (str): where the results are read from: either "csv" (the
+            html report and the csv files produced by ReadVarsESO), "sqlite"
+            (the EnergyPlus SQLite output) or "eso" (the html report and the eso
+            and mtr files). ReadVarsESO is only ran with "csv". (default: "csv")
         status (str): status of the simulation : either ["pending", "running",
-            "interrupted", "failed"]
+            "finished", "interrupted", "failed", "timeout", "killed"]
         reports (dict): if finished, contains the EPlus reports.
         time_series (dict): if finished, contains the EPlus time series results.
+        timings (dict): the duration of each phase of the run, in seconds:
+            "eplus" and "post_process" for the simulation itself, and the other
+            phases of `EPlusRunner.run_one` when ran by a runner.
+        peak_rss (int): the peak resident memory of the EnergyPlus process, in
+            bytes. None where it cannot be measured (async runs, Windows).
+        pruning_summary (PruningSummary): what was removed from the model, when
+            ran by a runner with an `output_pruning`.
+        limits (RunLimits, optional): the time and memory limits of the
+            EnergyPlus process, and the messages that make it killed early.
+
+    The reports and time series can be deferred by the post-process (see
+    `Simulation.defer`): they are then loaded on first access.
     """
 
     name = attr.ib(type=str)
@@ -53,11 +156,57 @@ class Simulation:
         default=parse_generated_files_as_df,
         converter=lambda x: x if x is not None else parse_generated_files_as_df,
     )
+    output_backend = attr.ib(
+        type=str, default="csv", validator=attr.validators.in_(output_backends)
+    )
 
     status = attr.ib(type=str, default="pending")
+    timings = attr.ib(type=dict, factory=dict, init=False, repr=False)
+    peak_rss = attr.ib(type=Optional[int], default=None, init=False, repr=False)
+    pruning_summary = attr.ib(default=None, init=False, repr=False)
     _log = attr.ib(type=str, default="", init=False, repr=False)
-    reports = attr.ib(type=dict, default=None, repr=False)
-    time_series = attr.ib(type=dict, default=None, repr=False)
+    _reports = attr.ib(type=dict, default=None, repr=False)
+    _time_series = attr.ib(type=dict, default=None, repr=False)
+    limits = attr.ib(type=RunLimits, default=None, repr=False)
+    _deferred = attr.ib(type=dict, factory=dict, init=False, repr=False)
+
+    def defer(self, output: str, loader: Callable[[], dict]):
+        """Defer the loading of an output to its first access.
+
+        Arguments:
+            output {str} -- either "reports" or "time_series"
+            loader {Callable[[], dict]} -- a callable that returns the output. It
+                should be picklable to be sent back by the parallel workers.
+        """
+        if output not in ("reports", "time_series"):
+            raise ValueError("`output` argument should be 'reports' or 'time_series'.")
+        setattr(self, f"_{output}", None)
+        self._deferred[output] = loader
+
+    def _load(self, output):
+        if getattr(self, f"_{output}") is None and output in self._deferred:
+            setattr(self, f"_{output}", self._deferred.pop(output)())
+        return getattr(self, f"_{output}")
+
+    @property
+    def reports(self):
+        """The EnergyPlus reports, loaded on first access if deferred."""
+        return self._load("reports")
+
+    @reports.setter
+    def reports(self, reports):
+        self._deferred.pop("reports", None)
+        self._reports = reports
+
+    @property
+    def time_series(self):
+        """The EnergyPlus time series, loaded on first access if deferred."""
+        return self._load("time_series")
+
+    @time_series.setter
+    def time_series(self, time_series):
+        self._deferred.pop("time_series", None)
+        self._time_series = time_series
 
     @property
     def log(self):
@@ -84,47 +233,202 @@ class Simulation:
         return plumbum.local[self.eplus_bin]
 
     @property
-    def eplus_cmd(self):
-        """return a pre-configured eplus executable that only need the weather
-        file and the idf to be ran.
-        """
-        return (
-            self.eplus_base_exec["-s", "d", "-r", "-x", "-i", self.idd_file, "-w"]
-            > self.log_file
-        )
+    def eplus_options(self):
+        """the EnergyPlus command line options, up to the weather file flag."""
+        args = ["-s", "d", "-r", "-x", "-i", self.idd_file, "-w"]
+        if self.output_backend != "csv":
+            args.remove("-r")
+        return args
+
+    @property
+    def _cmd(self):
+        cmd = [self.eplus_bin, *self.eplus_options, self.epw_file, self.idf_file]
+        return list(map(str, cmd))
+
+    def _stopped(
+        self,
+        stopped: Optional[Tuple[str, str]],
+        returncode: int,
+        cpu_time: Optional[float] = None,
+    ):
+        """Raise the error of a run stopped by its limits, or ended with an error
+        code."""
+        if stopped is None and self.limits is not None:
+            stopped = self.limits.returncode_status(returncode, cpu_time)
+        if stopped is not None:
+            self.status, reason = stopped
+            raise limit_error(self.status, self._cmd, returncode, self._log, reason)
+        if returncode != 0:
+            raise ProcessExecutionError(self._cmd, returncode, self._log, "")
+
+    def _run_process(self):
+        """Run EnergyPlus in its own process group, under the simulation limits if
+        any."""
+        limits = self.limits
+        watcher = limits.watch(self.working_dir, self.log_file) if limits else None
+        start = time.monotonic()
+        with open(self.log_file, "wb") as log:
+            process = subprocess.Popen(
+                self._cmd,
+                cwd=self.working_dir,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=os.name == "posix",
+            )
+            if limits is not None:
+                limits.set_rlimits(process.pid)
+            reaper = _ProcessReaper(process)
+            stopped = None
+            try:
+                while not reaper.wait(limits.poll if limits else None):
+                    stopped = watcher.check(time.monotonic() - start)
+                    if stopped is not None:
+                        _kill_process_tree(process)
+                        reaper.wait()
+                        break
+            except KeyboardInterrupt:
+                _kill_process_tree(process)
+                reaper.wait()
+                raise
+        self.peak_rss = reaper.peak_rss
+        self._log = self.log_file.read_text(errors="replace")
+        self._stopped(stopped, process.returncode, reaper.cpu_time)
+
+    async def _wait_limited(
+        self, process, watcher: RunWatcher
+    ) -> Optional[Tuple[str, str]]:
+        start = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(process.wait(), self.limits.poll)
+                return None
+            except asyncio.TimeoutError:
+                pass
+            stopped = watcher.check(time.monotonic() - start)
+            if stopped is not None:
+                _kill_process_tree(process)
+                await process.wait()
+                return stopped
 
     def run(self):
         """Run the EPlus simulation
 
+        With `limits`, the simulation is stopped (and marked as "timeout" or
+        "killed") when it reaches them, raising a `SimulationTimeout` or a
+        `SimulationKilled` error. The durations of the run and of the post-process
+        are added to `timings`.
+
         Returns:
             dict -- the energy plus report (from the html table-report
-                generated by EPlus).
+                generated by EPlus). None if the reports loading is deferred.
         """
         self.status = "running"
         try:
-            self.status = "running"
-            self._log = self.eplus_cmd[self.epw_file, self.idf_file]()
+            with timed(self.timings, "eplus"):
+                self._run_process()
             self.status = "finished"
         except ProcessExecutionError:
-            self.status = "failed"
+            if self.status == "running":
+                self.status = "failed"
             raise
         except KeyboardInterrupt:
             self.status = "interrupted"
             raise
-        self.post_process(self)
-        return self.reports
+        with timed(self.timings, "post_process"):
+            self.post_process(self)
+        return self._reports
+
+    async def run_async(
+        self,
+        executor: Optional[Executor] = None,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ):
+        """Run the EPlus simulation without blocking the event loop.
+
+        EnergyPlus is ran in its own process group, in the simulation working
+        directory. If the task is cancelled, the whole process tree is killed and
+        the simulation is marked as "interrupted". The post-process is ran in an
+        executor.
+
+        Keyword Arguments:
+            executor {Executor, optional} -- where the post-process is ran (the
+                event loop default executor if None).
+            semaphore {asyncio.Semaphore, optional} -- if provided, held while
+                EnergyPlus runs, to limit the number of concurrent processes.
+
+        Returns:
+            dict -- the energy plus report (from the html table-report
+                generated by EPlus). None if the reports loading is deferred.
+        """
+        limits = self.limits
+        async with semaphore if semaphore is not None else _no_limit():
+            self.status = "running"
+            log_context = open(self.log_file, "wb") if limits else nullcontext()
+            with timed(self.timings, "eplus"), log_context as log:
+                process = await asyncio.create_subprocess_exec(
+                    *self._cmd,
+                    cwd=self.working_dir,
+                    stdout=log if limits else asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT
+                    if limits
+                    else asyncio.subprocess.PIPE,
+                    start_new_session=os.name == "posix",
+                )
+                if limits is not None:
+                    limits.set_rlimits(process.pid)
+                try:
+                    if limits is None:
+                        stdout, stderr = await process.communicate()
+                    else:
+                        stopped = await self._wait_limited(
+                            process, limits.watch(self.working_dir, self.log_file)
+                        )
+                except asyncio.CancelledError:
+                    _kill_process_tree(process)
+                    await process.wait()
+                    self.status = "interrupted"
+                    raise
+        if limits is not None:
+            self._log = self.log_file.read_text(errors="replace")
+            try:
+                self._stopped(stopped, process.returncode)
+            except ProcessExecutionError:
+                if self.status == "running":
+                    self.status = "failed"
+                raise
+        else:
+            self._log = stdout.decode(errors="replace")
+            self.log_file.write_text(self._log)
+            if process.returncode != 0:
+                self.status = "failed"
+                raise ProcessExecutionError(
+                    self._cmd,
+                    process.returncode,
+                    self._log,
+                    stderr.decode(errors="replace"),
+                )
+        self.status = "finished"
+        with timed(self.timings, "post_process"):
+            await asyncio.get_running_loop().run_in_executor(
+                executor, self.post_process, self
+            )
+        return self._reports
 
     def backup(self, backup_dir: Path):
         """Save all the files generated by energy-plus
 
-        Files are saved in {backup_dir}/{sim.status}_{sim.name}
+        Files are saved in {backup_dir}/{sim.status}_{sim.name}, or in a
+        {sim.status}_{sim.name} archive of a `BackupArchive`.
 
         Arguments:
-            backup_dir {Path} -- where to save the files
+            backup_dir {Path or BackupArchive} -- where to save the files
 
         Returns:
-            Path -- the exact folder where the data are saved.
+            Path -- the exact folder (or archive) where the data are saved.
         """
+        if not isinstance(backup_dir, (str, os.PathLike)):
+            # a backup store, as a BackupArchive
+            return backup_dir.save(self)
         (backup_dir / f"{self.status}_{self.name}").rmtree_p()
         backup_dir = Path(backup_dir).mkdir_p()
         saved_data = backup_dir / f"{self.status}_{self.name}"
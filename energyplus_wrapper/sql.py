@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import calendar
+import re
+import sqlite3
+from contextlib import closing
+from typing import Callable, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from box import Box
+from path import Path
+from slugify import slugify
+
+from .utils import report_key
+
+sqlite_output_pattern = re.compile(
+    r"^[ \t]*Output:SQLite[ \t]*,(?:[^;!]|![^\n]*)*;[^\n]*$", re.MULTILINE | re.I
+)
+sqlite_output = "  Output:SQLite,\n    SimpleAndTabular;        !- Option Type\n"
+
+# frequencies for which a full time-stamp is meaningful
+_sub_daily_frequencies = ("timestep", "hourly", "each call", "detailed")
+
+_tabular_query = """
+SELECT
+    td.TabularDataIndex, report.Value, for_.Value, tab.Value, row.Value,
+    col.Value, units.Value, td.RowId, td.ColumnId, td.Value
+FROM TabularData td
+INNER JOIN Strings report ON report.StringIndex = td.ReportNameIndex
+INNER JOIN Strings for_ ON for_.StringIndex = td.ReportForStringIndex
+INNER JOIN Strings tab ON tab.StringIndex = td.TableNameIndex
+INNER JOIN Strings row ON row.StringIndex = td.RowLabelIndex
+INNER JOIN Strings col ON col.StringIndex = td.ColumnLabelIndex
+INNER JOIN Strings units ON units.StringIndex = td.UnitsIndex
+ORDER BY td.TabularDataIndex
+"""
+
+
+def ensure_sqlite_output(idf_str: str) -> str:
+    """Make sure that the idf requests the SQLite output, with the tabular data.
+
+    An existing `Output:SQLite` object is replaced by a `SimpleAndTabular` one,
+    otherwise one is added at the end of the idf.
+
+    Arguments:
+        idf_str {str} -- the idf content
+
+    Returns:
+        str -- the modified idf content
+    """
+    idf_str, n_subs = sqlite_output_pattern.subn(sqlite_output.rstrip("\n"), idf_str)
+    if not n_subs:
+        idf_str = f"{idf_str.rstrip()}\n\n{sqlite_output}"
+    return idf_str
+
+
+def find_sql_output(working_dir: Path) -> Path:
+    """Find the SQLite output generated by EnergyPlus in a folder.
+
+    Arguments:
+        working_dir {Path} -- the simulation working directory
+
+    Returns:
+        Path -- the sql file
+    """
+    working_dir = Path(working_dir)
+    for sql_file in [working_dir / "eplus.sql", working_dir / "eplusout.sql"]:
+        if sql_file.exists():
+            return sql_file
+    sql_files = working_dir.files("*.sql")
+    if not sql_files:
+        raise FileNotFoundError(f"No EnergyPlus sql output in {working_dir}.")
+    return sql_files[0]
+
+
+def _connect(sql_file: Path):
+    uri = f"file:{Path(sql_file).abspath()}?mode=ro"
+    return closing(sqlite3.connect(uri, uri=True))
+
+
+def _to_numeric(column: pd.Series) -> pd.Series:
+    try:
+        return pd.to_numeric(column)
+    except (ValueError, TypeError):
+        return column
+
+
+def process_eplus_sql_reports(
+    sql_file: Path, select: Optional[Callable[[str, str], bool]] = None
+):
+    """Extract the EnergyPlus tabular data from the SQLite output into dataframes.
+
+    The output has the same structure as `process_eplus_html_report`, but the
+    report names are the ones used in the SQLite output (as
+    "AnnualBuildingUtilityPerformanceSummary").
+
+    Arguments:
+        sql_file {Path} -- the sql file path
+
+    Keyword Arguments:
+        select {Callable[[str, str], bool], optional} -- if provided, only the
+            tables for which `select(report_key, title)` is True are built.
+
+    Return:
+        Box[str, DataFrame] -- Box of nested section - title : dataframe
+    """
+    with _connect(sql_file) as con:
+        try:
+            tabular = con.execute(_tabular_query).fetchall()
+        except sqlite3.OperationalError:
+            tabular = []
+
+    tables = {}
+    for _, report, for_, title, row, col, units, row_id, col_id, value in tabular:
+        key = report_key(report, for_)
+        if (key, title) not in tables:
+            if select is not None and not select(key, title):
+                tables[key, title] = None
+            else:
+                tables[key, title] = ({}, {}, {})
+        if tables[key, title] is None:
+            continue
+        rows, columns, values = tables[key, title]
+        rows.setdefault(row_id, row)
+        columns.setdefault(col_id, f"{col} [{units}]" if units else col)
+        values[row_id, col_id] = value
+
+    reports = Box(box_intact_types=[pd.DataFrame])
+    for (key, title), table in tables.items():
+        if table is None:
+            continue
+        rows, columns, values = table
+        row_ids, col_ids = sorted(rows), sorted(columns)
+        df = pd.DataFrame(
+            [
+                [values.get((row_id, col_id)) for col_id in col_ids]
+                for row_id in row_ids
+            ],
+            index=[rows[row_id] for row_id in row_ids],
+            columns=[columns[col_id] for col_id in col_ids],
+        )
+        df = df.replace("", np.nan).apply(_to_numeric).dropna(how="all")
+        if key not in reports:
+            reports[key] = Box(box_intact_types=[pd.DataFrame])
+        reports[key][title] = df
+    return reports
+
+
+def _sql_time_series_name(is_meter: int, frequency: str) -> str:
+    prefix = "meter" if is_meter else "eplus"
+    return f"{prefix}_{slugify(frequency, separator='_')}"
+
+
+def _column_name(key: str, name: str, units: str, frequency: str) -> str:
+    variable = f"{key}:{name}" if key else name
+    return f"{variable} [{units}]({frequency})"
+
+
+def _date_time(times: pd.DataFrame, frequency: str) -> pd.Series:
+    month = times.Month.fillna(1).astype(int)
+    day = times.Day.fillna(1).astype(int)
+    if frequency.lower() in _sub_daily_frequencies:
+        hour = times.Hour.fillna(0).astype(int)
+        minute = times.Minute.fillna(0).astype(int)
+        return (
+            " "
+            + month.map("{:02d}".format)
+            + "/"
+            + day.map("{:02d}".format)
+            + "  "
+            + hour.map("{:02d}".format)
+            + ":"
+            + minute.map("{:02d}".format)
+            + ":00"
+        )
+    if frequency.lower() == "daily":
+        return " " + month.map("{:02d}".format) + "/" + day.map("{:02d}".format)
+    if frequency.lower() == "monthly":
+        return month.map(lambda month: calendar.month_name[month])
+    return pd.Series(frequency, index=times.index)
+
+
+def process_eplus_sql_time_series(
+    sql_file: Path, select: Optional[Mapping[str, Optional[Sequence[str]]]] = None
+) -> Dict[str, pd.DataFrame]:
+    """Extract the EnergyPlus report variables and meters from the SQLite output
+    into dataframes.
+
+    There is one dataframe per kind of output ("eplus" for the variables,
+    "meter" for the meters) and reporting frequency, named as "eplus_hourly" or
+    "meter_monthly". The columns are named as in the csv outputs
+    ("{key}:{variable} [{units}]({frequency})"), with a "Date/Time" column
+    first. The warmup periods are excluded.
+
+    Arguments:
+        sql_file {Path} -- the sql file path
+
+    Keyword Arguments:
+        select {Mapping[str, Optional[Sequence[str]]], optional} -- if provided,
+            only the time series in that mapping are extracted, and only the
+            columns given as values (all the columns if the value is None).
+
+    Returns:
+        Dict[str, DataFrame] -- the time series, by name
+    """
+    with _connect(sql_file) as con:
+        dictionary = pd.read_sql_query(
+            "SELECT ReportDataDictionaryIndex, IsMeter, KeyValue, Name,"
+            " ReportingFrequency, Units FROM ReportDataDictionary",
+            con,
+        )
+        dictionary["series"] = [
+            _sql_time_series_name(is_meter, frequency)
+            for is_meter, frequency in zip(
+                dictionary.IsMeter, dictionary.ReportingFrequency
+            )
+        ]
+        dictionary["column"] = [
+            _column_name(key, name, units, frequency)
+            for key, name, units, frequency in zip(
+                dictionary.KeyValue,
+                dictionary.Name,
+                dictionary.Units,
+                dictionary.ReportingFrequency,
+            )
+        ]
+        if select is not None:
+            selected = [
+                name in select
+                and (select[name] is None or column in set(select[name]))
+                for name, column in zip(dictionary.series, dictionary.column)
+            ]
+            dictionary = dictionary[selected]
+
+        times = pd.read_sql_query(
+            "SELECT TimeIndex, Month, Day, Hour, Minute FROM Time",
+            con,
+            index_col="TimeIndex",
+        )
+        time_series = {}
+        for name, variables in dictionary.groupby("series", sort=False):
+            indices = ",".join(str(int(i)) for i in variables.ReportDataDictionaryIndex)
+            data = pd.read_sql_query(
+                "SELECT rd.TimeIndex, rd.ReportDataDictionaryIndex, rd.Value"
+                " FROM ReportData rd INNER JOIN Time t ON t.TimeIndex = rd.TimeIndex"
+                f" WHERE rd.ReportDataDictionaryIndex IN ({indices})"
+                " AND (t.WarmupFlag IS NULL OR t.WarmupFlag = 0)",
+                con,
+            )
+            values = data.pivot(
+                index="TimeIndex", columns="ReportDataDictionaryIndex", values="Value"
+            )
+            values = values.reindex(columns=variables.ReportDataDictionaryIndex)
+            values.columns = list(variables.column)
+            values.insert(
+                0,
+                "Date/Time",
+                _date_time(
+                    times.reindex(values.index), variables.ReportingFrequency.iloc[0]
+                ),
+            )
+            time_series[name] = values.reset_index(drop=True)
+    return time_series
+
+
+def parse_sql_as_df(simulation):
+    """Simulation post-process that extract the reports and the time series from
+    the EnergyPlus SQLite output.
+
+    Arguments:
+        simulation {Simulation} -- the finished simulation
+    """
+    sql_file = find_sql_output(simulation.working_dir)
+    simulation.reports = process_eplus_sql_reports(sql_file)
+    simulation.time_series = process_eplus_sql_time_series(sql_file)
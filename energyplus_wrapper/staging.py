@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import os
+import stat
+import uuid
+
+import attr
+from path import Path
+
+from .cache import file_digest
+
+staging_strategies = ["copy", "hardlink", "symlink", "reflink"]
+
+# linux ioctl that shares the extents of a file with another (btrfs, xfs...)
+FICLONE = 0x40049409
+
+
+def reflink(src: Path, dst: Path):
+    """Clone a file with a copy-on-write reflink.
+
+    Arguments:
+        src {Path} -- the source file
+        dst {Path} -- the destination file
+
+    Raises:
+        OSError -- if the platform or the file system does not support reflinks.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflinks are not supported on this platform.")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def stage_file(src: Path, dst_dir: Path, strategy: str = "copy") -> Path:
+    """Make a file available in a folder, with the same basename.
+
+    The hardlink, symlink and reflink strategies fall back to a plain copy when
+    they are not possible (different devices, unsupported file system...).
+
+    Arguments:
+        src {Path} -- the file to stage
+        dst_dir {Path} -- where to stage it
+
+    Keyword Arguments:
+        strategy {str} -- either "copy", "hardlink", "symlink" or "reflink".
+            (default: {"copy"})
+
+    Returns:
+        Path -- the staged file
+    """
+    if strategy not in staging_strategies:
+        raise ValueError(f"`strategy` should be one of {staging_strategies}.")
+    src = Path(src).abspath()
+    dst = Path(dst_dir) / src.basename()
+    try:
+        if strategy == "hardlink":
+            os.link(src, dst)
+            return dst
+        if strategy == "symlink":
+            os.symlink(src, dst)
+            return dst
+        if strategy == "reflink":
+            reflink(src, dst)
+            return dst
+    except OSError:
+        dst.remove_p()
+    src.copy(dst)
+    return dst
+
+
+@attr.s
+class StagingArea:
+    """Read-only folder where each unique input file is materialized once, and
+    from which the inputs are staged in the simulation working directories.
+
+    As the area lives next to the working directories (in the runner temporary
+    folder), the hardlinks do not fall back to copies because of a different
+    device, and the user files are never linked directly.
+
+    Attributes:
+        root (Path): the staging area folder
+        strategy (str): how the materialized files are staged in the working
+            directories: either "copy", "hardlink", "symlink" or "reflink".
+    """
+
+    root = attr.ib(type=Path, converter=lambda root: Path(root).abspath())
+    strategy = attr.ib(
+        type=str, default="hardlink", validator=attr.validators.in_(staging_strategies)
+    )
+
+    def materialize(self, src: Path) -> Path:
+        """Copy a file in the staging area, if an identical one is not already
+        there.
+
+        Arguments:
+            src {Path} -- the input file
+
+        Returns:
+            Path -- the read-only copy
+        """
+        src = Path(src).abspath()
+        staged = self.root / file_digest(src)[:32] / src.basename()
+        if not staged.exists():
+            staged.parent.makedirs_p()
+            tmp_file = staged.parent / f".{uuid.uuid4().hex}.tmp"
+            src.copy(tmp_file)
+            tmp_file.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_file, staged)
+        return staged
+
+    def stage(self, src: Path, dst_dir: Path) -> Path:
+        """Stage an input file in a working directory, through the staging area.
+
+        Arguments:
+            src {Path} -- the input file
+            dst_dir {Path} -- the working directory
+
+        Returns:
+            Path -- the staged file
+        """
+        return stage_file(self.materialize(src), dst_dir, strategy=self.strategy)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import os
+import uuid
+from typing import Hashable, Iterator, List, Optional, Sequence
+from urllib.parse import quote, unquote
+
+import attr
+import pandas as pd
+from box import Box
+from pandas import DataFrame
+from path import Path
+
+from .outputs import OutputSelection
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, see the "store" extra
+    pa = ds = feather = pq = None
+
+store_formats = ["parquet", "feather"]
+
+
+def _check_format(instance, attribute, value):
+    if value not in store_formats:
+        raise ValueError(f"{attribute.name} should be one of {store_formats}.")
+
+
+def _to_table(df: DataFrame) -> "pa.Table":
+    df = df.copy(deep=False)
+    df.columns = df.columns.map(
+        lambda column: column if isinstance(column, (str, tuple)) else str(column)
+    )
+    for column, dtype in df.dtypes.items():
+        if dtype == object:
+            df[column] = df[column].astype(str)
+    return pa.Table.from_pandas(df)
+
+
+@attr.s(frozen=True)
+class StoredOutputs:
+    """Deferred loader of the outputs of one sample from a `ResultStore`.
+
+    Attributes:
+        store (ResultStore): the store.
+        sample (str): the sample name.
+        output (str): either "time_series" or "reports".
+    """
+
+    store = attr.ib(type="ResultStore")
+    sample = attr.ib(type=str)
+    output = attr.ib(type=str)
+
+    def __call__(self):
+        if self.output == "reports":
+            return self.store.sample_reports(self.sample)
+        return self.store.sample_time_series(self.sample)
+
+
+@attr.s(frozen=True)
+class StoredSimulation:
+    """Read-only, Simulation-like view on the outputs of one sample of a
+    `ResultStore`. The outputs are read on first access.
+
+    Attributes:
+        store (ResultStore): the store.
+        name (str): the sample name.
+    """
+
+    store = attr.ib(type="ResultStore")
+    name = attr.ib(type=str)
+    status = "finished"
+
+    @property
+    def time_series(self):
+        return self.store.sample_time_series(self.name)
+
+    @property
+    def reports(self):
+        return self.store.sample_reports(self.name)
+
+
+@attr.s(frozen=True)
+class ResultStore:
+    """Columnar on-disk dataset of simulation outputs (Parquet or Feather files).
+
+    Each time series (and each selected report table) is a dataset, partitioned by
+    sample name: the outputs of one simulation are written in their own files,
+    from the worker, with hive partitioning (`sample=<name>/part-0.parquet`).
+    They can be read back for the whole batch with column and predicate pushdown,
+    or lazily sample by sample.
+
+    A ResultStore can be given as `transport` to `EPlusRunner.run_one`,
+    `EPlusRunner.run_many` and `EPlusRunner.iter_many`: the returned simulations
+    then read their outputs from the store. It needs the optional `pyarrow`
+    dependency.
+
+    Attributes:
+        root (Path): the store folder.
+        format (str): either "parquet" or "feather". (default: {"parquet"})
+        compression (str, optional): the compression codec, "zstd", "lz4" or
+            "snappy" (parquet only). (default: {"zstd"})
+        reports (Sequence[str], optional): the html report tables to store, given
+            as for `OutputSelection.reports`. All the parsed tables are stored if
+            None, and none if empty (default).
+    """
+
+    root = attr.ib(type=Path, converter=lambda root: Path(root).abspath())
+    format = attr.ib(type=str, default="parquet", validator=_check_format)
+    compression = attr.ib(type=Optional[str], default="zstd")
+    reports = attr.ib(type=Optional[Sequence[str]], default=())
+
+    def __attrs_post_init__(self):
+        if pa is None:
+            raise ImportError(
+                "The ResultStore needs pyarrow: "
+                "`pip install energyplus_wrapper[store]`."
+            )
+
+    @property
+    def extension(self):
+        return "parquet" if self.format == "parquet" else "arrow"
+
+    def _partition(self, folder: Path, sample: Hashable) -> Path:
+        return folder / f"sample={quote(str(sample), safe='')}"
+
+    def _write(self, df: DataFrame, folder: Path, sample: Hashable):
+        folder = self._partition(folder, sample).makedirs_p()
+        filename = folder / f"part-0.{self.extension}"
+        # hidden temporary file, renamed at the end: readers never see partial files
+        tmp_file = folder / f".{uuid.uuid4().hex}.tmp"
+        table = _to_table(df)
+        if self.format == "parquet":
+            pq.write_table(table, tmp_file, compression=self.compression)
+        else:
+            feather.write_feather(
+                table, tmp_file, compression=self.compression or "uncompressed"
+            )
+        os.replace(tmp_file, filename)
+
+    def _read(self, folder: Path, columns: Optional[Sequence[str]] = None):
+        filename = folder / f"part-0.{self.extension}"
+        if not filename.exists():
+            return None
+        if self.format == "parquet":
+            table = pq.read_table(filename, columns=columns)
+        else:
+            table = feather.read_table(filename, columns=columns)
+        return table.to_pandas()
+
+    def write(self, sample: Hashable, simulation):
+        """Write the outputs of a finished simulation.
+
+        Writing a sample again replaces its previous outputs.
+
+        Arguments:
+            sample {Hashable} -- the sample name (stored as a string)
+            simulation {Simulation} -- the simulation
+        """
+        for name, df in (simulation.time_series or {}).items():
+            if isinstance(df, DataFrame):
+                self._write(df, self.root / "time_series" / name, sample)
+        if self.reports == ():
+            return
+        select = OutputSelection(reports=self.reports).select_report
+        for report_key, tables in (simulation.reports or {}).items():
+            for title, df in tables.items():
+                if isinstance(df, DataFrame) and select(report_key, title):
+                    folder = self.root / "reports" / report_key / quote(title, safe="")
+                    self._write(df, folder, sample)
+
+    def export(self, simulation):
+        """Write the outputs of a finished simulation, and make it read them back
+        from the store.
+
+        Arguments:
+            simulation {Simulation} -- the simulation, whose name is the sample
+                name.
+        """
+        sample = str(simulation.name)
+        self.write(sample, simulation)
+        simulation.defer("time_series", StoredOutputs(self, sample, "time_series"))
+        if self.reports != ():
+            simulation.defer("reports", StoredOutputs(self, sample, "reports"))
+
+    def time_series_names(self) -> List[str]:
+        """Get the names of the stored time series.
+
+        Returns:
+            List[str] -- the time series names
+        """
+        if not (self.root / "time_series").exists():
+            return []
+        return sorted(folder.name for folder in (self.root / "time_series").dirs())
+
+    def report_tables(self) -> List[str]:
+        """Get the stored report tables.
+
+        Returns:
+            List[str] -- the tables, as "{report_key}/{title}"
+        """
+        if not (self.root / "reports").exists():
+            return []
+        return sorted(
+            f"{report.name}/{unquote(table.name)}"
+            for report in (self.root / "reports").dirs()
+            for table in report.dirs()
+        )
+
+    def samples(self) -> List[str]:
+        """Get the names of the stored samples.
+
+        Returns:
+            List[str] -- the sample names
+        """
+        samples = set()
+        for name in self.time_series_names():
+            samples.update(
+                unquote(partition.name.split("=", 1)[1])
+                for partition in (self.root / "time_series" / name).dirs()
+            )
+        return sorted(samples)
+
+    def dataset(self, name: str) -> "ds.Dataset":
+        """Get a stored time series (or report table) as a pyarrow dataset, for
+        custom queries.
+
+        Arguments:
+            name {str} -- the time series name, or the report table as
+                "{report_key}/{title}"
+
+        Returns:
+            pyarrow.dataset.Dataset -- the dataset, with a "sample" partition column
+        """
+        if "/" in name:
+            report_key, title = name.split("/", 1)
+            folder = self.root / "reports" / report_key / quote(title, safe="")
+        else:
+            folder = self.root / "time_series" / name
+        if not folder.exists():
+            raise KeyError(f"No {name} output in the store.")
+        return ds.dataset(
+            folder,
+            format="parquet" if self.format == "parquet" else "ipc",
+            partitioning=ds.partitioning(
+                pa.schema([("sample", pa.string())]), flavor="hive"
+            ),
+        )
+
+    def read(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        samples: Optional[Sequence[Hashable]] = None,
+        filter: Optional["ds.Expression"] = None,
+    ) -> DataFrame:
+        """Read a stored time series (or report table) for many samples.
+
+        Only the requested columns are read, and only the files of the requested
+        samples are opened. The filter is pushed down to the files (row groups
+        whose statistics do not match are skipped).
+
+        Arguments:
+            name {str} -- the time series name, or the report table as
+                "{report_key}/{title}"
+
+        Keyword Arguments:
+            columns {Sequence[str], optional} -- the columns to read. (default: all)
+            samples {Sequence[Hashable], optional} -- the samples to read.
+                (default: all)
+            filter {pyarrow.dataset.Expression, optional} -- a row filter, as
+                `pyarrow.dataset.field("column") > value`.
+
+        Returns:
+            DataFrame -- the outputs, indexed by sample name (as first level)
+        """
+        dataset = self.dataset(name)
+        if samples is not None:
+            sample_filter = ds.field("sample").isin([str(key) for key in samples])
+            filter = sample_filter if filter is None else filter & sample_filter
+        if columns is not None:
+            columns = [*columns, "sample"]
+            index_columns = dataset.schema.pandas_metadata.get("index_columns", [])
+            columns += [column for column in index_columns if isinstance(column, str)]
+        df = dataset.to_table(columns=columns, filter=filter).to_pandas()
+        if isinstance(df.index, pd.RangeIndex):
+            return df.set_index("sample")
+        df = df.set_index("sample", append=True)
+        return df.reorder_levels([-1, *range(df.index.nlevels - 1)])
+
+    def sample_time_series(self, sample: Hashable):
+        """Read the time series of one sample.
+
+        Arguments:
+            sample {Hashable} -- the sample name
+
+        Returns:
+            Dict[str, DataFrame] -- the time series, by name
+        """
+        time_series = {}
+        for name in self.time_series_names():
+            df = self._read(self._partition(self.root / "time_series" / name, sample))
+            if df is not None:
+                time_series[name] = df
+        return time_series
+
+    def sample_reports(self, sample: Hashable):
+        """Read the report tables of one sample.
+
+        Arguments:
+            sample {Hashable} -- the sample name
+
+        Returns:
+            Box[str, Box[str, DataFrame]] -- the report tables, by report key and
+                title
+        """
+        reports = Box(box_intact_types=[pd.DataFrame])
+        for table in self.report_tables():
+            report_key, title = table.split("/", 1)
+            folder = self.root / "reports" / report_key / quote(title, safe="")
+            df = self._read(self._partition(folder, sample))
+            if df is not None:
+                reports.setdefault(report_key, Box(box_intact_types=[pd.DataFrame]))
+                reports[report_key][title] = df
+        return reports
+
+    def load(self, sample: Hashable) -> StoredSimulation:
+        """Get a lazy view on the outputs of one sample.
+
+        Arguments:
+            sample {Hashable} -- the sample name
+
+        Returns:
+            StoredSimulation -- the view
+        """
+        return StoredSimulation(self, str(sample))
+
+    def simulations(self) -> Iterator[StoredSimulation]:
+        """Iterate over lazy views on all the stored samples.
+
+        Yields:
+            StoredSimulation -- the views
+        """
+        for sample in self.samples():
+            yield self.load(sample)
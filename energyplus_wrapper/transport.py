@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import uuid
+from tempfile import gettempdir
+from typing import Any, Dict, List, Optional, Tuple
+
+import attr
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from path import Path, TempDir
+
+
+def _is_mappable(dtype) -> bool:
+    """Whether the values of that dtype can be mapped in memory from a .npy file
+    (numbers, booleans, dates and durations)."""
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def _blocks(dtypes) -> List[Tuple[str, int]]:
+    """Group the consecutive columns that can be mapped in memory and share the
+    same dtype, and the consecutive ones that cannot (as "object")."""
+    blocks = []
+    for dtype in dtypes:
+        name = dtype.str if _is_mappable(dtype) else "object"
+        if blocks and blocks[-1][0] == name:
+            blocks[-1] = (name, blocks[-1][1] + 1)
+        else:
+            blocks.append((name, 1))
+    return blocks
+
+
+def _has_default_index(df: DataFrame) -> bool:
+    index = df.index
+    return isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+
+
+@attr.s(frozen=True)
+class MemmapFrame:
+    """Handle on a dataframe saved as .npy files, mapped in memory on load.
+
+    The columns are saved by blocks of consecutive columns. The blocks of
+    numbers, booleans or dates that share the same dtype are saved as 2D arrays,
+    that are used as is (and read-only) by the loaded dataframe. The other
+    blocks (strings, categories...) are pickled, with their dtypes and missing
+    values. The index is saved apart, the same way.
+
+    Attributes:
+        folder (Path): where the arrays are saved.
+        columns (list): the dataframe columns, in order.
+        blocks (List[Tuple[str, int]]): the dtype (as `numpy.dtype.str`, or
+            "object" for the pickled ones) and the number of columns of each
+            block, in order.
+        length (int): the number of rows.
+        column_names (list): the names of the column levels.
+        index_name (Any): the index name.
+        index_format (str, optional): either "npy" or "pickle", or None if the
+            index is a default RangeIndex.
+    """
+
+    folder = attr.ib(type=Path, converter=Path)
+    columns = attr.ib(type=list)
+    blocks = attr.ib(type=List[Tuple[str, int]])
+    length = attr.ib(type=int)
+    column_names = attr.ib(type=list, factory=lambda: [None])
+    index_name = attr.ib(default=None)
+    index_format = attr.ib(type=Optional[str], default=None)
+
+    @classmethod
+    def save(cls, df: DataFrame, folder: Path) -> "MemmapFrame":
+        """Save a dataframe in a folder.
+
+        Arguments:
+            df {DataFrame} -- the dataframe to save
+            folder {Path} -- where to save it
+
+        Returns:
+            MemmapFrame -- the handle on the saved dataframe
+        """
+        folder = Path(folder).makedirs_p()
+        blocks = _blocks(df.dtypes)
+        start = 0
+        for i, (dtype, n_columns) in enumerate(blocks):
+            block = df.iloc[:, start : start + n_columns]
+            if dtype == "object":
+                block.set_axis(range(n_columns), axis=1).reset_index(
+                    drop=True
+                ).to_pickle(folder / f"block_{i}.pkl")
+            else:
+                np.save(folder / f"block_{i}.npy", block.to_numpy(dtype=dtype))
+            start += n_columns
+        index_format = None
+        if not _has_default_index(df):
+            if df.index.nlevels == 1 and _is_mappable(df.index.dtype):
+                index_format = "npy"
+                np.save(folder / "index.npy", df.index.to_numpy())
+            else:
+                index_format = "pickle"
+                pd.to_pickle(df.index, folder / "index.pkl")
+        return cls(
+            folder,
+            list(df.columns),
+            blocks,
+            len(df),
+            column_names=list(df.columns.names),
+            index_name=df.index.name,
+            index_format=index_format,
+        )
+
+    def load(self) -> DataFrame:
+        """Map the saved dataframe in memory.
+
+        Returns:
+            DataFrame -- the dataframe. Its numbers, booleans and dates are
+                read-only.
+        """
+        parts, start = [], 0
+        for i, (dtype, n_columns) in enumerate(self.blocks):
+            if dtype == "object":
+                part = pd.read_pickle(self.folder / f"block_{i}.pkl")
+            else:
+                values = np.load(str(self.folder / f"block_{i}.npy"), mmap_mode="r")
+                part = DataFrame(values, copy=False)
+            part.columns = pd.RangeIndex(start, start + n_columns)
+            parts.append(part)
+            start += n_columns
+        if parts:
+            # the blocks are put side by side, without copy
+            df = pd.concat(parts, axis=1, copy=False)
+        else:
+            df = DataFrame(index=pd.RangeIndex(self.length))
+        if self.index_format == "npy":
+            df.index = pd.Index(np.load(str(self.folder / "index.npy"), mmap_mode="r"))
+        elif self.index_format == "pickle":
+            df.index = pd.read_pickle(self.folder / "index.pkl")
+        df.index.name = self.index_name
+        if len(self.column_names) > 1:
+            df.columns = pd.MultiIndex.from_tuples(
+                self.columns, names=self.column_names
+            )
+        else:
+            df.columns = pd.Index(self.columns, name=self.column_names[0])
+        return df
+
+
+@attr.s(frozen=True)
+class MemmapTimeSeries:
+    """Deferred loader of time series saved by a `MemmapTransport`.
+
+    Attributes:
+        frames (Dict[str, Any]): the MemmapFrame handles, by time series name
+            (or the raw outputs that are not dataframes).
+    """
+
+    frames = attr.ib(type=Dict[str, Any])
+
+    def __call__(self):
+        return {
+            name: frame.load() if isinstance(frame, MemmapFrame) else frame
+            for name, frame in self.frames.items()
+        }
+
+
+@attr.s
+class MemmapTransport:
+    """Return path of the simulation time series through memory-mapped .npy
+    files, instead of pickling them back from the workers.
+
+    The time series are saved in a batch results folder by the worker, and the
+    returned simulations only hold small handles: the data are mapped in memory
+    on first access to `simulation.time_series`. The folder (and the data it
+    holds) is removed when the transport is closed, usually at the exit of its
+    context manager.
+
+    Attributes:
+        root (Path, optional): the batch results folder. A temporary one is
+            created if not provided.
+    """
+
+    root = attr.ib(type=Path, default=None)
+
+    def __attrs_post_init__(self):
+        if self.root is None:
+            self.root = TempDir(prefix="energyplus_results_", dir=gettempdir())
+        self.root = Path(self.root).abspath().makedirs_p()
+
+    def export(self, simulation):
+        """Move the time series of a finished simulation to the results folder.
+
+        Arguments:
+            simulation {Simulation} -- the simulation
+        """
+        time_series = simulation.time_series
+        if not time_series:
+            return
+        folder = self.root / uuid.uuid4().hex
+        frames = {
+            name: (
+                MemmapFrame.save(df, folder / str(i))
+                if isinstance(df, DataFrame)
+                else df
+            )
+            for i, (name, df) in enumerate(time_series.items())
+        }
+        simulation.defer("time_series", MemmapTimeSeries(frames))
+
+    def close(self):
+        """Remove the results folder. The time series not already loaded cannot
+        be accessed anymore."""
+        self.root.rmtree_p()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,27 +1,93 @@
+import calendar
 import warnings
-from typing import Generator, Tuple
+from io import StringIO
+from typing import (
+    Any,
+    Callable,
+    Generator,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 import re
 
 import bs4
+import numpy as np
 import pandas as pd
+from lxml import etree
 from pandas import DataFrame
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
 from path import Path
 from box import Box, BoxList
+from eppy.modeleditor import IDF as eppy_IDF
 from slugify import slugify
 
+from .parametric import ParametricSample
+
 re_section = re.compile(r"Report:(.*)", re.DOTALL)
 re_for = re.compile(r"For:(.*)", re.DOTALL)
 re_timestamp = re.compile(r"Timestamp:(.*)", re.DOTALL)
+re_whitespace = re.compile(r"[\r\n]+|\s{2,}")
+re_date_time = (
+    r"^\s*(?P<month>\d{1,2})/(?P<day>\d{1,2})"
+    r"(?:\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?)?\s*$"
+)
+re_idf_comment = re.compile(r"!.*")
+re_time_series_column = re.compile(
+    r"^(?:(?P<key>[^:]*):)?(?P<variable>.*?)\s*\[(?P<unit>[^\]]*)\]"
+    r"\s*\((?P<frequency>[^)]*)\)\s*$"
+)
+
+# EnergyPlus does not need a year for the usual run periods: this one is not
+# a leap year, and starts on a sunday, as the EnergyPlus default one.
+default_year = 2017
+
+
+def idf_content(idf) -> str:
+    """Get the content of an idf input.
+
+    Arguments:
+        idf {IDFInput} -- idf file as filename, eppy IDF object or
+            ParametricSample.
+
+    Returns:
+        str -- the idf content
+    """
+    if isinstance(idf, eppy_IDF):
+        return idf.idfstr()
+    if isinstance(idf, ParametricSample):
+        return idf.render()
+    with open(idf) as f:
+        return f.read()
+
+
+def idf_objects(idf_str: str) -> List[List[str]]:
+    """Split an idf content in objects, as lists of stripped fields (the comments
+    are removed)."""
+    objects = re_idf_comment.sub("", idf_str).split(";")
+    return [
+        [field.strip() for field in obj.split(",")] for obj in objects if obj.strip()
+    ]
 
 
 def _eplus_html_report_gen(
-    eplus_html_report: Path,
+    eplus_html_report: Path, select: Optional[Callable[[str, str, str], bool]] = None
 ) -> Generator[Tuple[str, DataFrame], None, None]:
-    """Extract the EnergyPlus html report into dataframes.
+    """Extract the EnergyPlus html report into dataframes, using BeautifulSoup and
+    `pd.read_html`.
 
     Arguments:
         eplus_html_report {Path} -- the html report path
 
+    Keyword Arguments:
+        select {Callable[[str, str, str], bool], optional} -- if provided, only the
+            tables for which `select(section, for_, title)` is True are parsed.
+
     Yields:
         Tuple[str, DataFrame] -- tuple of (report_title, report_data)
     """
@@ -29,61 +95,430 @@ def _eplus_html_report_gen(
         soup = bs4.BeautifulSoup(f.read(), features="lxml")
     for table in soup.find_all("table"):
         try:
-            section = table.find_previous(text=re_section).find_next_sibling("b").text
+            section = (
+                table.find_previous(string=re_section).find_next_sibling("b").text
+            )
         except AttributeError:
             section = None
         try:
-            for_ = table.find_previous(text=re_for).find_next_sibling("b").text
+            for_ = table.find_previous(string=re_for).find_next_sibling("b").text
         except AttributeError:
             for_ = None
         title = table.find_previous_sibling("b").get_text()
-        yield ((section, for_), title), pd.read_html(str(table), index_col=0, header=0)[
-            0
-        ].dropna(how="all")
+        if select is not None and not select(section, for_, title):
+            continue
+        yield ((section, for_), title), pd.read_html(
+            StringIO(str(table)), index_col=0, header=0
+        )[0].dropna(how="all")
+
+
+def _table_rows(table: etree._Element) -> List[List[str]]:
+    """Get the cells text of an html table, as `pd.read_html` would do
+    (whitespaces cleaned, colspan and rowspan expanded, ragged rows filled).
+    """
+    rows = []
+    remainder = []  # list of (index, text, rowspan) from the previous rows
+    for tr in table.iter("tr"):
+        texts = []
+        next_remainder = []
+        index = 0
+        for td in tr:
+            if td.tag not in ("td", "th"):
+                continue
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+            text = re_whitespace.sub(" ", "".join(td.itertext()).strip())
+            rowspan = int(td.get("rowspan") or 1)
+            for _ in range(int(td.get("colspan") or 1)):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        rows.append(texts)
+        remainder = next_remainder
+    while remainder:
+        next_remainder = []
+        texts = []
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        rows.append(texts)
+        remainder = next_remainder
+    n_cols = max((len(row) for row in rows), default=0)
+    for row in rows:
+        row.extend([""] * (n_cols - len(row)))
+    return rows
+
+
+def _eplus_html_report_gen_lxml(
+    eplus_html_report: Path, select: Optional[Callable[[str, str, str], bool]] = None
+) -> Generator[Tuple[str, DataFrame], None, None]:
+    """Extract the EnergyPlus html report into dataframes in a single pass.
+
+    The "Report:" / "For:" context and the table titles are tracked while
+    streaming through the document, and the dataframes are directly built from
+    the cells text. The already processed elements are discarded, keeping the
+    memory footprint low.
+
+    Arguments:
+        eplus_html_report {Path} -- the html report path (or a binary file object)
 
+    Keyword Arguments:
+        select {Callable[[str, str, str], bool], optional} -- if provided, only the
+            tables for which `select(section, for_, title)` is True are parsed.
 
-def process_eplus_html_report(eplus_html_report: Path):
+    Yields:
+        Tuple[str, DataFrame] -- tuple of (report_title, report_data)
+    """
+    if not hasattr(eplus_html_report, "read"):
+        eplus_html_report = str(eplus_html_report)
+    section = for_ = None
+    title_parent = title = None
+    for _, element in etree.iterparse(
+        eplus_html_report,
+        events=("end",),
+        tag=("b", "table"),
+        html=True,
+        encoding="utf-8",
+    ):
+        parent = element.getparent()
+        if element.tag == "b":
+            label = parent.text or ""
+            if parent.tag == "p" and re_section.search(label):
+                section = "".join(element.itertext())
+            elif parent.tag == "p" and re_for.search(label):
+                for_ = "".join(element.itertext())
+            else:
+                title_parent, title = parent, "".join(element.itertext())
+            continue
+        table_title = title if title_parent is parent else None
+        df = None
+        if select is None or select(section, for_, table_title):
+            try:
+                with TextParser(
+                    _table_rows(element), header=0, index_col=0, thousands=","
+                ) as parser:
+                    df = parser.read()
+            except EmptyDataError:
+                pass
+        if df is not None:
+            yield ((section, for_), table_title), df.dropna(how="all")
+        # free the memory used by the already processed part of the document
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+html_report_engines = {
+    "lxml": _eplus_html_report_gen_lxml,
+    "bs4": _eplus_html_report_gen,
+}
+
+
+def report_key(section: str, for_: str) -> str:
+    """Get the key of a report, as used in the `process_eplus_html_report` output.
+
+    Arguments:
+        section {str} -- the report name
+        for_ {str} -- what the report is for
+
+    Returns:
+        str -- the report key
+    """
+    return slugify(f"{section}_for_{for_}", separator="_", lowercase=False)
+
+
+def process_eplus_html_report(
+    eplus_html_report: Path,
+    engine: str = "lxml",
+    select: Optional[Callable[[str, str], bool]] = None,
+):
     """Extract the EnergyPlus html report into dataframes.
 
     Arguments:
         eplus_html_report {Path} -- the html report path
 
+    Keyword Arguments:
+        engine {str} -- either "lxml" (single-pass streaming parser) or "bs4"
+            (BeautifulSoup and `pd.read_html`, slower). Both give the same result.
+            (default: {"lxml"})
+        select {Callable[[str, str], bool], optional} -- if provided, only the
+            tables for which `select(report_key, title)` is True are parsed.
+
     Return:
         Box[str, DataFrame] -- Box of nested section - title : dataframe or custom-report: [dataframes]
             that contains the result of the reports.
     """
+    try:
+        report_gen = html_report_engines[engine]
+    except KeyError:
+        raise ValueError(
+            f"`engine` argument should be one of {list(html_report_engines)}."
+        )
+    if not hasattr(eplus_html_report, "read") and not Path(eplus_html_report).exists():
+        raise FileNotFoundError(f"No such file: {eplus_html_report}")
+    select_table = None
+    if select is not None:
+
+        def select_table(section, for_, title):
+            return select(report_key(section, for_), title)
+
     reports = Box(box_intact_types=[pd.DataFrame])
-    for ((section, for_), title), df in _eplus_html_report_gen(eplus_html_report):
-        report_key = slugify(f"{section}_for_{for_}", separator="_", lowercase=False)
-        if report_key not in reports:
-            reports[report_key] = Box(box_intact_types=[pd.DataFrame])
-        reports[report_key][title] = df
+    for ((section, for_), title), df in report_gen(
+        eplus_html_report, select=select_table
+    ):
+        key = report_key(section, for_)
+        if key not in reports:
+            reports[key] = Box(box_intact_types=[pd.DataFrame])
+        reports[key][title] = df
     return reports
 
 
+def time_series_name(csv_file: Path) -> str:
+    """Get the name of a csv output, as used in the `process_eplus_time_series`
+    output (e.g. "eplus" for "eplus.csv", "meter" for "eplus-meter.csv").
+
+    Arguments:
+        csv_file {Path} -- the csv file
+
+    Returns:
+        str -- the time series name
+    """
+    name = Path(csv_file).basename().stripext()
+    if name != "eplus":
+        name = name.replace("eplus-", "")
+    return str(name)
+
+
+def read_time_series(csv_file, columns: Optional[Sequence[str]] = None):
+    """Read an EnergyPlus csv output.
+
+    Arguments:
+        csv_file {Path} -- the csv file (or a file object)
+
+    Keyword Arguments:
+        columns {Sequence[str], optional} -- if provided, only these columns
+            (and the "Date/Time" one) are parsed.
+
+    Returns:
+        Union[DataFrame, str] -- the time series, or the raw csv content if it
+            cannot be parsed.
+    """
+    usecols = None
+    if columns is not None:
+        columns = set(columns) | {"Date/Time"}
+
+        def usecols(column):
+            return column.strip() in columns
+
+    try:
+        return pd.read_csv(csv_file, usecols=usecols)
+    except Exception:
+        warnings.warn(
+            f"Unable to parse csv file {csv_file}. Return raw string as fallback."
+        )
+        if hasattr(csv_file, "read"):
+            csv_file.seek(0)
+            content = csv_file.read()
+            return content.decode() if isinstance(content, bytes) else content
+        with open(csv_file) as f:
+            return f.read()
+
+
 def process_eplus_time_series(
-    working_dir,
+    working_dir, select: Optional[Mapping[str, Optional[Sequence[str]]]] = None
 ) -> Generator[Tuple[str, DataFrame], None, None]:
     """Extract the EnergyPlus csv outputs into dataframes.
 
     Arguments:
         working_dir {Path} -- path where live the generated csv outputs
 
+    Keyword Arguments:
+        select {Mapping[str, Optional[Sequence[str]]], optional} -- if provided,
+            only the time series in that mapping are parsed, and only the
+            columns given as values (all the columns if the value is None).
+
     Yields:
         Tuple[str, DataFrame] -- tuple of (csv_name, csv_data)
     """
     time_series = {}
     for csv_file in working_dir.files("*.csv"):
-        name = csv_file.basename().stripext()
-        if name != "eplus":
-            name = name.replace("eplus-", "")
-        try:
-            time_serie = pd.read_csv(csv_file)
-        except Exception:
-            warnings.warn(
-                f"Unable to parse csv file {csv_file}. Return raw string as fallback."
-            )
-            with open(csv_file) as f:
-                time_serie = f.read()
-        time_series[str(name)] = time_serie
+        name = time_series_name(csv_file)
+        if select is not None and name not in select:
+            continue
+        columns = select[name] if select is not None else None
+        time_series[name] = read_time_series(csv_file, columns=columns)
+    return time_series
+
+
+def eplus_datetime_index(
+    date_time: pd.Series, year: int = default_year
+) -> Optional[pd.DatetimeIndex]:
+    """Parse an EnergyPlus "Date/Time" column into a DatetimeIndex.
+
+    The parsing is vectorized. The "24:00:00" EnergyPlus convention rolls over
+    to the next day, and the year is incremented each time the dates go from
+    December 31 to January 1 (for multi-year run periods). Any other step back in
+    the dates starts a new environment (as a design day followed by the run
+    period), back to `year`. The monthly time-stamps are set on the first day
+    of the month.
+
+    Arguments:
+        date_time {Series} -- the "Date/Time" column (as " 01/01  24:00:00",
+            " 01/01" or "January")
+
+    Keyword Arguments:
+        year {int} -- the year of the first time-stamp of each environment. It
+            has to be a leap year for the outputs of a leap year weather file.
+            (default: {2017})
+
+    Returns:
+        Optional[DatetimeIndex] -- the time-stamps, or None if the column cannot
+            be parsed (as for the run period or annual outputs, or for a February
+            29 in a non-leap year).
+    """
+    date_time = pd.Series(date_time).astype(str)
+    parts = date_time.str.extract(re_date_time)
+    if parts.month.isna().any():
+        months = {name: i for i, name in enumerate(calendar.month_name) if name}
+        month = date_time.str.strip().map(months)
+        if month.isna().any():
+            return None
+        parts = pd.DataFrame({"month": month, "day": 1})
+    parts = parts.apply(pd.to_numeric).fillna(0).astype(int)
+    for column in ["hour", "minute", "second"]:
+        if column not in parts:
+            parts[column] = 0
+    month_day = parts.month.to_numpy() * 100 + parts.day.to_numpy()
+    step_back = np.diff(month_day) < 0
+    # December 31 (or December, for the monthly outputs) to January 1
+    year_end = 1201 if (parts.day == 1).all() else 1231
+    wrap = step_back & (month_day[:-1] == year_end) & (month_day[1:] == 101)
+    wraps = np.concatenate([[0], np.cumsum(wrap)])
+    # the wraps are counted from the start of each environment
+    position = np.arange(len(month_day))
+    new_environment = np.concatenate([[True], step_back & ~wrap])
+    environment_start = np.maximum.accumulate(np.where(new_environment, position, 0))
+    years = year + wraps - wraps[environment_start]
+    try:
+        dates = pd.to_datetime(
+            pd.DataFrame({"year": years, "month": parts.month, "day": parts.day})
+        )
+    except ValueError:  # as February 29 in a non-leap year
+        return None
+    seconds = parts.hour * 3600 + parts.minute * 60 + parts.second
+    return pd.DatetimeIndex(
+        dates + pd.to_timedelta(seconds.to_numpy(), unit="s"), name="Date/Time"
+    )
+
+
+def split_time_series_column(column: str, meter: bool = False) -> Tuple[str, ...]:
+    """Split an EnergyPlus time series column name into its
+    (key, variable, unit, frequency) parts.
+
+    Arguments:
+        column {str} -- the column name, as
+            "CORE_ZN:Zone Mean Air Temperature [C](Hourly)"
+
+    Keyword Arguments:
+        meter {bool} -- if True, the column is a meter one, and has no key (the
+            meter names, as "Electricity:Facility", contain a colon).
+            (default: {False})
+
+    Returns:
+        Tuple[str, ...] -- the (key, variable, unit, frequency) tuple. The column
+            name is used as variable if it cannot be split.
+    """
+    match = re_time_series_column.match(column.strip())
+    if match is None:
+        return "", column, "", ""
+    key, variable, unit, frequency = match.group("key", "variable", "unit", "frequency")
+    if meter and key is not None:
+        key, variable = "", f"{key}:{variable}"
+    return key or "", variable, unit, frequency
+
+
+def format_time_series(
+    time_series: DataFrame,
+    datetime_index: bool = True,
+    year: int = default_year,
+    float32: bool = False,
+    split_columns: bool = False,
+    meter: bool = False,
+) -> DataFrame:
+    """Convert a raw EnergyPlus time series into a more compact and usable form.
+
+    Arguments:
+        time_series {DataFrame} -- the time series, with a "Date/Time" column.
+
+    Keyword Arguments:
+        datetime_index {bool} -- if True, the "Date/Time" column is parsed and
+            used as DatetimeIndex (when it can be parsed). (default: {True})
+        year {int} -- the year of the simulation. (default: {2017})
+        float32 {bool} -- if True, the values are downcast to float32.
+            (default: {False})
+        split_columns {bool} -- if True, the columns are turned into a MultiIndex
+            with the (key, variable, unit, frequency) levels. (default: {False})
+        meter {bool} -- if True, the columns are meters (see
+            `split_time_series_column`). (default: {False})
+
+    Returns:
+        DataFrame -- the formatted time series
+    """
+    if not isinstance(time_series, DataFrame):
+        return time_series
+    if datetime_index and "Date/Time" in time_series:
+        index = eplus_datetime_index(time_series["Date/Time"], year=year)
+        if index is not None:
+            time_series = time_series.drop(columns="Date/Time").set_index(index)
+    if float32:
+        values = time_series.select_dtypes("float64").columns
+        time_series = time_series.astype({column: "float32" for column in values})
+    if split_columns:
+        time_series.columns = pd.MultiIndex.from_tuples(
+            [
+                split_time_series_column(column, meter=meter)
+                if column != "Date/Time"
+                else ("", column, "", "")
+                for column in time_series.columns
+            ],
+            names=["key", "variable", "unit", "frequency"],
+        )
     return time_series
+
+
+def consolidate(results: Mapping[Hashable, Any]) -> Union[DataFrame, pd.Series]:
+    """Consolidate per-simulation results into a single columnar result, indexed
+    by sample key.
+
+    - dataframes are concatenated, with the sample key as first index level,
+    - mappings (or series) become the rows of a dataframe,
+    - anything else (as scalars) becomes a series.
+
+    Tuple keys give a MultiIndex.
+
+    Arguments:
+        results {Mapping[Hashable, Any]} -- the results, by sample key
+
+    Returns:
+        Union[DataFrame, Series] -- the consolidated results
+    """
+    keys, values = list(results.keys()), list(results.values())
+    index = pd.Index(keys)
+    if not isinstance(index, pd.MultiIndex):
+        index.name = "sample"
+    if values and all(isinstance(value, DataFrame) for value in values):
+        # one level per key element, then the results own index levels
+        return pd.concat(values, keys=keys, names=list(index.names))
+    if values and all(isinstance(value, (Mapping, pd.Series)) for value in values):
+        return DataFrame.from_records([dict(value) for value in values], index=index)
+    return pd.Series(values, index=index)
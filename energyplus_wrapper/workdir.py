@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import fnmatch
+import os
+import shutil
+from typing import List, Optional, Sequence
+
+import attr
+from loguru import logger
+from path import Path, TempDir
+
+from .scheduling import model_features
+from .utils import idf_objects
+
+# the number of reported values of an output, by reporting frequency, per day
+_values_per_day = {
+    "detailed": None,  # every timestep
+    "timestep": None,
+    "hourly": 24,
+    "daily": 1,
+}
+# the outputs reported a few times per run, whatever its length
+_values_per_run = {"monthly": 12, "runperiod": 1, "environment": 1, "annual": 1}
+# an output value in the eso, mtr and csv files
+_bytes_per_value = 64
+# the html and audit reports, the input copies...
+_base_output_size = 16 * 2 ** 20
+
+_reservations_name = ".energyplus_reservations"
+
+
+def estimate_output_size(idf_str: str) -> int:
+    """Estimate the size of the files written by EnergyPlus for a model, from its
+    requested outputs and simulated period.
+
+    Arguments:
+        idf_str {str} -- the idf content
+
+    Returns:
+        int -- the estimated size, in bytes
+    """
+    features = model_features(idf_str)
+    days = features["simulated_days"]
+    timesteps = features["timesteps_per_hour"] * 24
+    n_values = 0
+    for obj in idf_objects(idf_str):
+        object_type = obj[0].lower()
+        if object_type == "output:variable":
+            frequency = obj[3] if len(obj) > 3 else "hourly"
+        elif object_type.startswith("output:meter"):
+            frequency = obj[2] if len(obj) > 2 else "hourly"
+        else:
+            continue
+        frequency = frequency.lower() or "hourly"
+        if frequency in _values_per_run:
+            n_values += _values_per_run[frequency]
+        else:
+            per_day = _values_per_day.get(frequency, 24)
+            n_values += (timesteps if per_day is None else per_day) * days
+    return int(_base_output_size + n_values * _bytes_per_value)
+
+
+def directory_size(folder: Path) -> int:
+    """The size of the files of a folder, the symbolic links not followed."""
+    return sum(os.lstat(filename).st_size for filename in Path(folder).walkfiles())
+
+
+def available_memory() -> Optional[int]:
+    """The memory available without swapping, in bytes (None if unknown)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@attr.s
+class RamWorkDir:
+    """Working directories on a RAM-backed file system (tmpfs), with a fallback
+    on disk when the memory is short.
+
+    Given to an `EPlusRunner` as `ram_dir`, each run is checked before it starts:
+    its working directory is created in `root` if the free space (and memory)
+    left by the other runs is larger than its estimated output size, in the
+    runner `temp_dir` otherwise. The estimate is reserved until the run ends, so
+    that the concurrent runs (from any process) do not overcommit the RAM.
+
+    When a run succeeds, the files matching `artifacts` are moved to
+    `artifacts_dir` before the working directory is removed. When it fails, the
+    working directory is kept as with a disk one, but moved to the runner
+    `temp_dir` to free the memory.
+
+    Attributes:
+        root (Path): the RAM-backed folder. (default: {"/dev/shm"})
+        expected_size (int, optional): the size of the files written by a run, in
+            bytes. Estimated from the requested outputs and the simulated period
+            if None (see `estimate_output_size`).
+        margin (float): the factor applied to the estimated size. (default: {1.5})
+        reserve (int): the free space and memory, in bytes, that are always
+            left, for EnergyPlus itself. (default: {512 MiB})
+        artifacts (Sequence[str]): the glob patterns of the files moved to
+            `artifacts_dir` at the end of a successful run. (default: {()})
+        artifacts_dir (Path): where the artifacts are saved, in a folder per
+            simulation. (default: {"./artifacts"})
+    """
+
+    root = attr.ib(type=Path, default="/dev/shm", converter=Path)
+    expected_size = attr.ib(type=Optional[int], default=None)
+    margin = attr.ib(type=float, default=1.5)
+    reserve = attr.ib(type=int, default=512 * 2 ** 20)
+    artifacts = attr.ib(type=Sequence[str], default=(), converter=tuple)
+    artifacts_dir = attr.ib(
+        type=Path, default="./artifacts", converter=lambda path: Path(path).abspath()
+    )
+    # the largest run seen by this process, a floor for the estimates
+    _largest_run = attr.ib(type=int, default=0, init=False, repr=False)
+
+    @property
+    def reservations_dir(self) -> Path:
+        return self.root / _reservations_name
+
+    def estimate(self, idf_str: str) -> int:
+        """The space reserved for a run.
+
+        Arguments:
+            idf_str {str} -- the idf content
+
+        Returns:
+            int -- the reserved size, in bytes
+        """
+        if self.expected_size is not None:
+            return int(self.expected_size)
+        size = max(estimate_output_size(idf_str), self._largest_run)
+        return int(size * self.margin)
+
+    def _reserved(self) -> int:
+        """The space reserved by the ongoing runs and not written yet."""
+        if not self.reservations_dir.exists():
+            return 0
+        reserved = 0
+        for reservation in self.reservations_dir.files():
+            working_dir = self.root / reservation.name
+            try:
+                size = int(reservation.read_text())
+                used = directory_size(working_dir) if working_dir.exists() else None
+            except (OSError, ValueError):  # the run just ended
+                continue
+            if used is None:  # left by a crashed run
+                reservation.remove_p()
+                continue
+            reserved += max(size - used, 0)
+        return reserved
+
+    def free_space(self) -> int:
+        """The space a new run can use, in bytes."""
+        if not self.root.isdir():
+            return 0
+        stat = os.statvfs(self.root)
+        free = stat.f_bavail * stat.f_frsize
+        memory = available_memory()
+        if memory is not None:
+            free = min(free, memory)
+        return free - self.reserve - self._reserved()
+
+    def create(self, idf_str: str, fallback_dir: Path) -> Path:
+        """Create the working directory of a run, in RAM if there is enough room.
+
+        Arguments:
+            idf_str {str} -- the idf content
+            fallback_dir {Path} -- where the working directory is created
+                otherwise
+
+        Returns:
+            Path -- the working directory
+        """
+        size = self.estimate(idf_str)
+        free = self.free_space()
+        if size > free:
+            logger.debug(
+                f"Not enough room in {self.root} ({free} bytes for {size} bytes),"
+                f" the run falls back to {fallback_dir}."
+            )
+            return Path(TempDir(prefix="energyplus_run_", dir=fallback_dir))
+        working_dir = Path(TempDir(prefix="energyplus_run_", dir=self.root))
+        self.reservations_dir.makedirs_p()
+        (self.reservations_dir / working_dir.name).write_text(str(size))
+        return working_dir
+
+    def save_artifacts(self, simulation) -> List[Path]:
+        """Move the artifacts of a finished simulation to `artifacts_dir`.
+
+        Arguments:
+            simulation {Simulation} -- the simulation
+
+        Returns:
+            List[Path] -- the saved artifacts
+        """
+        working_dir = Path(simulation.working_dir)
+        self._largest_run = max(self._largest_run, directory_size(working_dir))
+        if not self.artifacts:
+            return []
+        destination = self.artifacts_dir / simulation.name
+        saved = []
+        for filename in sorted(working_dir.walkfiles()):
+            rel = str(filename.relpath(working_dir))
+            if not any(fnmatch.fnmatch(rel, pattern) for pattern in self.artifacts):
+                continue
+            target = destination / rel
+            target.parent.makedirs_p()
+            shutil.move(filename, target)
+            saved.append(target)
+        return saved
+
+    def release(self, working_dir: Path, keep_dir: Optional[Path] = None) -> Path:
+        """Release the space reserved by a run.
+
+        Arguments:
+            working_dir {Path} -- the working directory of the run
+
+        Keyword Arguments:
+            keep_dir {Path, optional} -- if provided, a working directory in RAM
+                that still exists is moved there.
+
+        Returns:
+            Path -- the working directory, moved or not
+        """
+        working_dir = Path(working_dir)
+        (self.reservations_dir / working_dir.name).remove_p()
+        if (
+            keep_dir is not None
+            and working_dir.exists()
+            and working_dir.parent.abspath() == self.root.abspath()
+        ):
+            kept = Path(keep_dir) / working_dir.name
+            shutil.move(working_dir, kept)
+            logger.info(f"The working directory {working_dir} is kept in {kept}.")
+            return kept
+        return working_dir
+
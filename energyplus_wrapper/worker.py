@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Standalone worker that runs the simulations of a `WorkQueue`.
+
+Start as many workers as needed, on any host that can reach the queue database:
+
+    python -m energyplus_wrapper.worker --queue /shared/queue.sqlite
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+import attr
+from loguru import logger
+
+from .workqueue import Job, WorkQueue
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@attr.s
+class Worker:
+    """Claim, run and report the jobs of a `WorkQueue`.
+
+    While a simulation runs, a background thread renews the job lease.
+
+    Attributes:
+        queue (WorkQueue): the queue.
+        worker_id (str, optional): the worker id. Generated from the host name and
+            the process id if not provided.
+        poll (float): the waiting time when there is no job to claim, in seconds.
+            (default: {1})
+        heartbeat (float, optional): the lease renewal period, in seconds. A third
+            of the queue lease if not provided.
+    """
+
+    queue = attr.ib(type=WorkQueue)
+    worker_id = attr.ib(type=str, factory=default_worker_id)
+    poll = attr.ib(type=float, default=1)
+    heartbeat = attr.ib(type=float, default=None)
+
+    def __attrs_post_init__(self):
+        if self.heartbeat is None:
+            self.heartbeat = self.queue.lease / 3
+
+    def _renew_lease(self, job: Job, done: threading.Event):
+        while not done.wait(self.heartbeat):
+            if not self.queue.heartbeat(job.id, self.worker_id):
+                logger.warning(f"{self.worker_id}: lease lost on job {job.id}.")
+                return
+
+    def process(self, job: Job):
+        """Run a claimed job, and report its result (or error) to the queue.
+
+        Arguments:
+            job {Job} -- the job
+        """
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_lease, args=(job, done), daemon=True
+        )
+        heartbeat.start()
+        try:
+            sim = job.run()
+        except KeyboardInterrupt:
+            self.queue.release(job.id, self.worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"{self.worker_id}: job {job.id} failed ({e}).")
+            self.queue.fail(job.id, self.worker_id, e)
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+        self.queue.complete(job.id, self.worker_id, sim)
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_empty: bool = False):
+        """Process the queue jobs.
+
+        Keyword Arguments:
+            max_jobs {int, optional} -- stop after that many jobs.
+            exit_when_empty {bool} -- stop when there is no pending nor running job
+                in the queue. Otherwise, wait for new jobs forever.
+                (default: {False})
+
+        Returns:
+            int -- the number of processed jobs
+        """
+        n_jobs = 0
+        while max_jobs is None or n_jobs < max_jobs:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                counts = self.queue.counts()
+                if exit_when_empty and not counts.get("running"):
+                    break
+                time.sleep(self.poll)
+                continue
+            logger.info(f"{self.worker_id}: running job {job.id}.")
+            self.process(job)
+            n_jobs += 1
+        return n_jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queue", required=True, help="the queue database file")
+    parser.add_argument(
+        "--lease", type=float, default=60, help="the job lease duration, in seconds"
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, default=3, help="attempts before giving up a job"
+    )
+    parser.add_argument("--poll", type=float, default=1, help="polling period")
+    parser.add_argument("--max-jobs", type=int, default=None)
+    parser.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="stop when the queue has no more job to run",
+    )
+    parser.add_argument("--worker-id", default=None)
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.queue, lease=args.lease, max_attempts=args.max_attempts)
+    worker = Worker(
+        queue, worker_id=args.worker_id or default_worker_id(), poll=args.poll
+    )
+    try:
+        n_jobs = worker.run(
+            max_jobs=args.max_jobs, exit_when_empty=args.exit_when_empty
+        )
+    except KeyboardInterrupt:
+        logger.info(f"{worker.worker_id}: stopped.")
+        return
+    logger.info(f"{worker.worker_id}: {n_jobs} jobs processed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import os
+import pickle
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+import attr
+import pandas as pd
+from loguru import logger
+from pandas import DataFrame
+from path import Path
+
+_schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    key TEXT NOT NULL,
+    pickled_key BLOB NOT NULL,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted REAL,
+    started REAL,
+    finished REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, status);
+"""
+
+
+@attr.s(frozen=True)
+class Job:
+    """A sample claimed from a `WorkQueue` by a worker.
+
+    Attributes:
+        id (int): the job id.
+        batch (str): the batch the job belongs to.
+        payload (bytes): the pickled (runner, key, idf, epw_file, run_one keyword
+            arguments).
+        attempts (int): how many times the job has been claimed.
+    """
+
+    id = attr.ib(type=int)
+    batch = attr.ib(type=str)
+    payload = attr.ib(type=bytes, repr=False)
+    attempts = attr.ib(type=int)
+
+    def run(self):
+        """Run the sample with `EPlusRunner.run_one`.
+
+        Returns:
+            Simulation -- the finished simulation
+        """
+        runner, key, idf, epw_file, kwargs = pickle.loads(self.payload)
+        return runner.run_one(idf, epw_file, simulation_name=key, **kwargs)
+
+
+@attr.s(frozen=True)
+class WorkQueue:
+    """Durable queue of simulations in a SQLite database, shared by standalone
+    workers (see `energyplus_wrapper.worker`) on any number of hosts.
+
+    No external service is needed: the database and the results folder only have
+    to live on a storage shared by the submitter and the workers. A worker claims
+    a job with a lease, that it renews with heartbeats while the simulation runs.
+    The jobs whose lease expired (crashed or disconnected worker) are claimed
+    again by another worker, at most `max_attempts` times.
+
+    Attributes:
+        path (Path): the SQLite database file. The results are saved in a
+            `{path stem}_results` folder next to it.
+        lease (float): the lease duration, in seconds. (default: {60})
+        max_attempts (int): a job whose lease expired that many times is marked as
+            failed. (default: {3})
+        timeout (float): how long to wait for a lock held by another process, in
+            seconds. (default: {60})
+    """
+
+    path = attr.ib(type=Path, converter=lambda path: Path(path).abspath())
+    lease = attr.ib(type=float, default=60)
+    max_attempts = attr.ib(type=int, default=3)
+    timeout = attr.ib(type=float, default=60)
+
+    def __attrs_post_init__(self):
+        self.path.parent.makedirs_p()
+        with closing(sqlite3.connect(self.path, timeout=self.timeout)) as connection:
+            connection.executescript(_schema)
+
+    @property
+    def results_dir(self) -> Path:
+        return self.path.parent / f"{self.path.stem}_results"
+
+    def result_file(self, job_id: int) -> Path:
+        return self.results_dir / f"{job_id}.pkl"
+
+    @contextmanager
+    def _connect(self, immediate: bool = False):
+        """Connection in a transaction, committed (or rolled back) and closed at
+        the end. An immediate transaction takes the write lock at once."""
+        with closing(
+            sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        ) as connection:
+            connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def submit(
+        self,
+        runner,
+        samples: Mapping[Hashable, Any],
+        epw_file: Optional[Path] = None,
+        **kwargs,
+    ) -> str:
+        """Put a batch of samples in the queue.
+
+        Arguments:
+            runner {EPlusRunner} -- the runner the workers use. Its EnergyPlus root
+                has to be valid on the workers hosts.
+            samples {mapping key: idf or (idf, weather_file)} -- the samples, as for
+                `EPlusRunner.run_many`. The files have to be reachable from the
+                workers hosts.
+
+        Keyword Arguments:
+            epw_file {Path, optional} -- a weather file used by every sample.
+            **kwargs -- other `EPlusRunner.run_one` arguments.
+
+        Returns:
+            str -- the batch id
+        """
+        batch = uuid.uuid4().hex
+        now = time.time()
+        rows = []
+        for key, sample in samples.items():
+            idf, sample_epw_file = (sample, epw_file) if epw_file else sample
+            if isinstance(idf, (str, Path)):
+                idf = Path(idf).abspath()
+            payload = (runner, key, idf, Path(sample_epw_file).abspath(), kwargs)
+            rows.append(
+                (batch, repr(key), pickle.dumps(key), pickle.dumps(payload), now)
+            )
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO jobs (batch, key, pickled_key, payload, submitted)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger.info(f"{len(rows)} samples submitted as batch {batch}.")
+        return batch
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Claim the next pending job (or a job whose lease expired).
+
+        Arguments:
+            worker {str} -- the worker id
+
+        Returns:
+            Job -- the claimed job, or None if there is nothing to do
+        """
+        now = time.time()
+        with self._connect(immediate=True) as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', worker = NULL, finished = ?,"
+                " error = 'Lease expired ' || attempts || ' times.'"
+                " WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT id, batch, payload, attempts FROM jobs"
+                " WHERE status = 'pending'"
+                " OR (status = 'running' AND lease_expires < ?)"
+                " ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, batch, payload, attempts = row
+            connection.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?,"
+                " attempts = ?, started = ? WHERE id = ?",
+                (worker, now + self.lease, attempts + 1, now, job_id),
+            )
+        return Job(job_id, batch, payload, attempts + 1)
+
+    def _update_owned(self, job_id: int, worker: str, query: str, *params) -> bool:
+        with self._connect(immediate=True) as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {query}"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (*params, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Renew the lease of a running job.
+
+        Returns:
+            bool -- False if the worker does not own the job anymore
+        """
+        return self._update_owned(
+            job_id, worker, "lease_expires = ?", time.time() + self.lease
+        )
+
+    def complete(self, job_id: int, worker: str, result: Any) -> bool:
+        """Save the result of a job, and mark it as finished.
+
+        Returns:
+            bool -- False if the worker does not own the job anymore (the job was
+                claimed again by another worker after a lease expiry)
+        """
+        tmp_file = self.results_dir.makedirs_p() / f".{job_id}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect(immediate=True) as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'finished', finished = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            )
+            if cursor.rowcount != 1:
+                tmp_file.remove_p()
+                return False
+            # the result file is in place before the job is seen as finished
+            os.replace(tmp_file, self.result_file(job_id))
+        return True
+
+    def fail(self, job_id: int, worker: str, error: BaseException) -> bool:
+        """Mark a job as failed.
+
+        Returns:
+            bool -- False if the worker does not own the job anymore
+        """
+        return self._update_owned(
+            job_id,
+            worker,
+            "status = 'failed', finished = ?, error = ?",
+            time.time(),
+            f"{type(error).__name__}: {error}",
+        )
+
+    def release(self, job_id: int, worker: str) -> bool:
+        """Give a job back to the queue, as when a worker is stopped.
+
+        Returns:
+            bool -- False if the worker does not own the job anymore
+        """
+        return self._update_owned(
+            job_id, worker, "status = 'pending', worker = NULL, attempts = attempts - 1"
+        )
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """Count the jobs by status.
+
+        Keyword Arguments:
+            batch {str, optional} -- only count the jobs of that batch.
+
+        Returns:
+            Dict[str, int] -- the number of jobs, by status
+        """
+        query = "SELECT status, COUNT(*) FROM jobs"
+        params: Tuple = ()
+        if batch is not None:
+            query += " WHERE batch = ?"
+            params = (batch,)
+        with self._connect() as connection:
+            return dict(connection.execute(f"{query} GROUP BY status", params))
+
+    def jobs(self, batch: Optional[str] = None) -> DataFrame:
+        """Get the jobs state.
+
+        Keyword Arguments:
+            batch {str, optional} -- only get the jobs of that batch.
+
+        Returns:
+            DataFrame -- one row per job, indexed by id
+        """
+        query = (
+            "SELECT id, batch, key, status, worker, attempts, submitted, started,"
+            " finished, error FROM jobs"
+        )
+        params: Tuple = ()
+        if batch is not None:
+            query += " WHERE batch = ?"
+            params = (batch,)
+        with self._connect() as connection:
+            df = pd.read_sql_query(query, connection, params=params)
+        for column in ["submitted", "started", "finished"]:
+            df[column] = pd.to_datetime(df[column], unit="s")
+        return df.set_index("id")
+
+    def wait(
+        self, batch: str, poll: float = 1, timeout: Optional[float] = None
+    ) -> Dict[Hashable, Any]:
+        """Wait for the end of a batch, and load its results.
+
+        Arguments:
+            batch {str} -- the batch id
+
+        Keyword Arguments:
+            poll {float} -- the polling period, in seconds. (default: {1})
+            timeout {float, optional} -- raise a TimeoutError after that many
+                seconds.
+
+        Raises:
+            TimeoutError -- if the batch is not finished before the timeout.
+            RuntimeError -- if some jobs failed.
+
+        Returns:
+            Dict[Hashable, Simulation] -- the simulations, by sample key
+        """
+        start = time.monotonic()
+        while True:
+            counts = self.counts(batch)
+            if not counts.get("pending") and not counts.get("running"):
+                break
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"Batch {batch} not finished: {counts}.")
+            time.sleep(poll)
+        # the payloads (with the runner and the idf) are not loaded back
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, key, pickled_key, status, error FROM jobs WHERE batch = ?"
+                " ORDER BY id",
+                (batch,),
+            ).fetchall()
+        errors = {key: error for _, key, _, status, error in rows if status == "failed"}
+        if errors:
+            raise RuntimeError(f"{len(errors)} samples failed: {errors}")
+        results = {}
+        for job_id, _, pickled_key, _, _ in rows:
+            key = pickle.loads(pickled_key)
+            with open(self.result_file(job_id), "rb") as f:
+                results[key] = pickle.load(f)
+        return results
+
+    def run_many(
+        self,
+        runner,
+        samples: Mapping[Hashable, Any],
+        epw_file: Optional[Path] = None,
+        poll: float = 1,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Dict[Hashable, Any]:
+        """Run multiple EnergyPlus simulations on the queue workers.
+
+        Same as `EPlusRunner.run_many`, but the samples are submitted to the queue
+        and ran by the workers that consume it.
+
+        Arguments:
+            runner {EPlusRunner} -- the runner the workers use.
+            samples {mapping key: idf or (idf, weather_file)} -- the samples.
+
+        Keyword Arguments:
+            epw_file {Path, optional} -- a weather file used by every sample.
+            poll, timeout -- see `wait`.
+            **kwargs -- other `EPlusRunner.run_one` arguments.
+
+        Returns:
+            Dict[Hashable, Simulation] -- the simulations, by sample key
+        """
+        batch = self.submit(runner, samples, epw_file=epw_file, **kwargs)
+        return self.wait(batch, poll=poll, timeout=timeout)
+
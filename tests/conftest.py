@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+from path import Path
+
+tests_dir = Path(__file__).abspath().parent
+
+
+@pytest.fixture
+def fake_eplus_root(tmp_path):
+    """An EnergyPlus root with a fake executable (see `fake_energyplus.py`).
+
+    Each run of the fake executable is recorded in the `calls.log` file that lives
+    next to the returned root.
+    """
+    root = Path(tmp_path) / "EnergyPlus-fake"
+    root.mkdir_p()
+    eplus_bin = root / "energyplus"
+    eplus_bin.write_text(
+        "#!/bin/sh\n"
+        f'export FAKE_EPLUS_CALLS="{root.parent / "calls.log"}"\n'
+        f'exec "{sys.executable}" "{tests_dir / "fake_energyplus.py"}" "$@"\n'
+    )
+    eplus_bin.chmod(0o755)
+    (tests_dir / "Energy+.idd").symlink(root / "Energy+.idd")
+    return root
+
+
+@pytest.fixture
+def eplus_calls(fake_eplus_root):
+    """Return a callable that gives the number of simulations ran by the fake
+    EnergyPlus executable."""
+
+    def n_calls():
+        calls = fake_eplus_root.parent / "calls.log"
+        if not calls.exists():
+            return 0
+        return len(calls.lines())
+
+    return n_calls
+
+
+@pytest.fixture
+def idf_file():
+    return tests_dir / "in_8-7-0.idf"
+
+
+@pytest.fixture
+def epw_file():
+    return tests_dir / "in.epw"
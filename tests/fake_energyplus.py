@@ -0,0 +1,524 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+A stand-in for the EnergyPlus executable, used to test the wrapper without a
+real EnergyPlus install.
+
+It understands the subset of the EnergyPlus command line used by the wrapper
+and writes small but representative outputs (html table report, csv, eso,
+mtr and err files) in the current directory, using the `-s d` naming scheme.
+
+Its behaviour can be tuned with environment variables:
+
+- FAKE_EPLUS_VERSION: the version reported by `-v` (default: 8.7.0)
+- FAKE_EPLUS_CALLS: if set, a line is appended to that file for each run
+- FAKE_EPLUS_SLEEP: seconds to sleep during the run (default: 0)
+- FAKE_EPLUS_HOURS: number of hourly records generated (default: 48)
+- FAKE_EPLUS_SPIN: seconds of busy loop (CPU time) during the run (default: 0)
+- FAKE_EPLUS_REPORTS: number of extra synthetic reports in the html table
+  report, to make it as large as a real one (default: 0)
+- FAKE_EPLUS_WARNINGS: number of warnings written in the err file (default: 0)
+
+An idf that contains `FAKE_EPLUS_FAIL` makes the run fail with a severe error.
+An idf that contains `FAKE_EPLUS_DIVERGE` reports a warmup convergence failure in
+`eplus.err`, then hangs.
+An `eplus.sql` output is written if the idf contains an `Output:SQLite` object.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+
+VERSION = os.environ.get("FAKE_EPLUS_VERSION", "8.7.0")
+
+HTML_REPORT = """<!DOCTYPE html PUBLIC "-//W3C//DTD HTML 4.01//EN"
+"http://www.w3.org/TR/html4/strict.dtd">
+<html>
+<head>
+<title> Building Name BUILDING ** Chicago Ohare Intl Ap IL USA TMY3 WMO#=725300
+  2017-01-01
+  12:00:00
+ - EnergyPlus</title>
+</head>
+<body>
+<p><a href="#toc" style="float: right">Table of Contents</a></p>
+<a name=top></a>
+<p>Program Version:<b>EnergyPlus, Version {version}</b></p>
+<p>Tabular Output Report in Format: <b>HTML</b></p>
+<p>Building: <b>BUILDING</b></p>
+<p>Environment: <b>RUN PERIOD 1 ** Chicago Ohare Intl Ap IL USA TMY3 WMO#=725300</b></p>
+<p>Simulation Timestamp: <b>2017-01-01
+  12:00:00</b></p>
+<hr>
+<p><a href="#toc" style="float: right">Table of Contents</a></p>
+<a name=AnnualBuildingUtilityPerformanceSummary::EntireFacility></a>
+<p>Report:<b> Annual Building Utility Performance Summary</b></p>
+<p>For:<b> Entire Facility</b></p>
+<p>Timestamp: <b>2017-01-01
+    12:00:00</b></p>
+<b>Site and Source Energy</b><br><br>
+<!-- FullName:Annual Building Utility Performance Summary_Entire Facility_Site and Source Energy-->
+<table border="1" cellpadding="4" cellspacing="0">
+  <tr><td></td>
+    <td align="right">Total Energy [kWh]</td>
+    <td align="right">Energy Per Total Building Area [kWh/m2]</td>
+    <td align="right">Energy Per Conditioned Building Area [kWh/m2]</td>
+  </tr>
+  <tr>
+    <td align="right">Total Site Energy</td>
+    <td align="right">  {site:.2f}</td>
+    <td align="right">      {site_area:.2f}</td>
+    <td align="right">      {site_area:.2f}</td>
+  </tr>
+  <tr>
+    <td align="right">Net Site Energy</td>
+    <td align="right">  {site:.2f}</td>
+    <td align="right">      {site_area:.2f}</td>
+    <td align="right">      {site_area:.2f}</td>
+  </tr>
+  <tr>
+    <td align="right">Total Source Energy</td>
+    <td align="right">  {source:.2f}</td>
+    <td align="right">      {source_area:.2f}</td>
+    <td align="right">      {source_area:.2f}</td>
+  </tr>
+</table>
+<br><br>
+<b>Building Area</b><br><br>
+<!-- FullName:Annual Building Utility Performance Summary_Entire Facility_Building Area-->
+<table border="1" cellpadding="4" cellspacing="0">
+  <tr><td></td>
+    <td align="right">Area [m2]</td>
+  </tr>
+  <tr>
+    <td align="right">Total Building Area</td>
+    <td align="right">     6871.30</td>
+  </tr>
+  <tr>
+    <td align="right">Net Conditioned Building Area</td>
+    <td align="right">     6871.30</td>
+  </tr>
+  <tr>
+    <td align="right">Unconditioned Building Area</td>
+    <td align="right">        0.00</td>
+  </tr>
+</table>
+<br><br>
+<hr>
+<p><a href="#toc" style="float: right">Table of Contents</a></p>
+<a name=InputVerificationandResultsSummary::EntireFacility></a>
+<p>Report:<b> Input Verification and Results Summary</b></p>
+<p>For:<b> Entire Facility</b></p>
+<p>Timestamp: <b>2017-01-01
+    12:00:00</b></p>
+<b>General</b><br><br>
+<!-- FullName:Input Verification and Results Summary_Entire Facility_General-->
+<table border="1" cellpadding="4" cellspacing="0">
+  <tr><td></td>
+    <td align="right">Value</td>
+  </tr>
+  <tr>
+    <td align="right">Program Version and Build</td>
+    <td align="right">EnergyPlus, Version {version}</td>
+  </tr>
+  <tr>
+    <td align="right">Weather File</td>
+    <td align="right">Chicago Ohare Intl Ap IL USA TMY3 WMO#=725300</td>
+  </tr>
+  <tr>
+    <td align="right">Number of Zones</td>
+    <td align="right">{zones}</td>
+  </tr>
+</table>
+<br><br>
+<hr>
+<p><a href="#toc" style="float: right">Table of Contents</a></p>
+<a name=ZONECOMPONENTLOADSUMMARY::CORE_ZN></a>
+<p>Report:<b> Zone Component Load Summary</b></p>
+<p>For:<b> CORE_ZN</b></p>
+<p>Timestamp: <b>2017-01-01
+    12:00:00</b></p>
+<b>Estimated Cooling Peak Load Components</b><br><br>
+<!-- FullName:Zone Component Load Summary_CORE_ZN_Estimated Cooling Peak Load Components-->
+<table border="1" cellpadding="4" cellspacing="0">
+  <tr><td></td>
+    <td align="right">Sensible - Instant [W]</td>
+    <td align="right">Latent [W]</td>
+  </tr>
+  <tr>
+    <td align="right">People</td>
+    <td align="right">     1234.56</td>
+    <td align="right">      617.28</td>
+  </tr>
+  <tr>
+    <td align="right">Lights</td>
+    <td align="right">      812.40</td>
+    <td align="right">&nbsp;</td>
+  </tr>
+  <tr>
+    <td align="right">&nbsp;</td>
+    <td align="right">&nbsp;</td>
+    <td align="right">&nbsp;</td>
+  </tr>
+</table>
+<br><br>
+</body>
+</html>
+"""
+
+ERR_TEMPLATE = """Program Version,EnergyPlus, Version {version}, YMD=2017.01.01 12:00,
+   ************* Testing Individual Branch Integrity
+   ************* All Branches passed integrity testing
+   ************* Beginning Simulation
+   ************* EnergyPlus Warmup Error Summary. During Warmup: 0 Warning; 0 Severe Errors.
+   ************* EnergyPlus Sizing Error Summary. During Sizing: 0 Warning; 0 Severe Errors.
+   ************* EnergyPlus Completed Successfully-- 0 Warning; 0 Severe Errors; Elapsed Time=00hr 00min  0.10sec
+"""
+
+ERR_WARNING = """   ** Warning ** GetSurfaceData: Surface="ZONE {i} WALL" has a tilt of 91.2 degrees.
+   **   ~~~   ** Surface tilts less than 60 or greater than 120 degrees are not walls.
+"""
+
+ERR_FAILED = """Program Version,EnergyPlus, Version {version}, YMD=2017.01.01 12:00,
+   ** Severe  ** IP: IDF line~1 Did not find "FAKE_EPLUS_FAIL" in list of Objects
+   **  Fatal  ** IP: Errors occurred on processing input file. Preceding condition(s) cause termination.
+   ************* EnergyPlus Terminated--Fatal Error Detected. 0 Warning; 1 Severe Errors; Elapsed Time=00hr 00min  0.05sec
+"""
+
+ERR_DIVERGE = """Program Version,EnergyPlus, Version {version}, YMD=2017.01.01 12:00,
+   ** Warning ** CheckWarmupConvergence: Loads Initialization, Zone="CORE_ZN" did not converge after 25 warmup days.
+   ** Severe  ** CalcHeatBalanceInsideSurf: The temperature of an inside surface diverged.
+"""
+
+ESO_DICT = """Program Version,EnergyPlus, Version {version}, YMD=2017.01.01 12:00
+1,5,Environment Title[],Latitude[deg],Longitude[deg],Time Zone[],Elevation[m]
+2,8,Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],Hour[],StartMinute[],EndMinute[],DayType
+3,5,Cumulative Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],DayType  ! When Daily Report Variables Requested
+4,2,Cumulative Days of Simulation[],Month[]  ! When Monthly Report Variables Requested
+5,1,Cumulative Days of Simulation[] ! When Run Period Report Variables Requested
+7,1,Environment,Site Outdoor Air Drybulb Temperature [C] !Hourly
+8,1,CORE_ZN,Zone Mean Air Temperature [C] !Hourly
+9,1,PERIMETER_ZN_1,Zone Mean Air Temperature [C] !Hourly
+10,7,CORE_ZN,Zone Air System Sensible Heating Energy [J] !Daily [Value,Min,Hour,Minute,Max,Hour,Minute]
+End of Data Dictionary
+"""
+
+MTR_DICT = """Program Version,EnergyPlus, Version {version}, YMD=2017.01.01 12:00
+1,5,Environment Title[],Latitude[deg],Longitude[deg],Time Zone[],Elevation[m]
+2,8,Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],Hour[],StartMinute[],EndMinute[],DayType
+3,5,Cumulative Day of Simulation[],Month[],Day of Month[],DST Indicator[1=yes 0=no],DayType  ! When Daily Report Variables Requested
+4,2,Cumulative Days of Simulation[],Month[]  ! When Monthly Report Variables Requested
+5,1,Cumulative Days of Simulation[] ! When Run Period Report Variables Requested
+13,1,Electricity:Facility [J] !Hourly
+End of Data Dictionary
+"""
+
+ENVIRONMENT = (
+    "1,RUN PERIOD 1 ** Chicago Ohare Intl Ap IL USA TMY3 WMO#=725300,"
+    "  41.98, -87.92,  -6.00, 201.00\n"
+)
+
+DAYTYPES = [
+    "Sunday",
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+]
+
+
+def _records(n_hours):
+    for i in range(n_hours):
+        day, hour = divmod(i, 24)
+        yield i, day + 1, hour + 1
+
+
+def _outdoor(i):
+    return -5.0 + (i % 24) * 0.5
+
+
+def _zone(i, offset):
+    return 20.0 + offset + (i % 24) * 0.1
+
+
+def _electricity(i):
+    return 1.0e6 + (i % 24) * 1.0e4
+
+
+def _stamp(day, hour):
+    return f" 01/{day:02d}  {hour:02d}:00:00"
+
+
+def write_eso(n_hours):
+    with open("eplus.eso", "w") as f:
+        f.write(ESO_DICT.format(version=VERSION))
+        f.write(ENVIRONMENT)
+        for i, day, hour in _records(n_hours):
+            f.write(
+                f"2,{day},1,{day}, 0,{hour}, 0.00,60.00,{DAYTYPES[(day - 1) % 7]}\n"
+            )
+            f.write(f"7,{_outdoor(i)}\n")
+            f.write(f"8,{_zone(i, 0.0)}\n")
+            f.write(f"9,{_zone(i, 1.0)}\n")
+            if hour == 24 or i == n_hours - 1:
+                f.write(f"3,{day},1,{day}, 0,{DAYTYPES[(day - 1) % 7]}\n")
+                f.write(f"10,{1000.0 * day},0.0,1,60,{2000.0 * day},12,60\n")
+        f.write("End of Data\n")
+        f.write(f" Number of Records Written={5 * n_hours}\n")
+
+
+def write_mtr(n_hours):
+    with open("eplus.mtr", "w") as f:
+        f.write(MTR_DICT.format(version=VERSION))
+        f.write(ENVIRONMENT)
+        for i, day, hour in _records(n_hours):
+            f.write(
+                f"2,{day},1,{day}, 0,{hour}, 0.00,60.00,{DAYTYPES[(day - 1) % 7]}\n"
+            )
+            f.write(f"13,{_electricity(i)}\n")
+        f.write("End of Data\n")
+        f.write(f" Number of Records Written={2 * n_hours}\n")
+
+
+def write_csv(n_hours):
+    with open("eplus.csv", "w") as f:
+        f.write(
+            "Date/Time,"
+            "Environment:Site Outdoor Air Drybulb Temperature [C](Hourly),"
+            "CORE_ZN:Zone Mean Air Temperature [C](Hourly),"
+            "PERIMETER_ZN_1:Zone Mean Air Temperature [C](Hourly)\n"
+        )
+        for i, day, hour in _records(n_hours):
+            f.write(
+                f"{_stamp(day, hour)},{_outdoor(i)},{_zone(i, 0.0)},{_zone(i, 1.0)}\n"
+            )
+    with open("eplus-meter.csv", "w") as f:
+        f.write("Date/Time,Electricity:Facility [J](Hourly)\n")
+        for i, day, hour in _records(n_hours):
+            f.write(f"{_stamp(day, hour)},{_electricity(i)}\n")
+
+
+SQL_SCHEMA = """
+CREATE TABLE Time (
+    TimeIndex INTEGER PRIMARY KEY, Year INTEGER, Month INTEGER, Day INTEGER,
+    Hour INTEGER, Minute INTEGER, Dst INTEGER, Interval INTEGER,
+    IntervalType INTEGER, SimulationDays INTEGER, DayType TEXT,
+    EnvironmentPeriodIndex INTEGER, WarmupFlag INTEGER
+);
+CREATE TABLE ReportDataDictionary (
+    ReportDataDictionaryIndex INTEGER PRIMARY KEY, IsMeter INTEGER, Type TEXT,
+    IndexGroup TEXT, TimestepType TEXT, KeyValue TEXT, Name TEXT,
+    ReportingFrequency TEXT, ScheduleName TEXT, Units TEXT
+);
+CREATE TABLE ReportData (
+    ReportDataIndex INTEGER PRIMARY KEY, TimeIndex INTEGER,
+    ReportDataDictionaryIndex INTEGER, Value REAL
+);
+CREATE TABLE Strings (
+    StringIndex INTEGER PRIMARY KEY, StringTypeIndex INTEGER, Value TEXT
+);
+CREATE TABLE TabularData (
+    TabularDataIndex INTEGER PRIMARY KEY, ReportNameIndex INTEGER,
+    ReportForStringIndex INTEGER, TableNameIndex INTEGER, RowLabelIndex INTEGER,
+    ColumnLabelIndex INTEGER, UnitsIndex INTEGER, SimulationIndex INTEGER,
+    RowId INTEGER, ColumnId INTEGER, Value TEXT
+);
+"""
+
+SQL_VARIABLES = [
+    (7, 0, "Environment", "Site Outdoor Air Drybulb Temperature", "C"),
+    (8, 0, "CORE_ZN", "Zone Mean Air Temperature", "C"),
+    (9, 0, "PERIMETER_ZN_1", "Zone Mean Air Temperature", "C"),
+    (13, 1, "", "Electricity:Facility", "J"),
+]
+
+SQL_TABLES = [
+    (
+        "AnnualBuildingUtilityPerformanceSummary",
+        "Entire Facility",
+        "Site and Source Energy",
+        ["Total Site Energy", "Net Site Energy"],
+        [("Total Energy", "kWh"), ("Energy Per Total Building Area", "kWh/m2")],
+    ),
+    (
+        "InputVerificationandResultsSummary",
+        "Entire Facility",
+        "General",
+        ["Program Version and Build", "Number of Zones"],
+        [("Value", "")],
+    ),
+]
+
+
+def write_sql(n_hours, idf_str):
+    if os.path.exists("eplus.sql"):
+        os.remove("eplus.sql")
+    site = 1000.0 + len(idf_str) % 1000
+    with sqlite3.connect("eplus.sql") as con:
+        con.executescript(SQL_SCHEMA)
+        con.executemany(
+            "INSERT INTO Time VALUES (?, 2017, 1, ?, ?, 0, 0, 60, 1, ?, ?, 1, 0)",
+            [
+                (i + 1, day, hour, day, DAYTYPES[(day - 1) % 7])
+                for i, day, hour in _records(n_hours)
+            ],
+        )
+        con.executemany(
+            "INSERT INTO ReportDataDictionary"
+            " VALUES (?, ?, 'Avg', 'Zone', 'Zone', ?, ?, 'Hourly', '', ?)",
+            SQL_VARIABLES,
+        )
+        values = {7: _outdoor, 8: lambda i: _zone(i, 0.0), 9: lambda i: _zone(i, 1.0)}
+        values[13] = _electricity
+        con.executemany(
+            "INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value)"
+            " VALUES (?, ?, ?)",
+            [
+                (i + 1, var_index, values[var_index](i))
+                for i, _, _ in _records(n_hours)
+                for var_index, *_ in SQL_VARIABLES
+            ],
+        )
+        strings = {}
+
+        def string_index(value):
+            if value not in strings:
+                strings[value] = len(strings) + 1
+                con.execute(
+                    "INSERT INTO Strings VALUES (?, 1, ?)", (strings[value], value)
+                )
+            return strings[value]
+
+        for report, for_, table, rows, columns in SQL_TABLES:
+            for row_id, row in enumerate(rows):
+                for column_id, (column, units) in enumerate(columns):
+                    if table == "General":
+                        value = {
+                            "Program Version and Build": (
+                                f"EnergyPlus, Version {VERSION}"
+                            ),
+                            "Number of Zones": str(idf_str.count("Zone,")),
+                        }[row]
+                    else:
+                        value = f"{site / (1 + 6870.3 * column_id):.2f}"
+                    con.execute(
+                        "INSERT INTO TabularData (ReportNameIndex,"
+                        " ReportForStringIndex, TableNameIndex, RowLabelIndex,"
+                        " ColumnLabelIndex, UnitsIndex, SimulationIndex, RowId,"
+                        " ColumnId, Value) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?)",
+                        (
+                            string_index(report),
+                            string_index(for_),
+                            string_index(table),
+                            string_index(row),
+                            string_index(column),
+                            string_index(units),
+                            row_id,
+                            column_id,
+                            value,
+                        ),
+                    )
+
+
+def _extra_report(i_report, n_tables=5, n_rows=30, n_cols=6):
+    lines = [
+        "<hr>",
+        f"<p>Report:<b> Synthetic Report {i_report}</b></p>",
+        f"<p>For:<b> ZONE {i_report}</b></p>",
+        "<p>Timestamp: <b>2017-01-01\n    12:00:00</b></p>",
+    ]
+    for i_table in range(n_tables):
+        lines.append(f"<b>Table {i_table}</b><br><br>")
+        lines.append('<table border="1" cellpadding="4" cellspacing="0">')
+        lines.append("  <tr><td></td>")
+        lines.extend(
+            f'    <td align="right">Column {i_col} [kWh]</td>'
+            for i_col in range(n_cols)
+        )
+        lines.append("  </tr>")
+        for i_row in range(n_rows):
+            lines.append(f'  <tr>\n    <td align="right">Row {i_row}</td>')
+            values = (
+                i_report * 1000.0 + i_row * 10.0 + i_col for i_col in range(n_cols)
+            )
+            lines.extend(
+                f'    <td align="right">{value:12.2f}</td>' for value in values
+            )
+            lines.append("  </tr>")
+        lines.append("</table>\n<br><br>")
+    return "\n".join(lines) + "\n"
+
+
+def write_html(idf_str, n_reports=0):
+    zones = idf_str.count("Zone,")
+    site = 1000.0 + len(idf_str) % 1000
+    report = HTML_REPORT.format(
+        version=VERSION,
+        site=site,
+        site_area=site / 6871.3,
+        source=3 * site,
+        source_area=3 * site / 6871.3,
+        zones=zones,
+    )
+    body, end = report.rsplit("</body>", 1)
+    with open("eplus-table.htm", "w") as f:
+        f.write(body)
+        for i_report in range(n_reports):
+            f.write(_extra_report(i_report))
+        f.write(f"</body>{end}")
+
+
+def main(argv):
+    if "-v" in argv or "--version" in argv:
+        print(f"EnergyPlus, Version {VERSION}-78a111df4a, YMD=2017.01.01 12:00")
+        return 0
+
+    calls = os.environ.get("FAKE_EPLUS_CALLS")
+    if calls:
+        with open(calls, "a") as f:
+            f.write(" ".join(argv) + "\n")
+
+    idf_file = argv[-1]
+    with open(idf_file) as f:
+        idf_str = f.read()
+
+    print("EnergyPlus Starting")
+    print(f"EnergyPlus, Version {VERSION}-78a111df4a, YMD=2017.01.01 12:00")
+    if "FAKE_EPLUS_FAIL" in idf_str:
+        with open("eplus.err", "w") as f:
+            f.write(ERR_FAILED.format(version=VERSION))
+        print("EnergyPlus Terminated--Error(s) Detected.")
+        return 1
+
+    if "FAKE_EPLUS_DIVERGE" in idf_str:
+        with open("eplus.err", "w") as f:
+            f.write(ERR_DIVERGE.format(version=VERSION))
+        time.sleep(3600)
+
+    time.sleep(float(os.environ.get("FAKE_EPLUS_SLEEP", 0)))
+    spin_end = time.monotonic() + float(os.environ.get("FAKE_EPLUS_SPIN", 0))
+    while time.monotonic() < spin_end:
+        pass
+    n_hours = int(os.environ.get("FAKE_EPLUS_HOURS", 48))
+    write_html(idf_str, int(os.environ.get("FAKE_EPLUS_REPORTS", 0)))
+    write_eso(n_hours)
+    write_mtr(n_hours)
+    if "-r" in argv:
+        write_csv(n_hours)
+    if re.search(r"^\s*Output:SQLite\s*,", idf_str, flags=re.MULTILINE | re.I):
+        write_sql(n_hours, idf_str)
+    with open("eplus.err", "w") as f:
+        f.write(ERR_TEMPLATE.format(version=VERSION))
+        for i in range(int(os.environ.get("FAKE_EPLUS_WARNINGS", 0))):
+            f.write(ERR_WARNING.format(i=i))
+    print("EnergyPlus Completed Successfully.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+from path import Path
+from plumbum import ProcessExecutionError
+
+from energyplus_wrapper import EPlusRunner, OutputSelection
+
+
+@pytest.fixture
+def runner(fake_eplus_root):
+    return EPlusRunner(fake_eplus_root)
+
+
+def test_run_one_async(runner, idf_file, epw_file):
+    sim = asyncio.run(runner.run_one_async(idf_file, epw_file, backup_strategy=None))
+    assert sim.status == "finished"
+    assert "EnergyPlus Completed Successfully" in sim.log
+    assert sim.time_series["eplus"].shape == (48, 4)
+    assert not sim.working_dir.exists()
+
+
+def test_run_one_async_failed(fake_eplus_root, idf_file, epw_file, tmp_path):
+    failing_idf_file = Path(tmp_path) / "failing.idf"
+    failing_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_FAIL;\n")
+    temp_dir = Path(tmp_path).joinpath("runs").mkdir_p()
+    started, ended = [], []
+    runner = EPlusRunner(
+        fake_eplus_root,
+        temp_dir=temp_dir,
+        on_start=started.append,
+        on_end=ended.append,
+    )
+    with pytest.raises(ProcessExecutionError):
+        asyncio.run(
+            runner.run_one_async(
+                failing_idf_file,
+                epw_file,
+                simulation_name="failed",
+                backup_dir=Path(tmp_path) / "backup",
+            )
+        )
+    assert started == ["failed"]
+    (sim,) = ended
+    assert sim.status == "failed"
+    # as with run_one, the working directory is kept
+    assert temp_dir.dirs() == [sim.working_dir]
+    assert {"inputs", "setup", "eplus", "backup", "total"} <= sim.timings.keys()
+
+
+
+def test_run_one_async_invalid_inputs(fake_eplus_root, epw_file, tmp_path):
+    ended = []
+    runner = EPlusRunner(fake_eplus_root, on_end=ended.append)
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(
+            runner.run_one_async(
+                Path(tmp_path) / "missing.idf",
+                epw_file,
+                simulation_name="invalid",
+                backup_strategy=None,
+            )
+        )
+    assert ended == ["invalid"]
+
+def test_run_one_async_cancel(runner, idf_file, epw_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_EPLUS_SLEEP", "30")
+    backup_dir = Path(tmp_path) / "backup"
+
+    async def cancelled_run():
+        task = asyncio.ensure_future(
+            runner.run_one_async(
+                idf_file, epw_file, backup_dir=backup_dir, simulation_name="sim"
+            )
+        )
+        await asyncio.sleep(1)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(asyncio.wait_for(cancelled_run(), 10))
+    assert (backup_dir / "interrupted_sim").isdir()
+
+
+def test_run_many_async(runner, idf_file, epw_file):
+    async def collect():
+        return {
+            key: sim
+            async for key, sim in runner.run_many_async(
+                ((i, idf_file) for i in range(5)),
+                epw_file=epw_file,
+                backup_strategy=None,
+                output_selection=OutputSelection(time_series=["meter"]),
+                max_concurrency=2,
+            )
+        }
+
+    sims = asyncio.run(collect())
+    assert sims.keys() == set(range(5))
+    assert all(list(sim.time_series) == ["meter"] for sim in sims.values())
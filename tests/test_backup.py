@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import joblib
+import pytest
+from path import Path
+from plumbum import ProcessExecutionError
+
+from energyplus_wrapper import BackupArchive, EPlusRunner, StagingArea
+from energyplus_wrapper import backup as backup_module
+
+
+def _formats():
+    formats = []
+    for backup_format in backup_module.backup_formats:
+        marks = []
+        if backup_format == "zst" and backup_module.zstandard is None:
+            marks = [pytest.mark.skip(reason="zstandard is not installed")]
+        formats.append(pytest.param(backup_format, marks=marks))
+    return formats
+
+
+@pytest.mark.parametrize("backup_format", _formats())
+def test_backup_archives(fake_eplus_root, idf_file, epw_file, tmp_path, backup_format):
+    archive = BackupArchive(Path(tmp_path) / "backup", format=backup_format)
+    runner = EPlusRunner(fake_eplus_root)
+    samples = {f"sim_{i}": idf_file for i in range(3)}
+    with joblib.parallel_backend("loky", n_jobs=2):
+        runner.run_many(samples, epw_file, backup_strategy="always", backup_dir=archive)
+
+    assert [file.name for file in archive.archives()] == [
+        f"finished_sim_{i}{archive.suffix}" for i in range(3)
+    ]
+    # the weather file is stored once
+    assert len(list(archive.blobs_dir.walkfiles())) == 1
+
+    restored = archive.restore("finished_sim_1", Path(tmp_path) / "restored")
+    assert (restored / "in.epw").read_bytes() == epw_file.read_bytes()
+    assert (restored / "eplus.csv").exists()
+    assert (restored / "eplus-table.htm").exists()
+    assert not (restored / backup_module.manifest_name).exists()
+    assert (restored / "in_8-7-0.idf").read_text() == idf_file.read_text()
+
+
+def test_backup_on_error(fake_eplus_root, idf_file, epw_file, tmp_path):
+    failing_idf_file = Path(tmp_path) / "failing.idf"
+    failing_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_FAIL;\n")
+    archive = BackupArchive(Path(tmp_path) / "backup", format="gz")
+    runner = EPlusRunner(fake_eplus_root)
+    with pytest.raises(ProcessExecutionError):
+        runner.run_one(
+            failing_idf_file, epw_file, backup_dir=archive, simulation_name="sim"
+        )
+    restored = archive.restore(
+        archive.archive_file("failed_sim"), Path(tmp_path) / "restored"
+    )
+    assert "Severe" in (restored / "eplus.err").read_text()
+
+
+def test_asynchronous_backup(fake_eplus_root, idf_file, epw_file, tmp_path):
+    archive = BackupArchive(Path(tmp_path) / "backup", asynchronous=True)
+    runner = EPlusRunner(fake_eplus_root)
+    for i in range(3):
+        runner.run_one(
+            idf_file,
+            epw_file,
+            backup_strategy="always",
+            backup_dir=archive,
+            simulation_name=f"sim_{i}",
+        )
+    archive.wait(timeout=60)
+    assert archive.pending() == 0
+    assert len(archive.archives()) == 3
+    restored = archive.restore("finished_sim_2", Path(tmp_path) / "restored")
+    assert (restored / "in.epw").read_bytes() == epw_file.read_bytes()
+
+
+def test_flush(fake_eplus_root, idf_file, epw_file, tmp_path, monkeypatch):
+    class CrashedExecutor:
+        def submit(self, *args):
+            pass
+
+    monkeypatch.setattr(backup_module, "_background_executor", CrashedExecutor)
+    archive = BackupArchive(Path(tmp_path) / "backup", asynchronous=True)
+    runner = EPlusRunner(fake_eplus_root)
+    runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy="always",
+        backup_dir=archive,
+        simulation_name="sim",
+    )
+    assert archive.pending() == 1
+    assert archive.archives() == []
+    assert archive.flush() == 1
+    assert archive.pending() == 0
+    assert archive.archives() == [archive.archive_file("finished_sim")]
+
+
+def test_staged_extra_files(fake_eplus_root, idf_file, epw_file, tmp_path):
+    schedule = Path(tmp_path) / "schedule.csv"
+    schedule.write_text("hour,value\n" + "".join(f"{i},1\n" for i in range(8760)))
+    archive = BackupArchive(Path(tmp_path) / "backup", format="zip")
+    runner = EPlusRunner(fake_eplus_root, staging="hardlink")
+    samples = {f"sim_{i}": idf_file for i in range(2)}
+    runner.run_many(samples, epw_file, backup_strategy="always", backup_dir=archive)
+    runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy="always",
+        backup_dir=archive,
+        extra_files=[schedule],
+        simulation_name="with_schedule",
+        staging_area=StagingArea(Path(tmp_path) / "staging"),
+    )
+    # the inputs staged as hard links: weather file, idf and schedule
+    assert len(list(archive.blobs_dir.walkfiles())) == 3
+    restored = archive.restore("finished_with_schedule", Path(tmp_path) / "restored")
+    assert (restored / "schedule.csv").read_text() == schedule.read_text()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from functools import partial
+
+import joblib
+
+from energyplus_wrapper import EPlusRunner, OutputSelection, ResultCache, Simulation
+from energyplus_wrapper.cache import _callable_fingerprint
+
+
+def test_cache_hit(fake_eplus_root, idf_file, epw_file, eplus_calls, tmp_path):
+    runner = EPlusRunner(fake_eplus_root, cache=ResultCache(tmp_path / "cache"))
+    sim = runner.run_one(idf_file, epw_file, backup_strategy=None)
+    cached_sim = runner.run_one(
+        idf_file, epw_file, backup_strategy=None, simulation_name="cached"
+    )
+    assert eplus_calls() == 1
+    assert cached_sim.name == "cached"
+    assert cached_sim.status == "finished"
+    assert cached_sim.log == sim.log
+    assert cached_sim.reports.keys() == sim.reports.keys()
+    assert cached_sim.time_series["eplus"].equals(sim.time_series["eplus"])
+
+
+def test_cache_miss_on_changed_input(
+    fake_eplus_root, idf_file, epw_file, eplus_calls, tmp_path
+):
+    runner = EPlusRunner(fake_eplus_root, cache=ResultCache(tmp_path / "cache"))
+    modified_idf = tmp_path / "modified.idf"
+    modified_idf.write_text(idf_file.read_text() + "\n! a comment\n")
+    runner.run_one(idf_file, epw_file, backup_strategy=None)
+    runner.run_one(modified_idf, epw_file, backup_strategy=None)
+    runner.run_one(
+        idf_file, epw_file, backup_strategy=None, custom_process=lambda sim: None
+    )
+    assert eplus_calls() == 3
+
+
+def test_cache_eviction(fake_eplus_root, idf_file, epw_file, tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_age=3600)
+    runner = EPlusRunner(fake_eplus_root, cache=cache)
+    runner.run_one(idf_file, epw_file, backup_strategy=None)
+    (entry,) = cache.entries()
+    cache.max_size = entry.size - 1
+    cache.evict()
+    assert not cache.entries()
+
+    cache.max_size = None
+    runner.run_one(idf_file, epw_file, backup_strategy=None)
+    (entry,) = cache.entries()
+    cache.max_age = 10
+    entry.utime((time.time() - 60, time.time() - 60))
+    key = runner.cache_key(idf_file, epw_file)
+    assert key not in cache
+    cache.evict()
+    assert not cache.entries()
+
+
+def test_run_many_collapse_duplicates(
+    fake_eplus_root, idf_file, epw_file, eplus_calls, tmp_path
+):
+    runner = EPlusRunner(fake_eplus_root, cache=ResultCache(tmp_path / "cache"))
+    samples = {key: (idf_file, epw_file) for key in range(4)}
+    with joblib.parallel_backend("loky", n_jobs=2):
+        sims = runner.run_many(samples, backup_strategy=None)
+    assert eplus_calls() == 1
+    assert list(sims.keys()) == list(range(4))
+    assert [sim.name for sim in sims.values()] == list(range(4))
+
+
+def _scaled(sim, factor):
+    sim.scaled = factor
+
+
+def _make_process(factor):
+    def process(sim):
+        sim.scaled = factor
+
+    return process
+
+
+def test_callable_fingerprint():
+    assert _callable_fingerprint(partial(_scaled, factor=2)) == _callable_fingerprint(
+        partial(_scaled, factor=2)
+    )
+    assert _callable_fingerprint(partial(_scaled, factor=2)) != _callable_fingerprint(
+        partial(_scaled, factor=3)
+    )
+    # same qualname, different closure or code
+    assert _callable_fingerprint(_make_process(2)) != _callable_fingerprint(
+        _make_process(3)
+    )
+    processes = [lambda sim: None, lambda sim: sim.summary]
+    assert _callable_fingerprint(processes[0]) != _callable_fingerprint(processes[1])
+    assert _callable_fingerprint(OutputSelection(reports=[])) == (
+        _callable_fingerprint(OutputSelection(reports=[]))
+    )
+    # a closure over an object that cannot be identified
+    lock = threading.Lock()
+    assert _callable_fingerprint(lambda sim: lock) is None
+
+
+def test_unidentified_process_not_cached(
+    fake_eplus_root, idf_file, epw_file, eplus_calls, tmp_path
+):
+    runner = EPlusRunner(fake_eplus_root, cache=ResultCache(tmp_path / "cache"))
+    lock = threading.Lock()
+
+    def process(sim):
+        with lock:
+            sim.processed = True
+
+    for _ in range(2):
+        sim = runner.run_one(
+            idf_file, epw_file, backup_strategy=None, custom_process=process
+        )
+        assert sim.processed
+    assert eplus_calls() == 2
+    assert not runner.cache.entries()
+
+
+def test_cache_size_tracking(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "cache", max_size=20_000)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: scans.append(1) or evict())
+    sim = Simulation("sim", "energyplus", "in.idf", "in.epw", "Energy+.idd", tmp_path)
+    sim.status = "finished"
+    for i in range(100):
+        sim.reports = {"value": "x" * 900 + str(i)}
+        cache.store(f"{i:064x}", sim)
+    assert sum(entry.size for entry in cache.entries()) <= cache.max_size
+    # the cache is only scanned when it gets full, and trimmed below its maximum
+    # size, rather than for every entry
+    assert 1 < len(scans) < 25
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import io
+import platform
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from path import Path
+
+from energyplus_wrapper import ensure_eplus_root, env_manager
+from energyplus_wrapper.env_manager import fetch_installer
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux", reason="ensure_eplus_root is linux only"
+)
+
+archive_name = "EnergyPlus-9.0.1-bb7ca4f0da-Linux-x86_64.tar.gz"
+
+
+def _archive():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in [
+            ("energyplus", b"#!/bin/sh\n"),
+            ("Energy+.idd", b"!IDD_Version 9.0.1\n" + b"!" * 4096 + b"\n"),
+        ]:
+            info = tarfile.TarInfo(f"EnergyPlus-9.0.1-bb7ca4f0da-Linux-x86_64/{name}")
+            info.size = len(content)
+            info.mode = 0o755
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.server.requests.append(("HEAD", self.path, None))
+        self.send_response(405)
+        self.end_headers()
+
+    def do_GET(self):
+        content = self.server.files.get(self.path.lstrip("/"))
+        self.server.requests.append(("GET", self.path, self.headers.get("Range")))
+        if content is None:
+            self.send_error(404)
+            return
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"][len("bytes=") :].rstrip("-"))
+            if start >= len(content):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", self.server.content_type)
+        self.send_header("Content-Length", str(len(content) - start))
+        self.end_headers()
+        if self.server.truncated:
+            # the connection drops in the middle of the body
+            self.server.truncated -= 1
+            self.wfile.write(content[start : (start + len(content)) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(content[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.files = {archive_name: _archive()}
+    server.requests = []
+    server.content_type = "application/octet-stream"
+    server.truncated = 0
+    server.url = f"http://127.0.0.1:{server.server_port}/{archive_name}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_and_extract(server, tmp_path):
+    cache = Path(tmp_path) / "installers"
+    sha256 = hashlib.sha256(server.files[archive_name]).hexdigest()
+    root = ensure_eplus_root(
+        server.url, Path(tmp_path) / "eplus", installer_cache=cache, sha256=sha256
+    )
+    assert root == Path(tmp_path) / "eplus" / "EnergyPlus-9-0-1"
+    assert sorted(f.name for f in root.files()) == ["Energy+.idd", "energyplus"]
+    assert (cache / archive_name).read_bytes() == server.files[archive_name]
+    assert (cache / f"{archive_name}.sha256").read_text() == sha256
+
+    # the installer cache is shared by the install folders
+    other_root = ensure_eplus_root(
+        server.url, Path(tmp_path) / "other", installer_cache=cache
+    )
+    assert other_root.files()
+    assert [method for method, *_ in server.requests] == ["GET"]
+
+
+def test_resume_download(server, tmp_path):
+    content = server.files[archive_name]
+    cache = Path(tmp_path).joinpath("installers").mkdir_p()
+    half = len(content) // 2
+    (cache / f"{archive_name}.part").write_bytes(content[:half])
+    installer = fetch_installer(server.url, installer_cache=cache)
+    assert installer.read_bytes() == content
+    assert server.requests == [("GET", f"/{archive_name}", f"bytes={half}-")]
+    assert not (cache / f"{archive_name}.part").exists()
+
+
+def test_interrupted_download(server, tmp_path, monkeypatch):
+    # small chunks: what was received before the drop is kept
+    monkeypatch.setattr(env_manager, "_chunk_size", 1)
+    content = server.files[archive_name]
+    cache = Path(tmp_path) / "installers"
+    server.truncated = 2
+    installer = fetch_installer(server.url, installer_cache=cache)
+    assert installer.read_bytes() == content
+    half = len(content) // 2
+    three_quarters = (half + len(content)) // 2
+    assert [range_ for _, _, range_ in server.requests] == [
+        None,
+        f"bytes={half}-",
+        f"bytes={three_quarters}-",
+    ]
+
+def test_checksum_mismatch(server, tmp_path):
+    cache = Path(tmp_path) / "installers"
+    with pytest.raises(ValueError, match="sha256"):
+        fetch_installer(server.url, installer_cache=cache, sha256="0" * 64)
+    assert [f.name for f in cache.files()] == [f"{archive_name}.lock"]
+
+
+def test_not_downloadable(server, tmp_path):
+    server.content_type = "text/html"
+    with pytest.raises(ValueError, match="not a downloadable"):
+        fetch_installer(server.url, installer_cache=Path(tmp_path) / "installers")
+
+
+def test_offline(server, tmp_path):
+    mirror = Path(tmp_path).joinpath("mirror").mkdir_p()
+    (mirror / archive_name).write_bytes(server.files[archive_name])
+    root = ensure_eplus_root(
+        server.url,
+        Path(tmp_path) / "eplus",
+        installer_cache=Path(tmp_path) / "installers",
+        mirror=mirror,
+        offline=True,
+    )
+    assert root.files()
+    # from a local archive
+    root = ensure_eplus_root(mirror / archive_name, Path(tmp_path) / "local")
+    assert root.files()
+    assert server.requests == []
+
+    with pytest.raises(FileNotFoundError):
+        fetch_installer(
+            server.url, installer_cache=Path(tmp_path) / "installers", offline=True
+        )
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import pandas as pd
+import pytest
+from path import Path
+from plumbum import local
+
+from energyplus_wrapper import EPlusRunner, OutputSelection
+from energyplus_wrapper.eso import read_eso
+from energyplus_wrapper.utils import read_time_series
+
+zone_temperature = "CORE_ZN:Zone Mean Air Temperature [C](Hourly)"
+heating = "CORE_ZN:Zone Air System Sensible Heating Energy [J](Daily)"
+
+
+@pytest.fixture
+def runner(fake_eplus_root):
+    return EPlusRunner(fake_eplus_root, output_backend="eso")
+
+
+@pytest.fixture
+def outputs(fake_eplus_root, idf_file, epw_file, tmp_path):
+    with local.cwd(tmp_path):
+        local[fake_eplus_root / "energyplus"]("-r", "-w", epw_file, idf_file)
+    return Path(tmp_path)
+
+
+def test_read_eso(outputs):
+    time_series = read_eso(outputs / "eplus.eso")
+    assert sorted(time_series.keys()) == ["eplus_daily", "eplus_hourly"]
+    pd.testing.assert_frame_equal(
+        time_series["eplus_hourly"], read_time_series(outputs / "eplus.csv")
+    )
+    daily = time_series["eplus_daily"]
+    assert list(daily.columns) == ["Date/Time", heating]
+    assert daily["Date/Time"].tolist() == [" 01/01", " 01/02"]
+    assert daily[heating].tolist() == [1000.0, 2000.0]
+
+    meters = read_eso(outputs / "eplus.mtr", prefix="meter")
+    pd.testing.assert_frame_equal(
+        meters["meter_hourly"], read_time_series(outputs / "eplus-meter.csv")
+    )
+
+
+def test_read_eso_variables(outputs):
+    time_series = read_eso(
+        outputs / "eplus.eso", variables=["CORE_ZN:Zone Mean Air Temperature"]
+    )
+    assert list(time_series.keys()) == ["eplus_hourly"]
+    assert list(time_series["eplus_hourly"].columns) == ["Date/Time", zone_temperature]
+
+    time_series = read_eso(
+        outputs / "eplus.eso", variables=["Zone Mean Air Temperature"]
+    )
+    assert time_series["eplus_hourly"].shape == (48, 3)
+
+
+def test_eso_backend(runner, idf_file, epw_file, fake_eplus_root):
+    sim = runner.run_one(idf_file, epw_file, backup_strategy=None)
+    assert "-r" not in (fake_eplus_root.parent / "calls.log").read_text().split()
+    assert "Site and Source Energy" in sim.reports[
+        "Annual_Building_Utility_Performance_Summary_for_Entire_Facility"
+    ]
+    assert sorted(sim.time_series.keys()) == [
+        "eplus_daily",
+        "eplus_hourly",
+        "meter_hourly",
+    ]
+    assert sim.time_series["eplus_hourly"].shape == (48, 4)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_eso_output_selection(runner, idf_file, epw_file, lazy):
+    sim = runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy=None,
+        output_selection=OutputSelection(
+            reports=["General"],
+            time_series={"eplus_hourly": [zone_temperature]},
+            lazy=lazy,
+        ),
+    )
+    sim = pickle.loads(pickle.dumps(sim))
+    assert list(sim.time_series.keys()) == ["eplus_hourly"]
+    assert list(sim.time_series["eplus_hourly"].columns) == [
+        "Date/Time",
+        zone_temperature,
+    ]
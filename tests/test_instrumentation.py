@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+
+import joblib
+import pytest
+from loguru import logger
+from path import Path
+from plumbum import ProcessExecutionError
+
+from energyplus_wrapper import BatchStats, EPlusRunner, ResultCache
+
+
+def test_run_one_timings(fake_eplus_root, idf_file, epw_file):
+    runner = EPlusRunner(fake_eplus_root)
+    sim = runner.run_one(idf_file, epw_file, backup_strategy=None)
+    assert {"inputs", "setup", "eplus", "post_process", "cleanup", "total"} <= set(
+        sim.timings
+    )
+    assert sim.timings["eplus"] > 0
+    assert sim.timings["total"] >= sum(
+        duration for phase, duration in sim.timings.items() if phase != "total"
+    )
+    assert "EnergyPlus Completed Successfully" in sim.log
+    if sys.platform.startswith("linux"):
+        # the fake EnergyPlus is a python interpreter: a few MiB at least
+        assert sim.peak_rss > 2 ** 20
+
+
+def test_cached_timings(fake_eplus_root, idf_file, epw_file, tmp_path):
+    runner = EPlusRunner(fake_eplus_root, cache=ResultCache(Path(tmp_path) / "cache"))
+    runner.run_one(idf_file, epw_file, backup_strategy=None)
+    sim = runner.run_one(idf_file, epw_file, backup_strategy=None)
+    assert "cache" in sim.timings
+    assert "eplus" not in sim.timings
+    assert sim.peak_rss is None
+
+
+def test_hooks_and_events(fake_eplus_root, idf_file, epw_file, tmp_path):
+    failing_idf_file = Path(tmp_path) / "failing.idf"
+    failing_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_FAIL;\n")
+    started, ended, events = [], [], []
+    runner = EPlusRunner(fake_eplus_root, on_start=started.append, on_end=ended.append)
+    handler = logger.add(
+        lambda message: events.append(message.record["extra"]),
+        filter=lambda record: "event" in record["extra"],
+        level="DEBUG",
+    )
+    try:
+        runner.run_one(idf_file, epw_file, simulation_name="ok", backup_strategy=None)
+        with pytest.raises(ProcessExecutionError):
+            runner.run_one(
+                failing_idf_file,
+                epw_file,
+                simulation_name="failed",
+                backup_strategy=None,
+            )
+    finally:
+        logger.remove(handler)
+    assert started == ["ok", "failed"]
+    assert [sim.status for sim in ended] == ["finished", "failed"]
+    assert "total" in ended[1].timings
+    assert [(event["event"], event["simulation"]) for event in events] == [
+        ("simulation_start", "ok"),
+        ("simulation_end", "ok"),
+        ("simulation_start", "failed"),
+        ("simulation_end", "failed"),
+    ]
+    assert events[1]["status"] == "finished"
+    assert events[1]["timings"]["eplus"] > 0
+
+
+
+def test_end_hook_on_invalid_inputs(fake_eplus_root, epw_file, tmp_path):
+    ended = []
+    runner = EPlusRunner(fake_eplus_root, on_end=ended.append)
+    with pytest.raises(FileNotFoundError):
+        runner.run_one(
+            Path(tmp_path) / "missing.idf",
+            epw_file,
+            simulation_name="invalid",
+            backup_strategy=None,
+        )
+    # no simulation was created: the hook gets its name
+    assert ended == ["invalid"]
+
+def test_batch_stats(fake_eplus_root, idf_file, epw_file, tmp_path):
+    runner = EPlusRunner(fake_eplus_root)
+    samples = {f"sim_{i}": idf_file for i in range(4)}
+    stats = BatchStats()
+    with joblib.parallel_backend("loky", n_jobs=2):
+        sims = runner.run_many(
+            samples,
+            epw_file,
+            backup_dir=Path(tmp_path) / "backup",
+            reducer=lambda sim: sim.time_series["eplus"].sum(),
+            stats=stats,
+        )
+    assert len(sims) == 4
+    assert set(stats.timings) == set(samples)
+    assert stats.n_workers == 2
+    summary = stats.summary()
+    assert {"eplus", "post_process", "total"} <= set(summary.index)
+    assert list(summary.columns) == ["mean", "50%", "90%", "99%", "max", "sum", "share"]
+    assert summary.loc["total", "share"] == 1
+    assert stats.solver_time > 0
+    assert stats.wrapper_overhead > 0
+    assert stats.solver_time + stats.wrapper_overhead == pytest.approx(
+        summary.loc["total", "sum"]
+    )
+    assert 0 < stats.utilization <= 1
+    assert "4 simulations on 2 workers" in str(stats)
+
+
+def test_batch_stats_cached(fake_eplus_root, idf_file, epw_file, tmp_path):
+    runner = EPlusRunner(fake_eplus_root, cache=ResultCache(Path(tmp_path) / "cache"))
+    samples = {f"sim_{i}": idf_file for i in range(2)}
+    runner.run_many(samples, epw_file, backup_strategy=None)
+    stats = BatchStats()
+    sims = runner.run_many(samples, epw_file, backup_strategy=None, stats=stats)
+    assert all(sim.status == "finished" for sim in sims.values())
+    # every run is a cache hit: no EnergyPlus time
+    assert "eplus" not in stats.table
+    assert stats.solver_time == 0
+    assert stats.wrapper_overhead > 0
+    assert "1 simulations" in str(stats)
+
+def test_batch_stats_summary():
+    stats = BatchStats()
+    stats.collect(
+        {
+            i: {"timings": {"eplus": i, "setup": 1, "total": i + 1}, "peak_rss": None}
+            for i in range(1, 101)
+        },
+        wall_time=2575,
+        n_workers=2,
+    )
+    summary = stats.summary()
+    assert list(summary.index) == ["setup", "eplus", "total"]
+    assert summary.loc["eplus", "50%"] == pytest.approx(50.5)
+    assert summary.loc["eplus", "99%"] == pytest.approx(99.01)
+    assert stats.solver_time == 5050
+    assert stats.wrapper_overhead == 100
+    assert stats.utilization == pytest.approx(1)
+    assert not stats.peak_rss
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import joblib
+import pytest
+
+from energyplus_wrapper import EPlusRunner, OutputSelection
+
+
+@pytest.fixture
+def runner(fake_eplus_root):
+    return EPlusRunner(fake_eplus_root)
+
+
+def test_iter_many_mapping(runner, idf_file, epw_file):
+    samples = {f"sim_{i}": (idf_file, epw_file) for i in range(3)}
+    results = dict(runner.iter_many(samples, backup_strategy=None))
+    assert results.keys() == samples.keys()
+    assert all(sim.name == key for key, sim in results.items())
+    assert all(sim.status == "finished" for sim in results.values())
+
+
+def test_iter_many_lazy_samples(runner, idf_file, epw_file):
+    consumed = []
+
+    def samples():
+        for i in range(8):
+            consumed.append(i)
+            yield i, idf_file
+
+    with joblib.parallel_backend("loky", n_jobs=2):
+        results = runner.iter_many(
+            samples(),
+            epw_file=epw_file,
+            backup_strategy=None,
+            output_selection=OutputSelection(reports=[], lazy=True),
+            max_in_flight=2,
+        )
+        key, sim = next(results)
+        assert len(consumed) < 8
+        keys = {key} | {key for key, _ in results}
+    assert keys == set(range(8))
+
+
+def peak_electricity(sim):
+    return {
+        "peak": sim.time_series["meter"].iloc[:, 1].max(),
+        "zones": sim.reports[
+            "Input_Verification_and_Results_Summary_for_Entire_Facility"
+        ]["General"].loc["Number of Zones"].iloc[0],
+    }
+
+
+def test_run_many_reducer(runner, idf_file, epw_file):
+    samples = {f"sim_{i}": idf_file for i in range(3)}
+    with joblib.parallel_backend("loky", n_jobs=2):
+        kpis = runner.run_many(
+            samples, epw_file=epw_file, backup_strategy=None, reducer=peak_electricity
+        )
+    assert list(kpis.index) == list(samples)
+    assert list(kpis.columns) == ["peak", "zones"]
+    assert (kpis.peak == 1.23e6).all()
+
+    results = dict(
+        runner.iter_many(
+            samples,
+            epw_file=epw_file,
+            backup_strategy=None,
+            reducer=lambda sim: sim.status,
+        )
+    )
+    assert results == {key: "finished" for key in samples}
+
+
+def test_multiprocessing_backend(runner, idf_file, epw_file):
+    # the multiprocessing backend cannot return the results as a generator
+    samples = {f"sim_{i}": idf_file for i in range(3)}
+    with joblib.parallel_backend("multiprocessing", n_jobs=2):
+        sims = runner.run_many(samples, epw_file=epw_file, backup_strategy=None)
+        results = dict(
+            runner.iter_many(samples, epw_file=epw_file, backup_strategy=None)
+        )
+    assert list(sims) == list(samples)
+    assert results.keys() == samples.keys()
+
+
+def test_threading_backend(runner, idf_file, epw_file):
+    # the simulations run side by side without changing the process cwd
+    cwd = os.getcwd()
+    samples = {f"sim_{i}": idf_file for i in range(3)}
+    with joblib.parallel_backend("threading", n_jobs=3):
+        sims = runner.run_many(samples, epw_file=epw_file, backup_strategy=None)
+    assert os.getcwd() == cwd
+    assert list(sims) == list(samples)
+    assert all(not sim.time_series["eplus"].empty for sim in sims.values())
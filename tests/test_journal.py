@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import joblib
+import pytest
+from path import Path
+from plumbum import ProcessExecutionError
+
+from energyplus_wrapper import EPlusRunner, RunJournal
+
+
+@pytest.fixture
+def failing_idf_file(idf_file, tmp_path):
+    failing_idf_file = Path(tmp_path) / "failing.idf"
+    failing_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_FAIL;\n")
+    return failing_idf_file
+
+
+@pytest.mark.parametrize("backend", ["sequential", "loky"])
+def test_run_many_resume(
+    fake_eplus_root,
+    idf_file,
+    epw_file,
+    failing_idf_file,
+    eplus_calls,
+    tmp_path,
+    backend,
+):
+    runner = EPlusRunner(fake_eplus_root)
+    journal = RunJournal(Path(tmp_path) / "backup" / "journal.sqlite")
+    samples = {"sim_0": idf_file, "sim_1": idf_file, ("sim", 2): failing_idf_file}
+    with joblib.parallel_backend(backend, n_jobs=2):
+        with pytest.raises(ProcessExecutionError):
+            runner.run_many(
+                samples, epw_file=epw_file, backup_strategy=None, journal=journal
+            )
+        n_calls = eplus_calls()
+        entries = journal.entries()
+        assert entries.loc["('sim', 2)", "status"] == "failed"
+        assert "ProcessExecutionError" in entries.loc["('sim', 2)", "error"]
+        finished = entries.index[entries.status == "finished"]
+
+        failing_idf_file.write_text(idf_file.read_text())
+        sims = runner.run_many(
+            samples, epw_file=epw_file, backup_strategy=None, journal=journal
+        )
+    assert eplus_calls() == n_calls + 3 - len(finished)
+    assert sims.keys() == samples.keys()
+    assert all(sim.status == "finished" for sim in sims.values())
+    assert all(sim.time_series["eplus"].shape == (48, 4) for sim in sims.values())
+    entries = journal.entries()
+    assert (entries.status == "finished").all()
+    assert (entries.elapsed > 0).all()
+
+
+def test_run_many_resume_reducer(fake_eplus_root, idf_file, epw_file, eplus_calls):
+    runner = EPlusRunner(fake_eplus_root)
+    journal = RunJournal(Path(fake_eplus_root.parent) / "journal.sqlite")
+    samples = {f"sim_{i}": idf_file for i in range(3)}
+
+    def n_rows(sim):
+        return {"n_rows": len(sim.time_series["eplus"])}
+
+    first, second = [
+        runner.run_many(
+            samples,
+            epw_file=epw_file,
+            backup_strategy=None,
+            reducer=n_rows,
+            journal=journal,
+        )
+        for _ in range(2)
+    ]
+    assert eplus_calls() == 3
+    assert first.equals(second)
+
+
+def test_run_many_resume_other_reducer(
+    fake_eplus_root, idf_file, epw_file, eplus_calls
+):
+    runner = EPlusRunner(fake_eplus_root)
+    journal = RunJournal(Path(fake_eplus_root.parent) / "journal.sqlite")
+    samples = {f"sim_{i}": idf_file for i in range(2)}
+
+    def n_rows(sim):
+        return {"n_rows": len(sim.time_series["eplus"])}
+
+    def n_columns(sim):
+        return {"n_columns": sim.time_series["eplus"].shape[1]}
+
+    sims = runner.run_many(
+        samples, epw_file=epw_file, backup_strategy=None, journal=journal
+    )
+    assert eplus_calls() == 2
+    # the journal holds simulations, not reducer outputs
+    first = runner.run_many(
+        samples,
+        epw_file=epw_file,
+        backup_strategy=None,
+        reducer=n_rows,
+        journal=journal,
+    )
+    assert eplus_calls() == 4
+    second = runner.run_many(
+        samples,
+        epw_file=epw_file,
+        backup_strategy=None,
+        reducer=n_columns,
+        journal=journal,
+    )
+    assert eplus_calls() == 6
+    assert list(first.columns) == ["n_rows"]
+    assert list(second.columns) == ["n_columns"]
+    assert sims.keys() == samples.keys()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import signal
+import time
+
+import pytest
+from path import Path
+
+from energyplus_wrapper import (
+    EPlusRunner,
+    RunLimits,
+    SimulationKilled,
+    SimulationTimeout,
+)
+from energyplus_wrapper import limits as limits_module
+
+
+@pytest.fixture
+def diverging_idf_file(idf_file, tmp_path):
+    diverging_idf_file = Path(tmp_path) / "diverging.idf"
+    diverging_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_DIVERGE;\n")
+    return diverging_idf_file
+
+
+def test_limits_finished(fake_eplus_root, idf_file, epw_file):
+    runner = EPlusRunner(fake_eplus_root, limits=RunLimits(wall_time=60, poll=0.1))
+    sim = runner.run_one(idf_file, epw_file, backup_strategy=None)
+    assert sim.status == "finished"
+    assert "EnergyPlus Completed Successfully" in sim.log
+    assert sim.time_series["eplus"].shape == (48, 4)
+
+
+def test_wall_time(fake_eplus_root, idf_file, epw_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_EPLUS_SLEEP", "30")
+    runner = EPlusRunner(fake_eplus_root, limits=RunLimits(wall_time=0.5, poll=0.1))
+    backup_dir = Path(tmp_path) / "backup"
+    start = time.monotonic()
+    with pytest.raises(SimulationTimeout, match="Wall time limit"):
+        runner.run_one(idf_file, epw_file, backup_dir=backup_dir, simulation_name="sim")
+    assert time.monotonic() - start < 10
+    assert (backup_dir / "timeout_sim").isdir()
+
+
+@pytest.mark.skipif(limits_module._prlimit is None, reason="Linux rlimits only")
+def test_cpu_time(fake_eplus_root, idf_file, epw_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_EPLUS_SPIN", "30")
+    runner = EPlusRunner(fake_eplus_root, limits=RunLimits(cpu_time=1, poll=0.1))
+    backup_dir = Path(tmp_path) / "backup"
+    with pytest.raises(SimulationTimeout, match="CPU time limit"):
+        runner.run_one(idf_file, epw_file, backup_dir=backup_dir, simulation_name="sim")
+    assert (backup_dir / "timeout_sim").isdir()
+
+
+
+@pytest.mark.skipif(limits_module._prlimit is None, reason="Linux rlimits only")
+def test_returncode_status():
+    limits = RunLimits(cpu_time=10)
+    assert limits.returncode_status(-signal.SIGXCPU) == (
+        "timeout",
+        "CPU time limit reached (10s).",
+    )
+    # a SIGKILL only comes from the CPU time limit if it was reached
+    assert limits.returncode_status(-signal.SIGKILL) is None
+    assert limits.returncode_status(-signal.SIGKILL, cpu_time=2.5) is None
+    assert limits.returncode_status(-signal.SIGKILL, cpu_time=10.9)[0] == "timeout"
+    assert RunLimits().returncode_status(-signal.SIGXCPU) is None
+
+
+def test_fatal_message(fake_eplus_root, diverging_idf_file, epw_file, tmp_path):
+    runner = EPlusRunner(fake_eplus_root, limits=RunLimits(poll=0.1))
+    backup_dir = Path(tmp_path) / "backup"
+    start = time.monotonic()
+    with pytest.raises(SimulationKilled, match="did not converge"):
+        runner.run_one(
+            diverging_idf_file, epw_file, backup_dir=backup_dir, simulation_name="sim"
+        )
+    assert time.monotonic() - start < 10
+    assert (backup_dir / "killed_sim").isdir()
+
+
+def test_fatal_message_async(fake_eplus_root, diverging_idf_file, epw_file):
+    limits = RunLimits(fatal_patterns=[r"\*\*\s*Severe\s*\*\*"], poll=0.1)
+    runner = EPlusRunner(fake_eplus_root, limits=limits)
+    with pytest.raises(SimulationKilled, match="diverged"):
+        asyncio.run(
+            asyncio.wait_for(
+                runner.run_one_async(
+                    diverging_idf_file, epw_file, backup_strategy=None
+                ),
+                10,
+            )
+        )
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import pandas as pd
+import pytest
+
+from energyplus_wrapper import EPlusRunner, OutputSelection
+
+site_energy = (
+    "Annual_Building_Utility_Performance_Summary_for_Entire_Facility"
+    "/Site and Source Energy"
+)
+zone_temperature = "CORE_ZN:Zone Mean Air Temperature [C](Hourly)"
+
+
+@pytest.fixture
+def runner(fake_eplus_root):
+    return EPlusRunner(fake_eplus_root)
+
+
+def test_output_selection(runner, idf_file, epw_file):
+    sim = runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy=None,
+        output_selection=OutputSelection(
+            reports=[site_energy, "General"],
+            time_series={"eplus": [zone_temperature]},
+        ),
+    )
+    assert {
+        report_key: list(tables.keys()) for report_key, tables in sim.reports.items()
+    } == {
+        "Annual_Building_Utility_Performance_Summary_for_Entire_Facility": [
+            "Site and Source Energy"
+        ],
+        "Input_Verification_and_Results_Summary_for_Entire_Facility": ["General"],
+    }
+    assert list(sim.time_series.keys()) == ["eplus"]
+    assert list(sim.time_series["eplus"].columns) == ["Date/Time", zone_temperature]
+
+
+def test_lazy_output_selection(runner, idf_file, epw_file):
+    sim = runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy=None,
+        output_selection=OutputSelection(
+            reports=[site_energy], time_series=["meter"], lazy=True
+        ),
+    )
+    assert sim._reports is None and sim._time_series is None
+    sim = pickle.loads(pickle.dumps(sim))
+    site_and_source = sim.reports[site_energy.split("/")[0]]["Site and Source Energy"]
+    assert site_and_source.shape == (3, 3)
+    assert list(sim.time_series.keys()) == ["meter"]
+    assert len(sim.time_series["meter"]) == 48
+    assert not sim._deferred
+
+
+def test_output_selection_with_custom_process(runner, idf_file, epw_file):
+    with pytest.raises(ValueError):
+        runner.run_one(
+            idf_file,
+            epw_file,
+            custom_process=lambda sim: None,
+            output_selection=OutputSelection(),
+        )
+
+
+@pytest.mark.parametrize("output_backend", ["csv", "sqlite", "eso"])
+def test_time_series_format(fake_eplus_root, idf_file, epw_file, output_backend):
+    runner = EPlusRunner(fake_eplus_root, output_backend=output_backend)
+    sim = runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy=None,
+        output_selection=OutputSelection(
+            datetime_index=True, year=2019, float32=True, split_columns=True
+        ),
+    )
+    for name, time_series in sim.time_series.items():
+        assert isinstance(time_series.index, pd.DatetimeIndex)
+        assert (time_series.dtypes == "float32").all()
+    meters = sim.time_series["meter" if output_backend == "csv" else "meter_hourly"]
+    assert meters.index[0] == pd.Timestamp("2019-01-01 01:00")
+    assert meters.index[-1] == pd.Timestamp("2019-01-03 00:00")
+    assert meters.columns.tolist() == [("", "Electricity:Facility", "J", "Hourly")]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import joblib
+import pytest
+
+from energyplus_wrapper import EPlusRunner, ParametricSample
+from energyplus_wrapper.parametric import IDFTemplate
+
+idf_str = """! a comment, with separators;
+  Version,8.7;
+
+  Building,
+    Primary School,          !- Name
+    0.0000,                  !- North Axis {deg}
+    City,                    !- Terrain
+    25,                      !- Maximum Number of Warmup Days
+    6;                       !- Minimum Number of Warmup Days
+
+  Material,
+    Roof Insulation,         !- Name
+    MediumRough,             !- Roughness
+    0.1273;                  !- Thickness {m}
+
+  Material,
+    Wall Insulation,         !- Name
+    MediumRough,             !- Roughness
+    0.0870;                  !- Thickness {m}
+"""
+
+
+def test_idf_template():
+    template = IDFTemplate(idf_str)
+    assert template.render() == idf_str
+    rendered = template.render(
+        {
+            ("Building", "primary school", "North Axis"): 90,
+            ("BUILDING", None, "minimum_number_of_warmup_days"): 12,
+            ("Material", "Roof Insulation", 2): 0.2,
+            ("Material", None, "Roughness"): "Smooth",
+        }
+    )
+    assert rendered == (
+        idf_str.replace("0.0000,", "90,")
+        .replace("6;", "12;")
+        .replace("0.1273;", "0.2;")
+        .replace("MediumRough", "Smooth")
+    )
+
+
+@pytest.mark.parametrize(
+    "parameters",
+    [
+        {("Zone", None, "Name"): "Other"},
+        {("Material", "Unknown", "Roughness"): "Smooth"},
+        {("Material", None, "Density"): 100},
+        {("Material", None, 3): 100},
+    ],
+)
+def test_idf_template_unknown(parameters):
+    with pytest.raises(KeyError):
+        IDFTemplate(idf_str).render(parameters)
+
+
+def test_parametric_run_many(fake_eplus_root, idf_file, epw_file):
+    runner = EPlusRunner(fake_eplus_root)
+    samples = {
+        f"sim_{axis}": ParametricSample(idf_file, {("Building", None, 1): axis})
+        for axis in [0, 90, 180]
+    }
+    assert len(pickle.dumps(samples["sim_0"])) < 512
+    with joblib.parallel_backend("loky", n_jobs=2):
+        sims = runner.run_many(samples, epw_file=epw_file, backup_strategy=None)
+    assert all(sim.status == "finished" for sim in sims.values())
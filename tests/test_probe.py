@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+from path import Path
+
+from energyplus_wrapper import EPlusRunner
+from energyplus_wrapper import probe
+from energyplus_wrapper.probe import ProbeCache, scan_version
+
+tests_dir = Path(__file__).abspath().parent
+
+
+@pytest.mark.parametrize("version", ["8.4", "8.5", "8.7"])
+def test_idf_version_from_header(fake_eplus_root, version):
+    runner = EPlusRunner(fake_eplus_root)
+    idf_file = tests_dir / f"in_{version.replace('.', '-')}-0.idf"
+    assert runner.get_idf_version(idf_file) == version
+
+
+@pytest.mark.parametrize(
+    "idf_str",
+    [
+        "  Version,9.1;\n",
+        "  Version,9.1.0;\n",
+        "  VERSION,\n    9.1;                     !- Version Identifier\n",
+        "! a comment\n  Version,  ! not yet\n  9.1  ;\n",
+    ],
+)
+def test_idf_version_from_object(fake_eplus_root, tmp_path, idf_str):
+    runner = EPlusRunner(fake_eplus_root)
+    idf_file = tmp_path / "model.idf"
+    idf_file.write_text("  Building,\n    test;                    !- Name\n" + idf_str)
+    assert runner.get_idf_version(idf_file) == "9.1"
+
+
+def test_idf_version_bounded_scan(tmp_path):
+    idf_file = tmp_path / "model.idf"
+    building = "  Building,\n    test;                    !- Name\n"
+    idf_file.write_text(building * 1000 + "  Version,9.1;\n" + building * 1000)
+    assert scan_version(idf_file, [], object_name="Version") == "9.1"
+    assert scan_version(idf_file, [], object_name="Version", max_bytes=1000) is None
+    # the end of the file is scanned too
+    idf_file.write_text(building * 2000 + "  Version,\n    9.1;\n")
+    assert scan_version(idf_file, [], object_name="Version", max_bytes=1000) == "9.1"
+
+
+def test_idf_version_missing(fake_eplus_root, tmp_path):
+    runner = EPlusRunner(fake_eplus_root)
+    idf_file = tmp_path / "model.idf"
+    idf_file.write_text("  Building,\n    test;                    !- Name\n")
+    assert runner.get_idf_version(idf_file) is False
+
+
+def test_probe_cache_persistence(tmp_path, monkeypatch):
+    probed = []
+
+    def probe_file(filename):
+        probed.append(filename)
+        return "8.7"
+
+    probed_file = tmp_path / "probed"
+    probed_file.write_text("content")
+    cache = ProbeCache(tmp_path / "probes.json")
+    assert cache.get("test", probed_file, probe_file) == "8.7"
+    assert cache.get("test", probed_file, probe_file) == "8.7"
+    assert len(probed) == 1
+
+    # a new process only has the persisted probes
+    monkeypatch.setattr(probe, "_memo", {})
+    assert cache.get("test", probed_file, probe_file) == "8.7"
+    assert len(probed) == 1
+
+    # a modified file is probed again
+    probed_file.write_text("new content")
+    assert cache.get("test", probed_file, probe_file) == "8.7"
+    assert len(probed) == 2
+
+
+def test_runner_versions(fake_eplus_root):
+    runner = EPlusRunner(fake_eplus_root, probe_cache=ProbeCache(None))
+    assert runner.eplus_version == "8.7"
+    assert runner.idd_version == "8.4"
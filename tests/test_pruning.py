@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+from eppy.modeleditor import IDF as eppy_IDF
+from path import Path
+
+from energyplus_wrapper import EPlusRunner, OutputPruning, ResultCache
+
+idf_str = """\
+  Version,8.7;
+
+! outputs
+  Output:VariableDictionary,IDF;
+
+  Output:Variable,*,Zone Mean Air Temperature,Timestep;  !- a comment
+
+  Output:Variable,*,Zone Mean Air Temperature,Hourly;
+
+  Output:Variable,
+    *,                       !- Key Value
+    Site Outdoor Air Drybulb Temperature,  !- Variable Name
+    Detailed;                !- Reporting Frequency
+
+  Output:Meter,Electricity:Facility,Timestep;
+
+  Output:Meter:MeterFileOnly,Gas:Facility,Hourly;
+
+  Output:Table:SummaryReports,AllSummary;
+
+  Output:Diagnostics,DisplayExtraWarnings,DisplayAdvancedReportVariables;
+"""
+
+
+def test_prune():
+    pruning = OutputPruning(
+        variables=["zone mean air temperature"],
+        meters={"Electricity:Facility": "monthly"},
+        max_frequency="hourly",
+        reports=["AnnualBuildingUtilityPerformanceSummary"],
+    )
+    pruned, summary = pruning.prune(idf_str)
+    assert pruned == """\
+  Version,8.7;
+
+! outputs
+
+  Output:Variable,*,Zone Mean Air Temperature,Hourly;  !- a comment
+
+  Output:Meter,Electricity:Facility,Monthly;
+
+  Output:Table:SummaryReports,AnnualBuildingUtilityPerformanceSummary;
+
+  Output:Diagnostics,DisplayAdvancedReportVariables;
+"""
+    assert summary.removed == {
+        "Output:VariableDictionary": 1,
+        "Output:Variable": 2,
+        "Output:Meter:MeterFileOnly": 1,
+    }
+    assert summary.removed_outputs == [
+        "Site Outdoor Air Drybulb Temperature",
+        "Gas:Facility",
+    ]
+    assert summary.coarsened == {"Output:Variable": 1, "Output:Meter": 1}
+    assert summary.diagnostics == ["DisplayExtraWarnings"]
+    assert "2 Output:Variable" in str(summary)
+
+
+def test_prune_nothing():
+    pruning = OutputPruning(drop=(), diagnostics=True)
+    pruned, summary = pruning.prune(idf_str)
+    assert pruned == idf_str
+    assert not summary.removed and not summary.coarsened
+
+
+def test_max_frequency():
+    pruned, summary = OutputPruning(max_frequency="daily").prune(idf_str)
+    assert "Zone Mean Air Temperature,Daily;  !- a comment\n" in pruned
+    assert pruned.count("Zone Mean Air Temperature") == 1
+    assert "Output:Variable,*,Site Outdoor Air Drybulb Temperature,Daily;" in pruned
+    assert "Output:Table:SummaryReports,AllSummary;" in pruned
+    assert summary.output_size[1] < summary.output_size[0]
+
+
+def test_invalid_frequency():
+    with pytest.raises(ValueError):
+        OutputPruning(max_frequency="weekly")
+
+
+def test_runner_pruning(fake_eplus_root, idf_file, epw_file, tmp_path):
+    def read_idf(sim):
+        sim.reports = {"idf": sim.idf_file.read_text(), "name": sim.idf_file.name}
+
+    pruning = OutputPruning(variables=["Site Outdoor Air Drybulb Temperature"])
+    runner = EPlusRunner(
+        fake_eplus_root,
+        output_pruning=pruning,
+        cache=ResultCache(Path(tmp_path) / "cache"),
+    )
+    sim = runner.run_one(idf_file, epw_file, custom_process=read_idf)
+    assert sim.reports["name"] == idf_file.name
+    assert "Output:VariableDictionary" not in sim.reports["idf"]
+    assert "Boiler Gas Energy" not in sim.reports["idf"]
+    assert "Site Outdoor Air Drybulb Temperature" in sim.reports["idf"]
+    assert sim.pruning_summary.removed["Output:Variable"] == 20
+    # the user file is untouched
+    assert "Output:VariableDictionary" in idf_file.read_text()
+
+    eppy_IDF.setiddname(fake_eplus_root / "Energy+.idd", testing=True)
+    idf = eppy_IDF(idf_file)
+    sim = runner.run_one(idf, epw_file, custom_process=read_idf)
+    assert "Boiler Gas Energy" not in sim.reports["idf"]
+
+    assert runner.cache_key(idf_file, epw_file) != EPlusRunner(
+        fake_eplus_root, cache=runner.cache
+    ).cache_key(idf_file, epw_file)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+
+import joblib
+import pytest
+from path import Path
+
+from energyplus_wrapper import ParametricSample, ResultCache, RunJournal, RunnerRegistry
+from energyplus_wrapper.registry import find_transitions, idf_version
+
+tests_dir = Path(__file__).abspath().parent
+
+
+def _eplus_root(folder, version, transitions=()):
+    """A fake EnergyPlus root of a given version, that records its runs in a
+    `calls.log` file, with fake transition programs."""
+    root = (Path(folder) / f"EnergyPlus-{version.replace('.', '-')}").mkdir_p()
+    eplus_bin = root / "energyplus"
+    eplus_bin.write_text(
+        "#!/bin/sh\n"
+        f"export FAKE_EPLUS_VERSION={version}.0\n"
+        f'export FAKE_EPLUS_CALLS="{root / "calls.log"}"\n'
+        f'exec "{sys.executable}" "{tests_dir / "fake_energyplus.py"}" "$@"\n'
+    )
+    eplus_bin.chmod(0o755)
+    (tests_dir / "Energy+.idd").symlink(root / "Energy+.idd")
+    updater_dir = (root / "PreProcess" / "IDFVersionUpdater").makedirs_p()
+    for source, target in transitions:
+        program = updater_dir / (
+            f"Transition-V{source.replace('.', '-')}-0"
+            f"-to-V{target.replace('.', '-')}-0"
+        )
+        # writes the converted model next to the original one, as `.idfnew`
+        program.write_text(
+            "#!/bin/sh\n"
+            f"sed -e 's/Version\\([ ,]\\){source}/Version\\1{target}/'"
+            ' "$1" > "${1}new"\n'
+        )
+        program.chmod(0o755)
+    return root
+
+
+def _n_calls(root):
+    calls = root / "calls.log"
+    return len(calls.lines()) if calls.exists() else 0
+
+
+@pytest.fixture
+def roots(tmp_path):
+    return {
+        "8.5": _eplus_root(tmp_path, "8.5"),
+        "8.7": _eplus_root(
+            tmp_path,
+            "8.7",
+            transitions=[("8.4", "8.5"), ("8.5", "8.6"), ("8.6", "8.7")],
+        ),
+    }
+
+
+def test_idf_version(idf_file):
+    assert idf_version(tests_dir / "in_8-4-0.idf") == "8.4"
+    assert idf_version(idf_file) == "8.7"
+    assert idf_version(ParametricSample(tests_dir / "in_8-5-0.idf")) == "8.5"
+
+
+def test_find_transitions(roots):
+    transitions = find_transitions(roots["8.7"])
+    assert {source: target for source, (target, _) in transitions.items()} == {
+        "8.4": "8.5",
+        "8.5": "8.6",
+        "8.6": "8.7",
+    }
+    assert find_transitions(roots["8.5"]) == {}
+
+
+def test_registry_dispatch(roots, epw_file, tmp_path):
+    registry = RunnerRegistry.from_roots(roots.values())
+    assert registry.versions == ["8.5", "8.7"]
+    samples = {
+        "sim_85": tests_dir / "in_8-5-0.idf",
+        "sim_87": tests_dir / "in_8-7-0.idf",
+        "sample_85": ParametricSample(tests_dir / "in_8-5-0.idf"),
+    }
+    with joblib.parallel_backend("loky", n_jobs=2):
+        sims = registry.run_many(samples, epw_file, backup_dir=Path(tmp_path) / "bk")
+    assert list(sims) == list(samples)
+    assert all(sim.status == "finished" for sim in sims.values())
+    assert _n_calls(roots["8.5"]) == 2
+    assert _n_calls(roots["8.7"]) == 1
+
+    with pytest.raises(ValueError, match="No EnergyPlus 8.4 runner"):
+        registry.run_one(tests_dir / "in_8-4-0.idf", epw_file)
+
+
+def test_registry_batch_options(roots, epw_file, tmp_path):
+    registry = RunnerRegistry.from_roots(
+        roots.values(), cache=ResultCache(Path(tmp_path) / "cache")
+    )
+    journal = RunJournal(Path(tmp_path) / "journal.sqlite")
+    samples = {
+        "sim_85": tests_dir / "in_8-5-0.idf",
+        "same_85": tests_dir / "in_8-5-0.idf",
+        "sim_87": tests_dir / "in_8-7-0.idf",
+    }
+    sims = registry.run_many(samples, epw_file, backup_strategy=None, journal=journal)
+    assert list(sims) == list(samples)
+    assert sims["same_85"].name == "same_85"
+    # the identical samples are ran once
+    assert _n_calls(roots["8.5"]) == 1
+    assert (journal.entries().status == "finished").all()
+
+    registry.run_many(samples, epw_file, backup_strategy=None, journal=journal)
+    assert _n_calls(roots["8.5"]) + _n_calls(roots["8.7"]) == 2
+
+def test_registry_conversion(roots, epw_file, tmp_path):
+    registry = RunnerRegistry.from_roots(
+        [roots["8.7"]], convert=True, converted_dir=Path(tmp_path) / "converted"
+    )
+    sim = registry.run_one(tests_dir / "in_8-4-0.idf", epw_file, backup_strategy=None)
+    assert sim.status == "finished"
+    assert _n_calls(roots["8.7"]) == 1
+    (converted,) = registry.converted_dir.files("*.idf")
+    assert idf_version(converted) == "8.7"
+
+    # the converted model is reused
+    runner, idf = registry.route(tests_dir / "in_8-4-0.idf")
+    assert idf == converted
+    assert runner is registry.runners["8.7"]
+
+    with pytest.raises(ValueError, match="no newer version"):
+        RunnerRegistry.from_roots([roots["8.5"]], convert=True).route(
+            tests_dir / "in_8-7-0.idf"
+        )
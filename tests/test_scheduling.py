@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import joblib
+import pytest
+from path import Path
+
+from energyplus_wrapper import (
+    EPlusRunner,
+    LongestFirstScheduler,
+    ParametricSample,
+    RuntimeHistory,
+)
+from energyplus_wrapper.scheduling import (
+    DurationEstimator,
+    list_schedule_makespan,
+    model_features,
+)
+
+
+def test_model_features(idf_file):
+    features = model_features(idf_file.read_text())
+    assert features["n_zones"] == 25
+    assert features["n_surfaces"] > features["n_zones"]
+    assert features["timesteps_per_hour"] == 6
+    # the weather file run periods are disabled in the SimulationControl
+    assert features["simulated_days"] == 2
+
+
+
+def test_n_surfaces():
+    idf_str = (
+        "Wall:Detailed,w1; Roof,r1; Window,win1; Window:Interzone,win2; Door,d1;"
+        " GlazedDoor,g1; Shading:Site,s1; WindowMaterial:Glazing,m1;"
+        " WindowProperty:FrameAndDivider,f1; WindowShadingControl,c1;"
+        " RoofIrrigation,i1;"
+    )
+    assert model_features(idf_str)["n_surfaces"] == 7
+
+@pytest.mark.parametrize(
+    "idf_str, days",
+    [
+        ("Version,8.7; RunPeriod,,1,1,12,31,Sunday;", 365),
+        ("Version,9.4; RunPeriod,p,6,1,,6,30,,Monday;", 30),
+        ("Version,22.1; RunPeriod,p,12,1,2020,1,31,2021;", 62),
+        ("Version,8.7; SizingPeriod:DesignDay,d1; SizingPeriod:DesignDay,d2;", 2),
+    ],
+)
+def test_simulated_days(idf_str, days):
+    assert model_features(idf_str)["simulated_days"] == days
+
+
+def test_list_schedule_makespan():
+    assert list_schedule_makespan([1, 1, 1, 3], 2) == 4
+    assert list_schedule_makespan([3, 1, 1, 1], 2) == 3
+
+
+def test_duration_estimator(tmp_path, idf_file):
+    history = RuntimeHistory(Path(tmp_path) / "history.sqlite")
+    assert not DurationEstimator(history).in_seconds
+    features = model_features(idf_file.read_text())
+    for timesteps in [1, 2, 4, 6, 10, 12, 20, 30, 60]:
+        history.record(
+            dict(features, timesteps_per_hour=timesteps), elapsed=0.5 * timesteps
+        )
+    estimator = DurationEstimator(history, min_records=5)
+    assert estimator.coefficients is not None
+    estimates = estimator.estimate(
+        [dict(features, timesteps_per_hour=timesteps) for timesteps in [3, 15]]
+    )
+    assert estimates == pytest.approx([1.5, 7.5], rel=0.1)
+
+
+def test_longest_first(fake_eplus_root, idf_file, epw_file, tmp_path):
+    history = RuntimeHistory(Path(tmp_path) / "history.sqlite")
+    runner = EPlusRunner(fake_eplus_root, history=history)
+    samples = {
+        f"sim_{timesteps}": ParametricSample(
+            idf_file, {("Timestep", None, 0): timesteps}
+        )
+        for timesteps in [1, 60, 6]
+    }
+    with joblib.parallel_backend("loky", n_jobs=2):
+        runner.run_many(samples, epw_file=epw_file, backup_strategy=None)
+        assert len(history.records()) == 3
+
+        scheduler = LongestFirstScheduler(history)
+        runner.run_many(
+            samples, epw_file=epw_file, backup_strategy=None, scheduler=scheduler
+        )
+    assert list(scheduler.estimates) == list(samples)
+    assert max(scheduler.estimates, key=scheduler.estimates.get) == "sim_60"
+    report = scheduler.report
+    assert report.n_workers == 2
+    assert report.n_samples == 3
+    assert report.expected_makespan <= report.unscheduled_makespan
+    assert report.achieved_makespan > 0
+    assert len(history.records()) == 6
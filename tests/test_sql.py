@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from energyplus_wrapper import EPlusRunner, OutputSelection
+from energyplus_wrapper.sql import ensure_sqlite_output
+
+zone_temperature = "CORE_ZN:Zone Mean Air Temperature [C](Hourly)"
+
+
+@pytest.fixture
+def runner(fake_eplus_root):
+    return EPlusRunner(fake_eplus_root, output_backend="sqlite")
+
+
+@pytest.mark.parametrize(
+    "idf_str",
+    [
+        "  Version,8.7;\n",
+        "  Version,8.7;\n"
+        "  Output:SQLite,\n"
+        "    Simple;                  !- Option Type\n",
+        "  Version,8.7;\n  output:sqlite,Simple;\n  Output:Surfaces:Drawing,DXF;\n",
+    ],
+)
+def test_ensure_sqlite_output(idf_str):
+    idf_str = ensure_sqlite_output(idf_str)
+    assert idf_str.lower().count("output:sqlite") == 1
+    assert "SimpleAndTabular;" in idf_str
+    assert "Version,8.7;" in idf_str
+    assert ensure_sqlite_output(idf_str) == idf_str
+
+
+def test_sqlite_backend(runner, idf_file, epw_file, fake_eplus_root):
+    sim = runner.run_one(idf_file, epw_file, backup_strategy=None)
+    assert "-r" not in (fake_eplus_root.parent / "calls.log").read_text().split()
+    site_and_source = sim.reports[
+        "AnnualBuildingUtilityPerformanceSummary_for_Entire_Facility"
+    ]["Site and Source Energy"]
+    assert list(site_and_source.columns) == [
+        "Total Energy [kWh]",
+        "Energy Per Total Building Area [kWh/m2]",
+    ]
+    assert site_and_source.dtypes.tolist() == ["float64", "float64"]
+    assert sorted(sim.time_series.keys()) == ["eplus_hourly", "meter_hourly"]
+    eplus_hourly = sim.time_series["eplus_hourly"]
+    assert eplus_hourly.shape == (48, 4)
+    assert eplus_hourly.columns[0] == "Date/Time"
+    assert eplus_hourly["Date/Time"][0] == " 01/01  01:00:00"
+    assert eplus_hourly[zone_temperature].dtype == "float64"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_sqlite_output_selection(runner, idf_file, epw_file, lazy):
+    sim = runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy=None,
+        output_selection=OutputSelection(
+            reports=["General"],
+            time_series={"eplus_hourly": [zone_temperature]},
+            lazy=lazy,
+        ),
+    )
+    assert list(sim.reports.keys()) == [
+        "InputVerificationandResultsSummary_for_Entire_Facility"
+    ]
+    assert list(sim.time_series.keys()) == ["eplus_hourly"]
+    assert list(sim.time_series["eplus_hourly"].columns) == [
+        "Date/Time",
+        zone_temperature,
+    ]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+from path import Path
+
+from energyplus_wrapper import EPlusRunner
+from energyplus_wrapper.staging import StagingArea, stage_file, staging_strategies
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    input_file = Path(tmp_path) / "inputs" / "schedule.csv"
+    input_file.parent.mkdir_p()
+    input_file.write_text("hour,value\n1,0.5\n")
+    return input_file
+
+
+@pytest.mark.parametrize("strategy", staging_strategies)
+def test_stage_file(input_file, tmp_path, strategy):
+    dst_dir = Path(tmp_path) / "run"
+    dst_dir.mkdir_p()
+    staged = stage_file(input_file, dst_dir, strategy=strategy)
+    assert staged == dst_dir / "schedule.csv"
+    assert staged.read_text() == input_file.read_text()
+    assert staged.islink() == (strategy == "symlink")
+    if strategy == "hardlink":
+        assert staged.samefile(input_file)
+
+
+def test_staging_area(input_file, tmp_path):
+    area = StagingArea(Path(tmp_path) / "staging")
+    other_file = Path(tmp_path) / "schedule.csv"
+    input_file.copy(other_file)
+    assert area.materialize(input_file) == area.materialize(other_file)
+    assert len(list(area.root.walkfiles())) == 1
+
+    dst_dir = Path(tmp_path) / "run"
+    dst_dir.mkdir_p()
+    staged = area.stage(input_file, dst_dir)
+    assert staged.samefile(area.materialize(input_file))
+    assert not staged.samefile(input_file)
+
+
+@pytest.mark.parametrize("staging", ["hardlink", "symlink"])
+def test_run_many_staging(fake_eplus_root, idf_file, epw_file, tmp_path, staging):
+    temp_dir = Path(tmp_path) / "runs"
+    temp_dir.mkdir_p()
+    runner = EPlusRunner(fake_eplus_root, temp_dir=temp_dir, staging=staging)
+    sims = runner.run_many(
+        {f"sim_{i}": idf_file for i in range(3)},
+        epw_file=epw_file,
+        backup_strategy="always",
+        backup_dir=Path(tmp_path) / "backup",
+    )
+    assert all(sim.status == "finished" for sim in sims.values())
+    assert not temp_dir.listdir()
+    backup_epw = Path(tmp_path) / "backup" / "finished_sim_0" / epw_file.basename()
+    assert backup_epw.read_bytes() == epw_file.read_bytes()
+
+
+@pytest.mark.parametrize("staging", ["hardlink", "symlink"])
+def test_run_one_never_links_user_files(fake_eplus_root, epw_file, tmp_path, staging):
+    idf_file = Path(tmp_path) / "model.idf"
+    (Path(__file__).parent / "in_8-7-0.idf").copy(idf_file)
+    content = idf_file.read_bytes()
+
+    def overwrite_inputs(sim):
+        staged = sim.working_dir / idf_file.basename()
+        sim.linked = staged.islink() or staged.samefile(idf_file)
+        staged.write_text("overwritten")
+
+    runner = EPlusRunner(fake_eplus_root, staging=staging)
+    sim = runner.run_one(
+        idf_file, epw_file, backup_strategy=None, custom_process=overwrite_inputs
+    )
+    assert sim.status == "finished"
+    assert not sim.linked
+    assert idf_file.read_bytes() == content
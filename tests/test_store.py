@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import joblib
+import pandas as pd
+import pytest
+from path import Path
+
+from energyplus_wrapper import EPlusRunner, OutputSelection, ResultStore
+
+ds = pytest.importorskip("pyarrow.dataset")
+
+
+@pytest.fixture
+def runner(fake_eplus_root):
+    return EPlusRunner(fake_eplus_root)
+
+
+@pytest.mark.parametrize("format", ["parquet", "feather"])
+def test_result_store(runner, idf_file, epw_file, tmp_path, format):
+    store = ResultStore(
+        Path(tmp_path) / "store",
+        format=format,
+        compression="zstd",
+        reports=["Site and Source Energy"],
+    )
+    samples = {f"sim {i}/{i}": idf_file for i in range(3)}
+    with joblib.parallel_backend("loky", n_jobs=2):
+        sims = runner.run_many(
+            samples, epw_file=epw_file, backup_strategy=None, transport=store
+        )
+    reference = runner.run_one(idf_file, epw_file, backup_strategy=None)
+
+    assert store.samples() == sorted(samples)
+    assert store.time_series_names() == ["eplus", "meter"]
+    assert store.report_tables() == [
+        "Annual_Building_Utility_Performance_Summary_for_Entire_Facility"
+        "/Site and Source Energy"
+    ]
+    for key, sim in sims.items():
+        assert sim._time_series is None
+        for name, df in sim.time_series.items():
+            pd.testing.assert_frame_equal(df, reference.time_series[name])
+        view = store.load(key)
+        pd.testing.assert_frame_equal(
+            view.time_series["meter"], reference.time_series["meter"]
+        )
+        report = reference.reports[
+            "Annual_Building_Utility_Performance_Summary_for_Entire_Facility"
+        ]["Site and Source Energy"]
+        for tables in (sim.reports, view.reports):
+            pd.testing.assert_frame_equal(
+                tables[
+                    "Annual_Building_Utility_Performance_Summary_for_Entire_Facility"
+                ]["Site and Source Energy"],
+                report,
+            )
+
+    column = "Electricity:Facility [J](Hourly)"
+    df = store.read("meter", columns=[column], samples=["sim 1/1"])
+    assert list(df.columns) == [column]
+    assert df.index.unique().tolist() == ["sim 1/1"]
+    assert len(df) == len(reference.time_series["meter"])
+    threshold = reference.time_series["meter"][column].median()
+    df = store.read("meter", filter=ds.field(column) > threshold)
+    assert (df[column] > threshold).all()
+    assert df.index.nunique() == 3
+
+
+def test_result_store_formatted(runner, idf_file, epw_file, tmp_path):
+    store = ResultStore(Path(tmp_path) / "store")
+    selection = OutputSelection(time_series=["meter"], datetime_index=True)
+    sim = runner.run_one(
+        idf_file,
+        epw_file,
+        backup_strategy=None,
+        simulation_name="sim",
+        output_selection=selection,
+        transport=store,
+    )
+    assert isinstance(sim.time_series["meter"].index, pd.DatetimeIndex)
+    df = store.read("meter", columns=["Electricity:Facility [J](Hourly)"])
+    assert df.index.names == ["sample", "Date/Time"]
+    assert [view.name for view in store.simulations()] == ["sim"]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from path import Path
+
+from energyplus_wrapper import EPlusRunner, MemmapTransport, OutputSelection
+from energyplus_wrapper.transport import MemmapFrame
+from energyplus_wrapper.utils import format_time_series
+
+raw_time_series = pd.DataFrame(
+    {
+        "Date/Time": [" 01/01  01:00:00", " 01/01  02:00:00", " 01/01  03:00:00"],
+        "CORE_ZN:Zone Mean Air Temperature [C](Hourly)": [20.0, 21.0, 22.0],
+        "Electricity:Facility [J](Hourly)": [1.0e6, 1.1e6, 1.2e6],
+    }
+)
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        raw_time_series,
+        format_time_series(raw_time_series, float32=True, split_columns=True),
+    ],
+)
+def test_memmap_frame(df, tmp_path):
+    frame = MemmapFrame.save(df, Path(tmp_path) / "frame")
+    loaded = frame.load()
+    pd.testing.assert_frame_equal(loaded, df)
+    values = loaded.select_dtypes("number").to_numpy()
+    assert not loaded.iloc[:, -1].to_numpy().flags.writeable
+    assert values.dtype == df.select_dtypes("number").to_numpy().dtype
+
+
+def test_memmap_frame_mixed_dtypes(tmp_path):
+    df = pd.DataFrame(
+        {
+            "count": np.arange(3, dtype="int64"),
+            "zone": ["CORE_ZN", None, "PERIMETER_ZN_1"],
+            "value": [1.0, np.nan, 3.0],
+            "flag": pd.Categorical(["a", "b", None]),
+        },
+        index=pd.Index(["x", "y", "z"], name="key"),
+    )
+    frame = MemmapFrame.save(df, Path(tmp_path) / "frame")
+    loaded = frame.load()
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded["count"].dtype == np.int64
+    assert loaded["zone"].iloc[1] is None
+    assert not loaded["value"].to_numpy().flags.writeable
+
+
+def test_run_many_transport(fake_eplus_root, idf_file, epw_file, tmp_path):
+    runner = EPlusRunner(fake_eplus_root)
+    samples = {f"sim_{i}": idf_file for i in range(3)}
+    with MemmapTransport(Path(tmp_path) / "results") as transport:
+        with joblib.parallel_backend("loky", n_jobs=2):
+            sims = runner.run_many(
+                samples, epw_file=epw_file, backup_strategy=None, transport=transport
+            )
+        assert all(sim._time_series is None for sim in sims.values())
+        reference = runner.run_one(idf_file, epw_file, backup_strategy=None)
+        assert len(pickle.dumps(sims["sim_0"])) < len(pickle.dumps(reference))
+        for sim in sims.values():
+            assert sim.time_series.keys() == reference.time_series.keys()
+            for name, df in sim.time_series.items():
+                pd.testing.assert_frame_equal(df, reference.time_series[name])
+    assert not transport.root.exists()
+
+
+def test_transport_with_output_selection(fake_eplus_root, idf_file, epw_file):
+    runner = EPlusRunner(fake_eplus_root)
+    with MemmapTransport() as transport:
+        sim = runner.run_one(
+            idf_file,
+            epw_file,
+            backup_strategy=None,
+            output_selection=OutputSelection(time_series=["meter"], lazy=True),
+            transport=transport,
+        )
+        assert isinstance(sim.time_series["meter"].iloc[0, 1], np.floating)
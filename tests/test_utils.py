@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import pytest
+from path import Path
+
+import fake_energyplus
+from energyplus_wrapper.utils import (
+    consolidate,
+    eplus_datetime_index,
+    format_time_series,
+    process_eplus_html_report,
+    split_time_series_column,
+)
+
+
+@pytest.fixture
+def html_report(tmp_path):
+    with Path(tmp_path):
+        fake_energyplus.write_html("Zone,\nZone,\n")
+    return Path(tmp_path) / "eplus-table.htm"
+
+
+def test_html_report_engines(html_report):
+    reports = process_eplus_html_report(html_report, engine="lxml")
+    bs4_reports = process_eplus_html_report(html_report, engine="bs4")
+    assert list(reports.keys()) == [
+        "Annual_Building_Utility_Performance_Summary_for_Entire_Facility",
+        "Input_Verification_and_Results_Summary_for_Entire_Facility",
+        "Zone_Component_Load_Summary_for_CORE_ZN",
+    ]
+    assert reports.keys() == bs4_reports.keys()
+    for report_key, tables in reports.items():
+        assert tables.keys() == bs4_reports[report_key].keys()
+        for title, df in tables.items():
+            assert df.equals(bs4_reports[report_key][title])
+
+    loads = reports.Zone_Component_Load_Summary_for_CORE_ZN[
+        "Estimated Cooling Peak Load Components"
+    ]
+    assert loads.shape == (2, 2)
+    assert loads.loc["People", "Latent [W]"] == pytest.approx(617.28)
+    general = reports.Input_Verification_and_Results_Summary_for_Entire_Facility[
+        "General"
+    ]
+    assert general.loc["Number of Zones", "Value"] == "2"
+
+
+def test_html_report_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        process_eplus_html_report(Path(tmp_path) / "eplus-table.htm")
+    with pytest.raises(ValueError):
+        process_eplus_html_report(Path(tmp_path) / "eplus-table.htm", engine="bad")
+
+
+def test_eplus_datetime_index():
+    index = eplus_datetime_index(
+        pd.Series([" 12/31  23:00:00", " 12/31  24:00:00", " 01/01  01:00:00"]),
+        year=2015,
+    )
+    assert index.tolist() == [
+        pd.Timestamp("2015-12-31 23:00"),
+        pd.Timestamp("2016-01-01 00:00"),
+        pd.Timestamp("2016-01-01 01:00"),
+    ]
+    assert eplus_datetime_index(pd.Series([" 02/28", " 02/29"]), year=2016)[
+        -1
+    ] == pd.Timestamp("2016-02-29")
+    assert eplus_datetime_index(pd.Series(["January", "February"]))[
+        -1
+    ] == pd.Timestamp("2017-02-01")
+    assert eplus_datetime_index(pd.Series(["simdays=365"])) is None
+    # design days, then a run period over two years
+    index = eplus_datetime_index(
+        pd.Series(
+            [
+                " 07/21  24:00:00",
+                " 12/21  24:00:00",
+                " 01/01  24:00:00",
+                " 12/31  24:00:00",
+                " 01/01  24:00:00",
+            ]
+        ),
+        year=2015,
+    )
+    assert index.year.tolist() == [2015, 2015, 2015, 2016, 2016]
+    assert index[1] == pd.Timestamp("2015-12-22")
+    assert eplus_datetime_index(pd.Series(["December", "January"])).year.tolist() == [
+        2017,
+        2018,
+    ]
+    # a leap year weather file needs a leap year
+    assert eplus_datetime_index(pd.Series([" 02/28", " 02/29"])) is None
+
+
+def test_split_time_series_column():
+    assert split_time_series_column(
+        "CORE_ZN:Zone Mean Air Temperature [C](Hourly)"
+    ) == ("CORE_ZN", "Zone Mean Air Temperature", "C", "Hourly")
+    assert split_time_series_column(
+        "Electricity:Facility [J](Hourly)", meter=True
+    ) == ("", "Electricity:Facility", "J", "Hourly")
+    assert split_time_series_column("Other") == ("", "Other", "", "")
+
+
+def test_format_time_series():
+    time_series = pd.DataFrame(
+        {
+            "Date/Time": [" 01/01  01:00:00", " 01/01  02:00:00"],
+            "CORE_ZN:Zone Mean Air Temperature [C](Hourly)": [20.0, 21.0],
+        }
+    )
+    formatted = format_time_series(time_series, float32=True, split_columns=True)
+    assert isinstance(formatted.index, pd.DatetimeIndex)
+    assert formatted.dtypes.tolist() == ["float32"]
+    assert formatted.columns.names == ["key", "variable", "unit", "frequency"]
+    assert formatted["CORE_ZN"]["Zone Mean Air Temperature"].shape == (2, 1)
+
+
+def test_consolidate():
+    scalars = consolidate({"a": 1.0, "b": 2.0})
+    assert scalars.to_dict() == {"a": 1.0, "b": 2.0}
+    assert scalars.index.name == "sample"
+
+    rows = consolidate({("a", 1): {"x": 1, "y": 2}, ("b", 2): {"x": 3, "y": 4}})
+    assert rows.shape == (2, 2)
+    assert rows.loc[("b", 2), "y"] == 4
+
+    frames = consolidate(
+        {"a": pd.DataFrame({"x": [1, 2]}), "b": pd.DataFrame({"x": [3, 4]})}
+    )
+    assert frames.loc["b"]["x"].tolist() == [3, 4]
+
+    frames = consolidate(
+        {("a", 1): pd.DataFrame({"x": [1, 2]}), ("b", 2): pd.DataFrame({"x": [3, 4]})}
+    )
+    assert frames.index.nlevels == 3
+    assert frames.loc[("b", 2)]["x"].tolist() == [3, 4]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+from path import Path
+from plumbum import ProcessExecutionError
+
+from energyplus_wrapper import EPlusRunner, RamWorkDir
+from energyplus_wrapper.workdir import estimate_output_size
+
+
+def _run_dirs(folder):
+    return Path(folder).dirs("energyplus_run_*")
+
+
+def test_estimate_output_size(idf_file):
+    base = estimate_output_size("Version,8.7;")
+    hourly = estimate_output_size(
+        "Version,8.7; Timestep,6;"
+        " RunPeriod,,1,1,12,31,Tuesday,Yes,Yes,No,Yes,Yes;"
+        " Output:Variable,*,Site Outdoor Air Drybulb Temperature,Hourly;"
+    )
+    timestep = estimate_output_size(
+        "Version,8.7; Timestep,6;"
+        " RunPeriod,,1,1,12,31,Tuesday,Yes,Yes,No,Yes,Yes;"
+        " Output:Variable,*,Site Outdoor Air Drybulb Temperature,Timestep;"
+    )
+    assert hourly - base == 365 * 24 * 64
+    assert timestep - base == 6 * (hourly - base)
+    assert estimate_output_size(idf_file.read_text()) > base
+
+
+def test_ram_working_dir(fake_eplus_root, idf_file, epw_file, tmp_path):
+    ram_dir = RamWorkDir(
+        Path(tmp_path) / "ram",
+        reserve=0,
+        artifacts=["*.csv", "eplus.err"],
+        artifacts_dir=Path(tmp_path) / "artifacts",
+    )
+    ram_dir.root.mkdir_p()
+    temp_dir = (Path(tmp_path) / "disk").mkdir_p()
+    runner = EPlusRunner(fake_eplus_root, temp_dir=temp_dir, ram_dir=ram_dir)
+    sim = runner.run_one(idf_file, epw_file, simulation_name="sim")
+    assert sim.working_dir.parent == ram_dir.root
+    assert "artifacts" in sim.timings
+    assert not sim.time_series["eplus"].empty
+    assert not _run_dirs(ram_dir.root)
+    assert not ram_dir.reservations_dir.files()
+    saved = sorted(file.name for file in (ram_dir.artifacts_dir / "sim").files())
+    assert saved == ["eplus-meter.csv", "eplus.csv", "eplus.err"]
+    assert not _run_dirs(temp_dir)
+
+
+def test_fallback_on_disk(fake_eplus_root, idf_file, epw_file, tmp_path):
+    ram_dir = RamWorkDir(Path(tmp_path) / "ram", reserve=0, expected_size=2 ** 60)
+    ram_dir.root.mkdir_p()
+    temp_dir = (Path(tmp_path) / "disk").mkdir_p()
+    runner = EPlusRunner(fake_eplus_root, temp_dir=temp_dir, ram_dir=ram_dir)
+    sim = runner.run_one(idf_file, epw_file)
+    assert sim.working_dir.parent == temp_dir
+    assert not _run_dirs(temp_dir)
+
+    # no RAM-backed file system at all
+    runner.ram_dir = RamWorkDir(Path(tmp_path) / "missing")
+    sim = runner.run_one(idf_file, epw_file)
+    assert sim.working_dir.parent == temp_dir
+
+
+def test_failed_run_moved_on_disk(fake_eplus_root, idf_file, epw_file, tmp_path):
+    failing_idf_file = Path(tmp_path) / "failing.idf"
+    failing_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_FAIL;\n")
+    ram_dir = RamWorkDir(Path(tmp_path) / "ram", reserve=0)
+    ram_dir.root.mkdir_p()
+    temp_dir = (Path(tmp_path) / "disk").mkdir_p()
+    runner = EPlusRunner(fake_eplus_root, temp_dir=temp_dir, ram_dir=ram_dir)
+    with pytest.raises(ProcessExecutionError):
+        runner.run_one(failing_idf_file, epw_file, backup_strategy=None)
+    assert not _run_dirs(ram_dir.root)
+    assert not ram_dir.reservations_dir.files()
+    (kept,) = _run_dirs(temp_dir)
+    assert "Severe" in (kept / "eplus.err").read_text()
+
+
+def test_reservations(tmp_path):
+    ram_dir = RamWorkDir(Path(tmp_path) / "ram", reserve=0, expected_size=2 ** 20)
+    ram_dir.root.mkdir_p()
+    free = ram_dir.free_space()
+    working_dir = ram_dir.create("Version,8.7;", Path(tmp_path))
+    assert working_dir.parent == ram_dir.root
+    (working_dir / "eplus.eso").write_bytes(b"0" * 2 ** 18)
+    # the reserved space not written yet
+    assert ram_dir._reserved() == 2 ** 20 - 2 ** 18
+    assert ram_dir.free_space() < free
+    working_dir.rmtree()
+    # a reservation left by a crashed run is dropped
+    assert ram_dir._reserved() == 0
+    assert not ram_dir.reservations_dir.files()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from contextlib import closing
+
+import pytest
+from path import Path
+
+from energyplus_wrapper import EPlusRunner, WorkQueue
+from energyplus_wrapper.worker import Worker
+
+package_dir = Path(__file__).abspath().parent.parent
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(Path(tmp_path) / "queue.sqlite", lease=1)
+
+
+def test_worker_processes(queue, fake_eplus_root, idf_file, epw_file, monkeypatch):
+    runner = EPlusRunner(fake_eplus_root)
+    samples = {f"sim_{i}": idf_file for i in range(6)}
+    batch = queue.submit(runner, samples, epw_file=epw_file, backup_strategy=None)
+    env = dict(
+        os.environ,
+        FAKE_EPLUS_SLEEP="0.3",
+        PYTHONPATH=os.pathsep.join([package_dir, os.environ.get("PYTHONPATH", "")]),
+    )
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "energyplus_wrapper.worker",
+                "--queue",
+                queue.path,
+                "--lease",
+                "1",
+                "--poll",
+                "0.1",
+                "--exit-when-empty",
+            ],
+            env=env,
+        )
+        for _ in range(3)
+    ]
+    try:
+        sims = queue.wait(batch, poll=0.1, timeout=60)
+    finally:
+        for worker in workers:
+            worker.wait(timeout=60)
+    assert sims.keys() == samples.keys()
+    assert all(sim.status == "finished" for sim in sims.values())
+    assert all(sim.time_series["eplus"].shape == (48, 4) for sim in sims.values())
+    jobs = queue.jobs(batch)
+    assert (jobs.status == "finished").all()
+    assert jobs.worker.nunique() > 1
+
+
+def test_lease_expiry(queue, fake_eplus_root, idf_file, epw_file):
+    runner = EPlusRunner(fake_eplus_root)
+    batch = queue.submit(runner, {"sim": idf_file}, epw_file=epw_file)
+    crashed_job = queue.claim("crashed-worker")
+    assert queue.claim("other-worker") is None
+
+    assert Worker(queue, poll=0.1).run(exit_when_empty=True) == 1
+    assert not queue.complete(crashed_job.id, "crashed-worker", None)
+    job = queue.jobs(batch).iloc[0]
+    assert job.status == "finished"
+    assert job.attempts == 2
+    assert queue.wait(batch)["sim"].status == "finished"
+
+
+def test_max_attempts(tmp_path, fake_eplus_root, idf_file, epw_file):
+    queue = WorkQueue(Path(tmp_path) / "queue.sqlite", lease=0.1, max_attempts=1)
+    batch = queue.submit(EPlusRunner(fake_eplus_root), {"sim": idf_file}, epw_file)
+    queue.claim("crashed-worker")
+    time.sleep(0.2)
+    assert queue.claim("other-worker") is None
+    assert queue.counts(batch) == {"failed": 1}
+    with pytest.raises(RuntimeError, match="Lease expired"):
+        queue.wait(batch)
+
+
+def test_failed_job(queue, fake_eplus_root, idf_file, epw_file, tmp_path):
+    failing_idf_file = Path(tmp_path) / "failing.idf"
+    failing_idf_file.write_text(idf_file.read_text() + "\nFAKE_EPLUS_FAIL;\n")
+    runner = EPlusRunner(fake_eplus_root)
+    batch = queue.submit(
+        runner,
+        {"ok": idf_file, "failing": failing_idf_file},
+        epw_file=epw_file,
+        backup_strategy=None,
+    )
+    Worker(queue, poll=0.1).run(exit_when_empty=True)
+    assert queue.counts(batch) == {"finished": 1, "failed": 1}
+    with pytest.raises(RuntimeError, match="ProcessExecutionError"):
+        queue.wait(batch)
+
+
+def test_wait_keys(queue, fake_eplus_root, idf_file, epw_file):
+    runner = EPlusRunner(fake_eplus_root)
+    samples = {("sim", i): idf_file for i in range(2)}
+    batch = queue.submit(runner, samples, epw_file=epw_file, backup_strategy=None)
+    Worker(queue, poll=0.1).run(exit_when_empty=True)
+    # the payloads are not needed to load the results
+    with closing(sqlite3.connect(queue.path)) as connection, connection:
+        connection.execute("UPDATE jobs SET payload = x''")
+    sims = queue.wait(batch)
+    assert sims.keys() == samples.keys()